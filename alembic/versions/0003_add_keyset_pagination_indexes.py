@@ -0,0 +1,33 @@
+"""add keyset pagination indexes
+
+Revision ID: 0003
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add (name, id) indexes backing name-ordered keyset pagination.
+
+    The composite index on teams also covers lookups by name alone, so the
+    single-column index it replaces is dropped.
+    """
+
+    op.create_index("idx_companies_name_id", "companies", ["name", "id"])
+    op.create_index("idx_teams_name_id", "teams", ["name", "id"])
+    op.drop_index("idx_teams_name", table_name="teams")
+
+
+def downgrade() -> None:
+    """Restore the single-column team name index and drop the composite ones."""
+
+    op.create_index("idx_teams_name", "teams", ["name"])
+    op.drop_index("idx_teams_name_id", table_name="teams")
+    op.drop_index("idx_companies_name_id", table_name="companies")
@@ -0,0 +1,37 @@
+"""add row versions
+
+Revision ID: 0004
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the version counters ETags are derived from.
+
+    Existing rows start at version 1, like new ones.
+    """
+
+    op.add_column(
+        "companies",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "teams",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Drop the version counters."""
+
+    op.drop_column("teams", "version")
+    op.drop_column("companies", "version")
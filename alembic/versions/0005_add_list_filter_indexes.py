@@ -0,0 +1,43 @@
+"""add list filter indexes
+
+Revision ID: 0005
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add (column, id) indexes backing the list filters and sort keys.
+
+    Each index serves both an equality or range filter on its column with
+    pages ordered by id, and keyset pagination sorted by the column. The
+    (company_id, id) index also covers lookups by company alone, so the
+    single-column index it replaces is dropped.
+    """
+
+    op.create_index("idx_companies_country_id", "companies", ["country", "id"])
+    op.create_index(
+        "idx_companies_founded_year_id", "companies", ["founded_year", "id"]
+    )
+    op.create_index("idx_teams_company_id_id", "teams", ["company_id", "id"])
+    op.create_index("idx_teams_specialty_id", "teams", ["specialty", "id"])
+    op.create_index("idx_teams_size_id", "teams", ["size", "id"])
+    op.drop_index("idx_teams_company_id", table_name="teams")
+
+
+def downgrade() -> None:
+    """Restore the single-column company index and drop the composite ones."""
+
+    op.create_index("idx_teams_company_id", "teams", ["company_id"])
+    op.drop_index("idx_teams_size_id", table_name="teams")
+    op.drop_index("idx_teams_specialty_id", table_name="teams")
+    op.drop_index("idx_teams_company_id_id", table_name="teams")
+    op.drop_index("idx_companies_founded_year_id", table_name="companies")
+    op.drop_index("idx_companies_country_id", table_name="companies")
@@ -0,0 +1,67 @@
+"""add full-text search
+
+Revision ID: 0006
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from play import models
+
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+    ") STORED"
+)
+
+
+def upgrade() -> None:
+    """Add generated search vectors over names and descriptions, with GIN indexes.
+
+    Names weigh more than descriptions in the ranking. Postgres keeps the
+    generated columns up to date on every write.
+
+    On SQLite, the FTS5 index tables and triggers of the models are
+    created instead, and the existing rows are indexed.
+    """
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for table in ("companies", "teams"):
+            for statement in models.sqlite_full_text_ddl(table):
+                op.execute(statement)
+            op.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+        return
+    if dialect != "postgresql":
+        return
+    for table in ("companies", "teams"):
+        op.execute(f"ALTER TABLE {table} ADD COLUMN search_vector {SEARCH_VECTOR}")
+        op.create_index(
+            f"idx_{table}_search_vector",
+            table,
+            ["search_vector"],
+            postgresql_using="gin",
+        )
+
+
+def downgrade() -> None:
+    """Drop the search vectors and their indexes, or the FTS5 tables."""
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for table in ("teams", "companies"):
+            for statement in models.sqlite_full_text_drop_ddl(table):
+                op.execute(statement)
+        return
+    if dialect != "postgresql":
+        return
+    for table in ("teams", "companies"):
+        op.drop_index(f"idx_{table}_search_vector", table_name=table)
+        op.drop_column(table, "search_vector")
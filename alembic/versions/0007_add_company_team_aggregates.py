@@ -0,0 +1,48 @@
+"""add company team aggregates
+
+Revision ID: 0007
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the team count and headcount of each company.
+
+    The columns are backfilled from the existing teams; from then on the
+    team services keep them up to date.
+    """
+
+    op.add_column(
+        "companies",
+        sa.Column("team_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "companies",
+        sa.Column(
+            "total_headcount", sa.BigInteger(), server_default="0", nullable=False
+        ),
+    )
+    op.execute(
+        "UPDATE companies AS c SET team_count = t.team_count, "
+        "total_headcount = t.total_headcount "
+        "FROM (SELECT company_id, count(*) AS team_count, "
+        "coalesce(sum(size), 0) AS total_headcount "
+        "FROM teams GROUP BY company_id) AS t "
+        "WHERE c.id = t.company_id"
+    )
+
+
+def downgrade() -> None:
+    """Drop the team aggregates."""
+
+    op.drop_column("companies", "total_headcount")
+    op.drop_column("companies", "team_count")
@@ -0,0 +1,45 @@
+"""add stats rollups
+
+Revision ID: 0008
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Create the tables statistics endpoints are served from.
+
+    The rollups start empty and are computed on first use.
+    """
+
+    op.create_table(
+        "stats_rollups",
+        sa.Column("dimension", sa.String(50), primary_key=True),
+        sa.Column("key", sa.String(255), primary_key=True),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("metrics", sa.JSON(), nullable=False),
+    )
+    op.create_index(
+        "idx_stats_rollups_dimension_size", "stats_rollups", ["dimension", "size"]
+    )
+    op.create_table(
+        "stats_refreshes",
+        sa.Column("dimension", sa.String(50), primary_key=True),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Drop the statistics rollup tables."""
+
+    op.drop_table("stats_refreshes")
+    op.drop_index("idx_stats_rollups_dimension_size", table_name="stats_rollups")
+    op.drop_table("stats_rollups")
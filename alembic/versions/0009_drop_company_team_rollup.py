@@ -0,0 +1,28 @@
+"""drop company team rollup
+
+Revision ID: 0009
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Delete the rollup of teams per company.
+
+    Teams per company are now read from the aggregates of the companies,
+    so its rollup, one row per company, is no longer refreshed.
+    """
+
+    op.execute("DELETE FROM stats_rollups WHERE dimension = 'teams.company_id'")
+    op.execute("DELETE FROM stats_refreshes WHERE dimension = 'teams.company_id'")
+
+
+def downgrade() -> None:
+    """Nothing to restore: the rollup is recomputed on first use."""
@@ -0,0 +1,63 @@
+"""normalize company websites
+
+Revision ID: 0010
+"""
+
+from typing import Sequence, Union
+
+import pydantic
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Store company websites in the form the API validates them to.
+
+    Websites written through the API are normalized by `HttpUrl` (a
+    trailing slash is added to bare hosts, hosts are lowercased), but the
+    rows inserted by revision 0002 were not. Responses are serialized
+    without revalidating rows, so those rows are normalized here. Values
+    that are not valid URLs are left as they are.
+    """
+
+    bind = op.get_bind()
+    companies = sa.table(
+        "companies", sa.column("id", sa.Integer), sa.column("website", sa.String)
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(companies.c.id, companies.c.website)
+            .where(companies.c.id > last_id, companies.c.website.is_not(None))
+            .order_by(companies.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        updates = []
+        for id, website in rows:
+            try:
+                normalized = str(pydantic.HttpUrl(website))
+            except pydantic.ValidationError:
+                continue
+            if normalized != website:
+                updates.append({"row_id": id, "website": normalized})
+        if updates:
+            bind.execute(
+                companies.update()
+                .where(companies.c.id == sa.bindparam("row_id"))
+                .values(website=sa.bindparam("website")),
+                updates,
+            )
+
+
+def downgrade() -> None:
+    """Nothing to undo: normalized websites are valid in every revision."""
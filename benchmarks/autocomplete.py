@@ -0,0 +1,135 @@
+"""
+Benchmark of the autocomplete prefix index against a database `LIKE` query.
+
+Builds an index of synthetic names, then reports its memory footprint and
+the latency of random prefix lookups, next to the same lookups run as
+`name LIKE 'prefix%'` on an indexed column. Results are printed as JSON.
+
+Usage:
+    PYTHONPATH=src python benchmarks/autocomplete.py --names 1000000
+    PYTHONPATH=src python benchmarks/autocomplete.py --url postgresql://...
+"""
+
+import argparse
+import json
+import random
+import statistics
+import string
+import time
+import tracemalloc
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, text
+
+from play import autocomplete
+
+SYLLABLES = ["ka", "to", "ri", "no", "sa", "mi", "ve", "lo", "da", "xu", "an", "el"]
+
+
+def make_names(count: int, rng: random.Random) -> list[str]:
+    return [
+        "".join(rng.choices(SYLLABLES, k=rng.randint(2, 5))).title()
+        + f" {rng.choice(string.ascii_uppercase)}{number}"
+        for number in range(count)
+    ]
+
+
+def percentiles(samples: list[float]) -> dict:
+    cuts = statistics.quantiles(samples, n=100)
+    return {
+        "p50_us": round(cuts[49] * 1e6, 1),
+        "p99_us": round(cuts[98] * 1e6, 1),
+        "max_us": round(max(samples) * 1e6, 1),
+    }
+
+
+def time_lookups(lookup, prefixes: list[str]) -> list[float]:
+    samples = []
+    for prefix in prefixes:
+        start = time.perf_counter()
+        lookup(prefix)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--names", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=2_000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--url",
+        default="sqlite://",
+        help="Database to run the LIKE queries against (default: in-memory SQLite)",
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = make_names(args.names, rng)
+    prefixes = [
+        name[: rng.randint(1, 4)] for name in rng.choices(names, k=args.lookups)
+    ]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = autocomplete.PrefixIndex()
+    index.load(("company", id, name) for id, name in enumerate(names))
+    build_seconds = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    index_samples = time_lookups(lambda p: index.search(p, args.limit), prefixes)
+
+    engine = create_engine(args.url)
+    table = Table(
+        "bench_names",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("name", String(255), index=True),
+    )
+    table.drop(engine, checkfirst=True)
+    table.create(engine)
+    with engine.begin() as connection:
+        for offset in range(0, len(names), 10_000):
+            connection.execute(
+                table.insert(),
+                [
+                    {"id": id, "name": name}
+                    for id, name in enumerate(names[offset : offset + 10_000], offset)
+                ],
+            )
+    query = text(
+        "SELECT id, name FROM bench_names WHERE name LIKE :pattern "
+        "ORDER BY name LIMIT :limit"
+    )
+    with engine.connect() as connection:
+        like_samples = time_lookups(
+            lambda p: connection.execute(
+                query, {"pattern": f"{p}%", "limit": args.limit}
+            ).all(),
+            prefixes,
+        )
+    table.drop(engine)
+
+    print(
+        json.dumps(
+            {
+                "names": args.names,
+                "lookups": args.lookups,
+                "index": {
+                    "memory_mib": round(memory / 2**20, 1),
+                    "build_s": round(build_seconds, 3),
+                    **percentiles(index_samples),
+                },
+                "like": {
+                    "url": engine.url.render_as_string(),
+                    **percentiles(like_samples),
+                },
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
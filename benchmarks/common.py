@@ -0,0 +1,116 @@
+"""
+Shared helpers of the benchmark suite.
+
+Provides the synthetic dataset the service and load benchmarks run
+against, latency percentiles, and the JSON report written by every
+benchmark so that results can be compared across commits.
+"""
+
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+
+import play.seed
+
+COUNTRIES = play.seed.COUNTRIES[:6]
+SPECIALTIES = play.seed.SPECIALTIES
+
+
+def async_url(url: str) -> str:
+    """Map a synchronous database URL to the matching async driver."""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+def seed(url: str, companies: int, teams: int, seed: int = 0):
+    """
+    Fill a database with a deterministic synthetic dataset.
+
+    Delegates to `play.seed`, which resumes a previous run with the same
+    options, so a seeded database is reused by later runs asking for the
+    same volume.
+
+    Args:
+        url (str): Synchronous database URL.
+        companies (int): Number of companies.
+        teams (int): Number of teams, spread over the companies.
+        seed (int): Seed of the random generators.
+    """
+    play.seed.run(
+        url,
+        play.seed.Options(
+            companies=companies, teams=teams, seed=seed, countries=len(COUNTRIES)
+        ),
+        workers=os.cpu_count() or 1,
+    )
+
+
+def percentiles(samples: list[float]) -> dict:
+    """
+    Summarize latencies, given in seconds, in milliseconds.
+
+    Args:
+        samples (list[float]): Latencies in seconds.
+
+    Returns:
+        dict: Count, p50, p95, p99 and max.
+    """
+    if len(samples) < 2:
+        samples = samples * 2 or [0.0, 0.0]
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "count": len(samples),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+def metadata() -> dict:
+    """
+    Describe the run, to compare results across commits and machines.
+
+    Returns:
+        dict: Commit, time, Python version and platform.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def report(name: str, results: dict, output: str | None = None):
+    """
+    Print the results of a benchmark as JSON, and write them to a file.
+
+    Args:
+        name (str): Name of the benchmark.
+        results (dict): Results, including the parameters of the run.
+        output (str | None): File to write the report to.
+    """
+    document = json.dumps(
+        {"benchmark": name, **metadata(), **results}, indent=2, default=str
+    )
+    print(document)
+    if output is not None:
+        with open(output, "w") as file:
+            file.write(document + "\n")
@@ -0,0 +1,113 @@
+"""
+Benchmark of response compression: CPU cost against bytes saved.
+
+Compresses typical response bodies with every available encoding, at a
+few levels each:
+
+- `companies`: a list page of companies (100 rows by default);
+- `teams`: a list page of teams;
+- `export`: an NDJSON export of teams, compressed chunk by chunk like a
+  streamed response (one chunk per row, flushed).
+
+For each body, encoding and level, the compressed size, the compression
+ratio, the CPU time per response and the bytes saved per millisecond of
+CPU are printed as JSON. The defaults of `compression.LEVELS` are marked.
+
+Usage:
+    PYTHONPATH=src python benchmarks/compression.py --rows 100
+"""
+
+import argparse
+import json
+import statistics
+import timeit
+
+from play import compression, models, schemas, serialization
+
+LEVELS = {"gzip": [1, 6, 9], "zstd": [1, 3, 9], "br": [1, 4, 11]}
+
+
+def make_companies(count: int) -> list[models.Company]:
+    return [
+        models.Company(
+            id=id,
+            name=f"Company {id}",
+            country=["Japan", "France", "Canada", "Poland"][id % 4],
+            founded_year=1950 + id % 70,
+            website=f"https://company{id}.example.com/",
+            description=f"Company {id} makes games. " * (1 + id % 5),
+            version=1,
+        )
+        for id in range(1, count + 1)
+    ]
+
+
+def make_teams(count: int) -> list[models.Team]:
+    return [
+        models.Team(
+            id=id,
+            company_id=1 + id % 50,
+            name=f"Team {id}",
+            specialty=["Rendering", "Gameplay", "Audio", "Tools"][id % 4],
+            size=3 + id % 40,
+            version=1,
+        )
+        for id in range(1, count + 1)
+    ]
+
+
+def measure(compress, size: int, repeat: int, number: int) -> dict:
+    output = compress()
+    times = timeit.repeat(compress, repeat=repeat, number=number)
+    cpu_us = statistics.median(times) / number * 1e6
+    return {
+        "compressed_bytes": len(output),
+        "ratio": round(size / len(output), 2),
+        "cpu_us": round(cpu_us, 1),
+        "saved_bytes_per_cpu_ms": round((size - len(output)) / cpu_us * 1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=100)
+    args = parser.parse_args()
+
+    companies = serialization.dump(schemas.CompanyResponse, make_companies(args.rows))
+    teams = make_teams(args.rows)
+    chunks = [serialization.dump(schemas.TeamResponse, team) + b"\n" for team in teams]
+    bodies = {
+        "companies": [companies],
+        "teams": [serialization.dump(schemas.TeamResponse, teams)],
+        "export": chunks,
+    }
+
+    defaults = dict(compression.LEVELS)
+    results = {}
+    for body, parts in bodies.items():
+        size = sum(len(part) for part in parts)
+        results[body] = {"bytes": size, "encodings": {}}
+        for encoding in compression.COMPRESSORS:
+            for level in LEVELS[encoding]:
+                compression.LEVELS[encoding] = level
+
+                def compress():
+                    compressor = compression.COMPRESSORS[encoding]()
+                    return b"".join(compressor.compress(part) for part in parts) + (
+                        compressor.finish()
+                    )
+
+                name = f"{encoding}-{level}"
+                if level == defaults[encoding]:
+                    name += " (default)"
+                results[body]["encodings"][name] = measure(
+                    compress, size, args.repeat, args.number
+                )
+            compression.LEVELS[encoding] = defaults[encoding]
+    print(json.dumps({"rows": args.rows, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark of response serialization paths on a list page.
+
+Serializes a page of company ORM objects (100 rows by default) with:
+
+- `response_model`: what FastAPI does for a returned value, validating
+  each row into the schema, dumping it to Python and encoding with `json`;
+- `validated`: validation followed by pydantic's `dump_json`;
+- `trusted`: `serialization.dump`, reading the fields straight off the
+  rows.
+
+Results are printed as JSON, in microseconds per row.
+
+Usage:
+    PYTHONPATH=src python benchmarks/serialization.py --rows 100
+"""
+
+import argparse
+import json
+import statistics
+import timeit
+
+import pydantic
+
+from play import models, schemas, serialization
+
+
+def make_rows(count: int) -> list[models.Company]:
+    return [
+        models.Company(
+            id=id,
+            name=f"Company {id}",
+            country="Japan",
+            founded_year=1950 + id % 70,
+            website=f"https://company{id}.example.com/",
+            description="Makes games. " * 40,
+            version=1,
+            team_count=id % 12,
+            total_headcount=id * 7,
+        )
+        for id in range(1, count + 1)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    adapter = pydantic.TypeAdapter(list[schemas.CompanyResponse])
+
+    def response_model():
+        value = adapter.validate_python(rows, from_attributes=True)
+        return json.dumps(adapter.dump_python(value, mode="json")).encode()
+
+    def validated():
+        return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+    def trusted():
+        return serialization.dump(schemas.CompanyResponse, rows)
+
+    assert json.loads(validated()) == json.loads(trusted())
+
+    results = {}
+    for name, function in [
+        ("response_model", response_model),
+        ("validated", validated),
+        ("trusted", trusted),
+    ]:
+        times = timeit.repeat(function, repeat=args.repeat, number=args.number)
+        per_row = [time / args.number / args.rows * 1e6 for time in times]
+        results[name] = {
+            "min_us_per_row": round(min(per_row), 3),
+            "median_us_per_row": round(statistics.median(per_row), 3),
+        }
+    results["speedup"] = round(
+        results["response_model"]["median_us_per_row"]
+        / results["trusted"]["median_us_per_row"],
+        1,
+    )
+    print(json.dumps({"rows": args.rows, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
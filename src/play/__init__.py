@@ -1 +1,9 @@
-from play.main import app as app
+def __getattr__(name: str):
+    # `play:app` is resolved lazily, so that importing a submodule (the
+    # models from Alembic, the seeding tool...) does not create the
+    # application.
+    if name == "app":
+        from play.main import app
+
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,371 @@
+"""
+In-process prefix index of company and team names.
+
+This module answers name autocompletion from memory. Names are folded
+(case and accents removed) and kept, for each kind of record, in one
+sorted array of byte strings packed in a single buffer, each key holding
+the folded name, the identifier of the record and its original name. A
+prefix lookup is a binary search followed by a forward scan that stops
+at the limit, so it never touches the database.
+
+Writes do not insert into the array, which would move every following
+key: added keys go to a small sorted buffer and removed keys to a set of
+tombstones, both consulted by lookups. Once they hold
+`AUTOCOMPLETE_MERGE_THRESHOLD` keys, they are merged into a new array in
+one pass, in a background thread, and the new array is swapped in.
+
+The index is built at startup, updated by the service functions after
+each committed write, and rebuilt periodically so that writes made by
+other worker processes show up within `AUTOCOMPLETE_REFRESH_SECONDS`.
+Folding, sorting and packing the names of a rebuild also run in a
+thread, off the event loop.
+"""
+
+import array
+import asyncio
+import bisect
+import heapq
+import logging
+import threading
+import typing
+import unicodedata
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from play import const, models
+
+logger = logging.getLogger(__name__)
+
+KINDS = {"company": "c", "team": "t"}
+_MODELS = {"company": models.Company, "team": models.Team}
+SEPARATOR = b"\x00"
+
+
+def fold(text: str) -> str:
+    """
+    Normalize text for prefix matching.
+
+    Args:
+        text (str): Text to normalize.
+
+    Returns:
+        str: Case-folded text without accents.
+    """
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _key(id: int, name: str) -> bytes:
+    return SEPARATOR.join((fold(name).encode(), str(id).encode(), name.encode()))
+
+
+class _Keys:
+    """Immutable sorted keys, packed in one buffer with their end offsets."""
+
+    def __init__(self, keys: typing.Iterable[bytes] = ()):
+        buffer = bytearray()
+        ends = array.array("Q")
+        for key in keys:
+            buffer += key
+            ends.append(len(buffer))
+        self._buffer = bytes(buffer)
+        self._ends = ends
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    def __getitem__(self, index: int) -> bytes:
+        start = self._ends[index - 1] if index > 0 else 0
+        return self._buffer[start : self._ends[index]]
+
+    def __contains__(self, key: bytes) -> bool:
+        index = bisect.bisect_left(self, key)
+        return index < len(self) and self[index] == key
+
+    def __iter__(self) -> typing.Iterator[bytes]:
+        return self.iter_from(0)
+
+    def iter_from(self, index: int) -> typing.Iterator[bytes]:
+        ends = self._ends
+        start = ends[index - 1] if index > 0 else 0
+        for position in range(index, len(ends)):
+            end = ends[position]
+            yield self._buffer[start:end]
+            start = end
+
+    def nbytes(self) -> int:
+        return len(self._buffer) + self._ends.itemsize * len(self._ends)
+
+
+class _KindIndex:
+    """Keys of one kind of record: packed array, added keys and tombstones."""
+
+    def __init__(self, keys: _Keys | None = None):
+        self.keys = keys if keys is not None else _Keys()
+        self.added: list[bytes] = []
+        self.removed: set[bytes] = set()
+
+    def __len__(self) -> int:
+        return len(self.keys) + len(self.added) - len(self.removed)
+
+    def pending(self) -> int:
+        return len(self.added) + len(self.removed)
+
+    def apply(self, add: bool, key: bytes):
+        index = bisect.bisect_left(self.added, key)
+        present = index < len(self.added) and self.added[index] == key
+        if add:
+            self.removed.discard(key)
+            if not present and key not in self.keys:
+                self.added.insert(index, key)
+        else:
+            if present:
+                del self.added[index]
+            elif key in self.keys:
+                self.removed.add(key)
+
+    def search(self, prefix: bytes, limit: int) -> list[bytes]:
+        keys = self.keys
+        start = bisect.bisect_left(self.added, prefix)
+        merged = heapq.merge(
+            keys.iter_from(bisect.bisect_left(keys, prefix)),
+            self.added[start : start + limit],
+        )
+        results = []
+        for key in merged:
+            if not key.startswith(prefix) or len(results) == limit:
+                break
+            if key not in self.removed:
+                results.append(key)
+        return results
+
+    def copy(self) -> "_KindIndex":
+        index = _KindIndex(self.keys)
+        index.added = list(self.added)
+        index.removed = set(self.removed)
+        return index
+
+    def merged(self) -> _Keys:
+        return _Keys(
+            heapq.merge(
+                (key for key in self.keys if key not in self.removed), self.added
+            )
+        )
+
+
+class PrefixIndex:
+    """
+    Sorted index of names supporting prefix lookups.
+
+    Attributes:
+        loaded (bool): Whether the index was built from the database.
+        merge_threshold (int): Pending added and removed keys of a kind
+            above which they are merged into its array.
+    """
+
+    def __init__(self, merge_threshold: int = const.AUTOCOMPLETE_MERGE_THRESHOLD):
+        self.loaded = False
+        self.merge_threshold = merge_threshold
+        self._kinds = {kind: _KindIndex() for kind in KINDS}
+        self._lock = threading.Lock()
+        # Writes made while a merge runs, replayed on its result.
+        self._journal: list[tuple[str, bool, bytes]] | None = None
+        self._merging: threading.Thread | None = None
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._kinds.values())
+
+    def nbytes(self) -> int:
+        """
+        Measure the memory held by the packed arrays.
+
+        Returns:
+            int: Size in bytes of the arrays, without pending keys.
+        """
+        return sum(index.keys.nbytes() for index in self._kinds.values())
+
+    def add(self, kind: str, id: int, name: str):
+        """
+        Add a record to the index.
+
+        Args:
+            kind (str): `company` or `team`.
+            id (int): Identifier of the record.
+            name (str): Name of the record.
+        """
+        self._write(kind, True, _key(id, name))
+
+    def remove(self, kind: str, id: int, name: str):
+        """
+        Remove a record from the index, if present.
+
+        Args:
+            kind (str): `company` or `team`.
+            id (int): Identifier of the record.
+            name (str): Name the record was indexed under.
+        """
+        self._write(kind, False, _key(id, name))
+
+    def rename(self, kind: str, id: int, old: str, new: str):
+        """
+        Update the name of an indexed record.
+
+        Args:
+            kind (str): `company` or `team`.
+            id (int): Identifier of the record.
+            old (str): Name the record was indexed under.
+            new (str): New name of the record.
+        """
+        if old != new:
+            self.remove(kind, id, old)
+            self.add(kind, id, new)
+
+    def _write(self, kind: str, add: bool, key: bytes):
+        with self._lock:
+            index = self._kinds[kind]
+            index.apply(add, key)
+            if self._journal is not None:
+                self._journal.append((kind, add, key))
+            elif index.pending() >= self.merge_threshold:
+                self._merging = threading.Thread(
+                    target=self.merge, name="autocomplete-merge", daemon=True
+                )
+                self._journal = []
+                self._merging.start()
+
+    def merge(self):
+        """
+        Merge the pending added and removed keys into the packed arrays.
+
+        The new arrays are built without holding the lock; writes made in
+        the meantime are recorded and replayed on them when they are
+        swapped in. Called from a background thread once enough keys are
+        pending.
+        """
+        with self._lock:
+            kinds = {kind: index.copy() for kind, index in self._kinds.items()}
+            generation = self._generation
+            if self._journal is None:
+                self._journal = []
+        merged = {kind: _KindIndex(index.merged()) for kind, index in kinds.items()}
+        with self._lock:
+            journal, self._journal = self._journal, None
+            self._merging = None
+            if generation != self._generation:
+                # The index was reloaded meanwhile, which supersedes the merge.
+                return
+            for kind, add, key in journal:
+                merged[kind].apply(add, key)
+            self._kinds = merged
+
+    def search(self, prefix: str, limit: int = 10, kind: str | None = None) -> list:
+        """
+        Find records whose name starts with a prefix.
+
+        Args:
+            prefix (str): Beginning of the name, matched without regard to
+                case or accents.
+            limit (int): Maximum number of records to return.
+            kind (str | None): Only return records of this kind.
+
+        Returns:
+            list[dict]: Matching records in name order, with their `kind`,
+                `id` and `name`.
+        """
+        folded = fold(prefix).encode()
+        kinds = [kind] if kind is not None else list(KINDS)
+        with self._lock:
+            indexes = [(name, self._kinds[name]) for name in kinds]
+            keys = [
+                (name, key)
+                for name, index in indexes
+                for key in index.search(folded, limit)
+            ]
+        found = []
+        for name, key in keys:
+            folded_name, id, original = key.split(SEPARATOR, 2)
+            found.append((folded_name, KINDS[name], int(id), name, original))
+        return [
+            {"kind": name, "id": id, "name": original.decode()}
+            for _, _, id, name, original in sorted(found)[:limit]
+        ]
+
+    async def rebuild(self, db: AsyncSession):
+        """
+        Rebuild the index from every company and team name.
+
+        The new index is built aside, in a thread, and swapped in at once,
+        so lookups keep being served while it is built.
+
+        Args:
+            db (AsyncSession): Database session.
+        """
+        records = []
+        for kind, model in _MODELS.items():
+            result = await db.stream(
+                select(model.id, model.name).execution_options(yield_per=10000)
+            )
+            async for id, name in result:
+                records.append((kind, id, name))
+        await asyncio.to_thread(self.load, records)
+
+    def load(self, records: typing.Iterable[tuple[str, int, str]]):
+        """
+        Replace the content of the index.
+
+        Args:
+            records (Iterable[tuple[str, int, str]]): `(kind, id, name)` of
+                every record to index.
+        """
+        keys = {kind: [] for kind in KINDS}
+        for kind, id, name in records:
+            keys[kind].append(_key(id, name))
+        kinds = {kind: _KindIndex(_Keys(sorted(keys[kind]))) for kind in KINDS}
+        with self._lock:
+            self._kinds = kinds
+            self._generation += 1
+            self.loaded = True
+
+    def clear(self):
+        """Empty the index."""
+        with self._lock:
+            self._kinds = {kind: _KindIndex() for kind in KINDS}
+            self._generation += 1
+            self.loaded = False
+
+
+names = PrefixIndex()
+
+
+async def build(session_factory: async_sessionmaker) -> bool:
+    """
+    Build the shared index from the database.
+
+    Args:
+        session_factory (async_sessionmaker): Factory of database sessions.
+
+    Returns:
+        bool: Whether the index could be built.
+    """
+    try:
+        async with session_factory() as db:
+            await names.rebuild(db)
+    except Exception:
+        logger.exception("Could not build the autocomplete index")
+        return False
+    return True
+
+
+async def refresh(session_factory: async_sessionmaker, interval: float):
+    """
+    Rebuild the shared index periodically, until cancelled.
+
+    Args:
+        session_factory (async_sessionmaker): Factory of database sessions.
+        interval (float): Seconds between rebuilds.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        await build(session_factory)
@@ -0,0 +1,291 @@
+"""
+In-process response cache.
+
+This module keeps already-serialized responses of hot read endpoints in a
+bounded LRU cache whose entries also expire after a TTL. Keys are tuples
+whose first element names a group (`company`, `companies`, `team`...), so
+a write can drop either one entry or every entry of a group, such as all
+cached list pages. Keys of single resources are `(group, id)`, optionally
+followed by what tells variants of the resource apart (such as a sparse
+fieldset); invalidating `(group, id)` drops every variant.
+
+Services invalidate entries right after committing a write. A read that
+started before the write could still store what it read after the
+invalidation; every invalidation therefore bumps a generation counter,
+and values loaded while the generation changed are returned but not
+stored.
+
+Bodies large enough to be worth compressing are also stored compressed,
+once per content coding clients asked for, so that hits are not
+compressed again on every request.
+
+Reads may be served by a lagging replica, which can still return what a
+write just replaced. Values loaded from a replica are therefore not
+stored for the replication lag window following an invalidation, and
+clients pinned to the primary after a write (see
+`replicas.ReadYourWritesMiddleware`) bypass the cache altogether, so
+that they read their own writes.
+
+The cache is local to each worker process, so entries can be stale for
+at most the TTL after a write made by another worker.
+"""
+
+import collections
+import threading
+import time
+import typing
+
+from fastapi import Request, Response
+
+from play import compression, conditional, const, replicas
+
+Key = tuple
+Entry = tuple[bytes, dict[str, str]]
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of serialized responses with expiry.
+
+    Args:
+        max_entries (int): Maximum number of entries, 0 to disable caching.
+        ttl (float): Seconds an entry stays valid.
+
+    Attributes:
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that had to load the value.
+        evictions (int): Entries dropped to make room for new ones.
+        expirations (int): Entries dropped because they were too old.
+        invalidations (int): Entries dropped by writes.
+        invalidated_at (float): Monotonic time of the last invalidation.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.generation = 0
+        self.invalidated_at = float("-inf")
+        self._entries: collections.OrderedDict[
+            Key, tuple[float, Entry, dict[str, bytes]]
+        ] = collections.OrderedDict()
+        self._groups: dict[str, set[Key]] = collections.defaultdict(set)
+        self._variants: dict[Key, set[Key]] = collections.defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: Key):
+        del self._entries[key]
+        self._groups[key[0]].discard(key)
+        variants = self._variants.get(key[:2])
+        if variants is not None:
+            variants.discard(key)
+            if not variants:
+                del self._variants[key[:2]]
+
+    def get(self, key: Key) -> Entry | None:
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key (Key): Key of the entry.
+
+        Returns:
+            Entry | None: Body and headers, or None if absent or expired.
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[0] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Key, entry: Entry, generation: int | None = None):
+        """
+        Store an entry, evicting the least recently used ones if full.
+
+        Args:
+            key (Key): Key of the entry.
+            entry (Entry): Body and headers to store.
+            generation (int | None): Value of `generation` before the entry
+                was loaded; the entry is not stored if it changed since.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, entry, {})
+            self._groups[key[0]].add(key)
+            self._variants[key[:2]].add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def compressed(self, key: Key, body: bytes, encoding: str) -> bytes:
+        """
+        Return the compressed body of an entry, compressing it on first use.
+
+        Args:
+            key (Key): Key of the entry.
+            body (bytes): Body of the entry.
+            encoding (str): Content coding (see `compression.COMPRESSORS`).
+
+        Returns:
+            bytes: The body compressed with `encoding`.
+        """
+        with self._lock:
+            item = self._entries.get(key)
+            encoded = item[2] if item is not None and item[1][0] is body else None
+            data = encoded.get(encoding) if encoded is not None else None
+        if data is None:
+            data = compression.compress(body, encoding)
+            if encoded is not None:
+                encoded[encoding] = data
+        return data
+
+    async def fetch(
+        self,
+        key: Key | None,
+        load: typing.Callable[
+            [], typing.Awaitable[tuple[dict[str, str], typing.Callable[[], bytes]]]
+        ],
+        request: Request | None = None,
+    ) -> Response:
+        """
+        Return a cached response, loading and storing it on a miss.
+
+        When the request's `If-None-Match` matches the `ETag` header of the
+        entry, a `304 Not Modified` response is returned instead; on a miss
+        the body is then not even serialized. Cached bodies of at least
+        `COMPRESSION_MINIMUM_SIZE` bytes are returned compressed with the
+        encoding the request accepts, compressed once per entry.
+
+        Requests of clients pinned to the primary bypass the cache. Values
+        loaded from a replica (see `database.get_read_db`) are not stored
+        within the replication lag window following an invalidation.
+
+        Args:
+            key (Key | None): Key of the entry, or None to bypass the cache.
+            load (Callable): Coroutine function returning the headers of the
+                response and a function serializing its body.
+            request (Request | None): Incoming request, for conditional GET.
+
+        Returns:
+            Response: JSON response built from the entry, or 304 response.
+        """
+        if request is not None and replicas.is_sticky(request.cookies):
+            key = None
+        entry = None if key is None else self.get(key)
+        if entry is None:
+            generation = self.generation
+            headers, render = await load()
+            if conditional.matches(request, headers.get("ETag")):
+                return conditional.not_modified(headers)
+            entry = (render(), headers)
+            if key is not None and not self._lagging(request):
+                self.set(key, entry, generation)
+        body, headers = entry
+        if conditional.matches(request, headers.get("ETag")):
+            return conditional.not_modified(headers)
+        encoding = None
+        if (
+            key is not None
+            and request is not None
+            and len(body) >= compression.minimum_size
+        ):
+            encoding = compression.negotiate(request.headers.get("accept-encoding", ""))
+        if encoding is None:
+            return Response(body, media_type="application/json", headers=headers)
+        response = Response(
+            self.compressed(key, body, encoding),
+            media_type="application/json",
+            headers=headers,
+        )
+        compression.encoded_headers(response.headers, encoding)
+        return response
+
+    def _lagging(self, request: Request | None) -> bool:
+        lag = None if request is None else getattr(request.state, "replica_lag", None)
+        return lag is not None and time.monotonic() - self.invalidated_at < lag
+
+    def invalidate(self, *keys: Key, groups: typing.Iterable[str] = ()):
+        """
+        Drop entries after a write.
+
+        Args:
+            *keys (Key): Keys of the entries to drop, with all their variants.
+            groups (Iterable[str]): Groups whose entries are all dropped.
+        """
+        with self._lock:
+            self.generation += 1
+            self.invalidated_at = time.monotonic()
+            targets = set(keys)
+            for key in keys:
+                targets |= self._variants.get(key[:2], set())
+            for group in groups:
+                targets |= self._groups.pop(group, set())
+            for key in targets:
+                if key in self._entries:
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self._variants.clear()
+            self.generation += 1
+            self.invalidated_at = float("-inf")
+            self.hits = self.misses = self.evictions = 0
+            self.expirations = self.invalidations = 0
+
+    def configure(self, max_entries: int, ttl: float):
+        """
+        Change the size and expiry of the cache, dropping every entry.
+
+        Args:
+            max_entries (int): Maximum number of entries, 0 to disable
+                caching.
+            ttl (float): Seconds an entry stays valid.
+        """
+        self.clear()
+        with self._lock:
+            self.max_entries = max_entries
+            self.ttl = ttl
+
+    def stats(self) -> dict:
+        """
+        Collect the size and counters of the cache.
+
+        Returns:
+            dict: Entry count, limits, and hit/miss/eviction counters.
+        """
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+responses = ResponseCache(const.CACHE_MAX_ENTRIES, const.CACHE_TTL_SECONDS)
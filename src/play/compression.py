@@ -0,0 +1,283 @@
+"""
+Negotiated response compression.
+
+This module compresses response bodies with the best encoding a client
+accepts, among zstd, brotli and gzip. Zstandard comes from the standard
+library (`compression.zstd`, or the `zstandard` package on older
+interpreters) and brotli from the optional `brotli` package; encodings
+whose library is missing are not offered. The libraries are only looked
+up at import, and loaded when a first body is compressed with them.
+
+`CompressionMiddleware` compresses responses of compressible media types
+whose body reaches a minimum size. Streamed responses are compressed
+chunk by chunk, each chunk being flushed so that clients receive rows as
+they are produced. Responses that already carry a `Content-Encoding`,
+such as the pre-compressed bodies of the response cache, are left as
+they are.
+
+Compressing changes the bytes of a representation, so a strong `ETag`
+is turned into a weak one, which `If-None-Match` still matches.
+"""
+
+import functools
+import importlib
+import importlib.util
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from play import const
+
+
+def _find(*names: str) -> str | None:
+    for name in names:
+        try:
+            if importlib.util.find_spec(name) is not None:
+                return name
+        except ModuleNotFoundError:
+            pass
+    return None
+
+
+_ZSTD = _find("compression.zstd", "zstandard")
+_BROTLI = _find("brotli", "brotlicffi")
+
+
+@functools.cache
+def _load(name: str):
+    return importlib.import_module(name)
+
+
+LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/problem+json",
+    "application/javascript",
+    "application/xml",
+)
+
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(
+            LEVELS["gzip"], zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Zstd:
+    def __init__(self):
+        self._module = _load(_ZSTD)
+        if _ZSTD == "compression.zstd":
+            self._compressor = self._module.ZstdCompressor(LEVELS["zstd"])
+        else:
+            self._compressor = self._module.ZstdCompressor(
+                level=LEVELS["zstd"]
+            ).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        if _ZSTD == "compression.zstd":
+            return self._compressor.compress(
+                data, mode=self._module.ZstdCompressor.FLUSH_BLOCK
+            )
+        return self._compressor.compress(data) + self._compressor.flush(
+            self._module.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        if _ZSTD == "compression.zstd":
+            return self._compressor.flush(mode=self._module.ZstdCompressor.FLUSH_FRAME)
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = _load(_BROTLI).Compressor(quality=LEVELS["br"])
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+COMPRESSORS = {"gzip": _Gzip}
+if _ZSTD is not None:
+    COMPRESSORS["zstd"] = _Zstd
+if _BROTLI is not None:
+    COMPRESSORS["br"] = _Brotli
+
+# Encodings offered and smallest body compressed, see `configure`.
+ENCODINGS: list[str] = []
+minimum_size = const.COMPRESSION_MINIMUM_SIZE
+
+
+def configure(encodings: tuple[str, ...], minimum: int):
+    """
+    Set the encodings offered to clients and the smallest body compressed.
+
+    Args:
+        encodings (tuple[str, ...]): Content codings, preferred first; those
+            whose library is missing are left out.
+        minimum (int): Smallest body, in bytes, worth compressing.
+    """
+    global minimum_size
+    ENCODINGS[:] = [encoding for encoding in encodings if encoding in COMPRESSORS]
+    minimum_size = minimum
+
+
+configure(const.COMPRESSION_ENCODINGS, const.COMPRESSION_MINIMUM_SIZE)
+
+
+def negotiate(accept_encoding: str, encodings: list[str] = ENCODINGS) -> str | None:
+    """
+    Pick the content coding of a response.
+
+    Args:
+        accept_encoding (str): `Accept-Encoding` header of the request.
+        encodings (list[str]): Available encodings, preferred first.
+
+    Returns:
+        str | None: The first available encoding the client accepts with
+            a non-zero quality, or None to send the body as is.
+    """
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip()] = quality
+    wildcard = accepted.get("*", 0.0)
+    for encoding in encodings:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compress a whole body.
+
+    Args:
+        data (bytes): Body to compress.
+        encoding (str): Content coding, one of `COMPRESSORS`.
+
+    Returns:
+        bytes: The compressed body.
+    """
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.finish()
+
+
+def compressible(content_type: str | None) -> bool:
+    """
+    Tell whether a media type is worth compressing.
+
+    Args:
+        content_type (str | None): `Content-Type` of the response.
+
+    Returns:
+        bool: True for text and JSON-like types.
+    """
+    return content_type is not None and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def encoded_headers(headers: MutableHeaders, encoding: str):
+    """
+    Update the headers of a response whose body gets compressed.
+
+    Args:
+        headers (MutableHeaders): Headers of the response.
+        encoding (str): Content coding applied to the body.
+    """
+    headers["Content-Encoding"] = encoding
+    headers.add_vary_header("Accept-Encoding")
+    tag = headers.get("etag")
+    if tag is not None and not tag.startswith("W/"):
+        headers["ETag"] = f"W/{tag}"
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with a negotiated encoding.
+
+    Args:
+        app (ASGIApp): Application to wrap.
+        minimum_size (int): Smallest body, in bytes, worth compressing.
+            Streamed bodies are always compressed.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        compressor = None
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                if (
+                    "content-encoding" in headers
+                    or not compressible(headers.get("content-type"))
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    await send(start)
+                else:
+                    compressor = COMPRESSORS[encoding]()
+                    encoded_headers(headers, encoding)
+                    del headers["Content-Length"]
+                    if not more_body:
+                        body = compressor.compress(body) + compressor.finish()
+                        headers["Content-Length"] = str(len(body))
+                        await send(start)
+                        await send({**message, "body": body})
+                        return
+                    await send(start)
+                start = None
+            if compressor is not None:
+                body = compressor.compress(body) if body else b""
+                if not more_body:
+                    body += compressor.finish()
+                    compressor = None
+                await send({**message, "body": body})
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
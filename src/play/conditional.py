@@ -0,0 +1,112 @@
+"""
+Conditional GET support.
+
+This module builds strong ETags from row version counters and answers
+`If-None-Match` requests. Because the tag only depends on identifiers and
+versions, a matching request is answered with `304 Not Modified` before
+the body is loaded or serialized.
+"""
+
+import zlib
+
+from fastapi import Request, Response, status
+
+from play import const
+
+# `Cache-Control` of company and team responses, see `configure`.
+cache_control = "no-cache"
+
+
+def configure(max_age: int):
+    """
+    Set how long clients may reuse responses without revalidating them.
+
+    Args:
+        max_age (int): Seconds of reuse, 0 to always revalidate.
+    """
+    global cache_control
+    cache_control = f"max-age={max_age}, must-revalidate" if max_age > 0 else "no-cache"
+
+
+configure(const.HTTP_CACHE_MAX_AGE)
+
+
+def etag(*parts) -> str:
+    """
+    Build a strong ETag.
+
+    Args:
+        *parts: Values identifying one representation, typically the row
+            identifier and version.
+
+    Returns:
+        str: The quoted entity tag.
+    """
+    return '"' + ".".join(str(part) for part in parts) + '"'
+
+
+def query_digest(request: Request) -> str:
+    """
+    Summarize the query string of a request.
+
+    Args:
+        request (Request): Incoming request.
+
+    Returns:
+        str: Short digest, to tell apart representations of the same rows
+            selected with different parameters.
+    """
+    query = sorted(request.query_params.multi_items())
+    return format(zlib.crc32(repr(query).encode()), "08x")
+
+
+def headers(tag: str) -> dict[str, str]:
+    """
+    Build the validation headers of a response.
+
+    Args:
+        tag (str): Entity tag of the response.
+
+    Returns:
+        dict[str, str]: `ETag` and `Cache-Control` headers.
+    """
+    return {"ETag": tag, "Cache-Control": cache_control}
+
+
+def matches(request: Request | None, tag: str | None) -> bool:
+    """
+    Tell whether a request already holds the current representation.
+
+    Entity tags are compared with the weak comparison `If-None-Match`
+    calls for, so `W/` prefixes are ignored.
+
+    Args:
+        request (Request | None): Incoming request.
+        tag (str | None): Current entity tag.
+
+    Returns:
+        bool: True if the request's `If-None-Match` lists `tag` or `*`.
+    """
+    if request is None or tag is None:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {
+        candidate.strip().removeprefix("W/") for candidate in header.split(",")
+    }
+    return "*" in candidates or tag in candidates
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    """
+    Build a `304 Not Modified` response.
+
+    Args:
+        headers (dict[str, str]): Headers of the current representation,
+            including its `ETag`.
+
+    Returns:
+        Response: Empty response carrying the given headers.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
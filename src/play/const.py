@@ -1,27 +1,42 @@
 """
 Application configuration constants.
 
-This module loads required environment variables related to the
-PostgreSQL database configuration and builds the SQLAlchemy
-database connection URL.
-
-Environment Variables:
-    POSTGRES_USER (str): Database username.
-    POSTGRES_PASSWORD (str): Database user password.
-    POSTGRES_DB (str): Database name.
-    POSTGRES_HOST (str): Database host address.
-    POSTGRES_PORT (str): Database port.
-
-Raises:
-    KeyError: If any required environment variable is missing.
+This module holds the default values of the optional settings tuning
+the application. They are overridden by the environment variables read
+by `play.settings.Settings.from_env`, where each one is documented, or by
+the `Settings` an application is created with.
 """
 
-import os
+DB_POOL_SIZE = 5
+DB_MAX_OVERFLOW = 10
+DB_POOL_TIMEOUT = 30.0
+DB_POOL_RECYCLE = -1
+DB_POOL_PRE_PING = False
 
-POSTGRES_USER = os.environ["POSTGRES_USER"]
-POSTGRES_PASSWORD = os.environ["POSTGRES_PASSWORD"]
-POSTGRES_DB = os.environ["POSTGRES_DB"]
-POSTGRES_HOST = os.environ["POSTGRES_HOST"]
-POSTGRES_PORT = os.environ["POSTGRES_PORT"]
+REPLICA_HEALTH_INTERVAL = 10.0
+REPLICA_STICKY_SECONDS = 5.0
 
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+CACHE_MAX_ENTRIES = 10000
+CACHE_TTL_SECONDS = 30.0
+
+HTTP_CACHE_MAX_AGE = 0
+
+AUTOCOMPLETE_REFRESH_SECONDS = 300.0
+AUTOCOMPLETE_MERGE_THRESHOLD = 10000
+
+STATS_REFRESH_SECONDS = 60.0
+
+COMPRESSION_MINIMUM_SIZE = 500
+COMPRESSION_ENCODINGS = ("zstd", "br", "gzip")
+
+METRICS_MULTIPROCESS_DIR = None
+METRICS_PUBLISH_SECONDS = 5.0
+
+SLOW_QUERY_SECONDS = 0.2
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+SLOW_QUERY_LOG_SIZE = 100
+
+WARMUP_CONNECTIONS = DB_POOL_SIZE
+WARMUP_REQUESTS = True
+WARMUP_HOT_COMPANIES = 0
+WARMUP_TIMEOUT = 30.0
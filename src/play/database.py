@@ -1,20 +1,150 @@
 """
 Database configuration module.
 
-This module initializes the SQLAlchemy engine and session factory,
-configures SQLite-specific behavior, and provides the declarative base
-class for ORM models.
+This module defines `Database`, the engines and session factories of an
+application, configures SQLite-specific behavior, and provides the
+declarative base class for ORM models.
 
-It also exposes a dependency function to provide database sessions.
+Two data paths are available:
+- a synchronous engine (psycopg2), used by tooling and scripts;
+- an asynchronous engine (asyncpg), used by the API request path so
+  that handlers do not hold a threadpool slot while waiting on the database.
+
+Both engines use instrumented connection pools sized from the settings,
+whose live statistics are available through `play.pooling.snapshot`.
+
+Read-only endpoints can be served by optional read replicas, selected by
+`Database.replica_router`; writes always go to the primary.
+
+Engines are only created when first used, normally by the application
+lifespan, so importing this module (as Alembic and the models do) neither
+loads the database drivers nor reads the connection settings. The
+`Database` of an application is kept in `app.state.database`, and the
+dependency functions below provide sessions from it.
 """
 
+import functools
+import sqlite3
+import sys
+
+from fastapi import Request
 from sqlalchemy import create_engine, event, orm
 from sqlalchemy.engine import Engine
-from play import const
-import sqlite3
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from play import pooling, replicas
+from play.settings import Settings
+
+
+class Database:
+    """
+    Engines and session factories of an application, created on first use.
+
+    Args:
+        settings (Settings): Database URLs and pool configuration.
+    """
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
 
-engine = create_engine(const.DATABASE_URL)
-SessionLocal = orm.sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    @functools.cached_property
+    def engine(self) -> Engine:
+        """Synchronous engine of the primary, for tooling and scripts."""
+        return create_engine(
+            self.settings.database_url,
+            poolclass=pooling.InstrumentedQueuePool,
+            **self.settings.pool_options(),
+        )
+
+    @functools.cached_property
+    def session_factory(self) -> orm.sessionmaker:
+        """Factory of synchronous sessions bound to `engine`."""
+        return orm.sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+    @functools.cached_property
+    def async_engine(self) -> AsyncEngine:
+        """Asynchronous engine of the primary, for the API request path."""
+        return create_async_engine(
+            self.settings.async_database_url,
+            poolclass=pooling.InstrumentedAsyncQueuePool,
+            **self.settings.pool_options(),
+        )
+
+    @functools.cached_property
+    def async_session_factory(self) -> async_sessionmaker:
+        """
+        Factory of asynchronous sessions bound to `async_engine`.
+
+        Sessions do not expire loaded objects on commit, so that responses
+        can be serialized without lazy loading.
+        """
+        return async_sessionmaker(
+            self.async_engine, autoflush=False, expire_on_commit=False
+        )
+
+    @functools.cached_property
+    def replica_router(self) -> replicas.ReplicaRouter:
+        """Selection of the read replica serving read-only work."""
+        return replicas.ReplicaRouter(
+            [
+                create_async_engine(
+                    url,
+                    poolclass=pooling.InstrumentedAsyncQueuePool,
+                    **self.settings.pool_options(),
+                )
+                for url in self.settings.async_replica_urls
+            ],
+            health_interval=self.settings.replica_health_interval,
+        )
+
+    def async_engines(self) -> dict[str, AsyncEngine]:
+        """
+        List the engines of the API request path.
+
+        Returns:
+            dict[str, AsyncEngine]: The primary engine, then the engine of
+                each read replica, by name (`primary`, `replica0`...).
+        """
+        return {
+            "primary": self.async_engine,
+            **{
+                f"replica{index}": replica.engine
+                for index, replica in enumerate(self.replica_router.replicas)
+            },
+        }
+
+    def pools(self) -> dict:
+        """
+        List the connection pools of the API request path.
+
+        Returns:
+            dict[str, QueuePool]: The primary pool, then the pool of each
+                read replica, by name (`primary`, `replica0`, `replica1`...).
+        """
+        return {name: engine.pool for name, engine in self.async_engines().items()}
+
+    async def dispose(self):
+        """Close the connections of the engines created so far."""
+        if "engine" in self.__dict__:
+            self.engine.dispose()
+        if "async_engine" in self.__dict__:
+            await self.async_engine.dispose()
+        if "replica_router" in self.__dict__:
+            for replica in self.replica_router.replicas:
+                await replica.engine.dispose()
+
+
+def of(request: Request) -> Database:
+    """
+    Find the database of the application serving a request.
+
+    Args:
+        request (Request): Incoming request.
+
+    Returns:
+        Database: The `Database` kept in the application state.
+    """
+    return request.app.state.database
 
 
 @event.listens_for(Engine, "connect")
@@ -24,14 +154,21 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
 
     SQLite does not enforce foreign key constraints by default.
     This event listener ensures that the PRAGMA foreign_keys=ON
-    setting is applied every time a new connection is created.
+    setting is applied every time a new connection is created,
+    for both the sqlite3 and the aiosqlite drivers.
 
     Args:
         dbapi_connection: The raw DB-API connection.
         connection_record: SQLAlchemy connection record (unused).
     """
 
-    if isinstance(dbapi_connection, sqlite3.Connection):
+    # The aiosqlite adapter is only imported by SQLAlchemy when an
+    # aiosqlite engine is created; without it, no connection can be one.
+    aiosqlite = sys.modules.get("sqlalchemy.dialects.sqlite.aiosqlite")
+    types = (sqlite3.Connection,)
+    if aiosqlite is not None:
+        types += (aiosqlite.AsyncAdapt_aiosqlite_connection,)
+    if isinstance(dbapi_connection, types):
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA foreign_keys=ON")
         cursor.close()
@@ -48,7 +185,7 @@ class Base(orm.DeclarativeBase):
     pass
 
 
-def get_db():
+def get_db(request: Request):
     """
     Provide a database session.
 
@@ -56,12 +193,67 @@ def get_db():
     It yields a SQLAlchemy session and ensures it is properly closed
     after the request lifecycle.
 
+    Args:
+        request (Request): Incoming request, used to find the database.
+
     Yields:
         Session: An active SQLAlchemy database session.
     """
-    db = SessionLocal()
+    db = of(request).session_factory()
     try:
         yield db
     finally:
         db.close()
 
+
+async def get_async_db(request: Request):
+    """
+    Provide an asynchronous database session.
+
+    This function is intended to be used as a FastAPI dependency by
+    `async def` handlers. Sessions do not expire loaded objects on commit,
+    so that responses can be serialized without lazy loading.
+
+    Args:
+        request (Request): Incoming request, used to find the database.
+
+    Yields:
+        AsyncSession: An active SQLAlchemy asynchronous database session.
+    """
+    async with of(request).async_session_factory() as db:
+        yield db
+
+
+async def get_read_db(request: Request):
+    """
+    Provide an asynchronous database session for read-only work.
+
+    The session is bound to a healthy read replica when one is configured,
+    and to the primary otherwise. Clients that wrote recently (see
+    `replicas.ReadYourWritesMiddleware`) are kept on the primary so that
+    they read their own writes. Queries that lock rows (`with_for_update`)
+    or write must use `get_async_db` instead.
+
+    When the session is bound to a replica, the replication lag tolerated
+    after a write (`replica_sticky_seconds`) is recorded in
+    `request.state.replica_lag`, so that the response cache does not store
+    what a lagging replica returned right after an invalidation.
+
+    Args:
+        request (Request): Incoming request, used to detect sticky clients.
+
+    Yields:
+        AsyncSession: An active SQLAlchemy asynchronous database session.
+    """
+    database = of(request)
+    engine = None
+    if not replicas.is_sticky(request.cookies):
+        engine = database.replica_router.choose()
+    factory = database.async_session_factory
+    if engine is None:
+        session = factory()
+    else:
+        request.state.replica_lag = database.settings.replica_sticky_seconds
+        session = factory(bind=engine)
+    async with session as db:
+        yield db
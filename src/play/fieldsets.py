@@ -0,0 +1,57 @@
+"""
+Sparse fieldsets.
+
+Read endpoints accept a `fields` query parameter listing the attributes
+of the response schema a client needs, such as `fields=id,name`. Only
+those columns are then loaded from the database, which skips reading
+large values such as descriptions, and only those fields are serialized.
+"""
+
+import pydantic
+from fastapi import HTTPException, status
+
+
+def parse(value: str | None, schema: type[pydantic.BaseModel]) -> tuple | None:
+    """
+    Validate a `fields` query parameter against a response schema.
+
+    Args:
+        value (str | None): Comma-separated field names, or None for all.
+        schema (type[BaseModel]): Response schema the fields belong to.
+
+    Returns:
+        tuple[str, ...] | None: Requested fields in schema order, or None
+            if every field is requested.
+
+    Raises:
+        HTTPException:
+            - 400 if no field or an unknown field is requested.
+    """
+    if value is None:
+        return None
+    requested = {name.strip() for name in value.split(",")} - {""}
+    unknown = requested - schema.model_fields.keys()
+    if not requested or unknown:
+        allowed = ", ".join(schema.model_fields)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid fields, expected some of: {allowed}",
+        )
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+def columns(fields: tuple | None, *required: str) -> tuple | None:
+    """
+    List the columns to load for a set of fields.
+
+    Args:
+        fields (tuple[str, ...] | None): Fields of the response, or None.
+        *required (str): Columns needed besides the response fields, such
+            as the sort key of a page or the row version.
+
+    Returns:
+        tuple[str, ...] | None: Column names, or None to load every column.
+    """
+    if fields is None:
+        return None
+    return tuple(dict.fromkeys((*fields, *required)))
@@ -0,0 +1,229 @@
+"""
+Streaming import of NDJSON or CSV data.
+
+This module parses an incoming byte stream into rows, validates each row
+against a schema and hands valid rows to a loader in batches of
+`BATCH_SIZE`. Only the current line and the current batch are held in
+memory, so files of any size can be imported.
+
+Each batch is committed by its loader, so a failure part-way through an
+import keeps the batches already loaded. Rows that fail validation or
+loading are reported with the line they start on.
+"""
+
+import csv
+import json
+import typing
+
+import pydantic
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from play import schemas
+
+BATCH_SIZE = 5000
+MAX_LINE_BYTES = 1024 * 1024
+
+Batch = list[tuple[int, pydantic.BaseModel]]
+Loader = typing.Callable[
+    [AsyncSession, Batch], typing.Awaitable[tuple[int, list[tuple[int, str]]]]
+]
+
+
+class ImportReport:
+    """
+    Running outcome of an import.
+
+    Attributes:
+        created (int): Number of rows created.
+        rejected (int): Number of rows rejected.
+        errors (list[dict]): The first `IMPORT_MAX_ERRORS` rejected rows.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line: int, detail: str):
+        """
+        Record a rejected row.
+
+        Args:
+            line (int): Line of the input where the row starts.
+            detail (str): Reason the row was rejected.
+        """
+        self.rejected += 1
+        if len(self.errors) < schemas.IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line, "detail": detail})
+
+    def as_dict(self) -> dict:
+        return {
+            "created": self.created,
+            "rejected": self.rejected,
+            "errors": self.errors,
+        }
+
+
+async def _lines(
+    chunks: typing.AsyncIterator[bytes],
+) -> typing.AsyncIterator[tuple[int, bytes]]:
+    buffer = b""
+    number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, line
+        if len(buffer) > MAX_LINE_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                detail=f"Line {number + 1} is longer than {MAX_LINE_BYTES} bytes",
+            )
+    if buffer:
+        yield number + 1, buffer
+
+
+async def _decoded(
+    chunks: typing.AsyncIterator[bytes],
+) -> typing.AsyncIterator[tuple[int, str | None]]:
+    async for number, line in _lines(chunks):
+        try:
+            text = line.decode("utf-8-sig" if number == 1 else "utf-8")
+        except UnicodeDecodeError:
+            yield number, None
+            continue
+        yield number, text.removesuffix("\r")
+
+
+async def _parse_ndjson(chunks):
+    async for number, text in _decoded(chunks):
+        if text is None:
+            yield number, "Invalid UTF-8"
+        elif text.strip():
+            try:
+                data = json.loads(text)
+            except ValueError:
+                yield number, "Invalid JSON"
+                continue
+            if isinstance(data, dict):
+                yield number, data
+            else:
+                yield number, "Expected a JSON object"
+
+
+async def _parse_csv(chunks):
+    header = None
+    record = ""
+    start = 0
+    async for number, text in _decoded(chunks):
+        if text is None:
+            yield number, "Invalid UTF-8"
+            continue
+        # A quoted field may span lines; a record is complete once its
+        # quotes are balanced (escaped quotes are doubled).
+        if not record:
+            start = number
+            record = text
+        else:
+            record = f"{record}\n{text}"
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not values:
+            continue
+        if header is None:
+            header = values
+        elif len(values) != len(header):
+            yield start, f"Expected {len(header)} fields, got {len(values)}"
+        else:
+            yield (
+                start,
+                {column: value or None for column, value in zip(header, values)},
+            )
+    if record:
+        yield start, "Unterminated quoted field"
+
+
+def _describe(error: pydantic.ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
+
+async def run(
+    db: AsyncSession,
+    chunks: typing.AsyncIterator[bytes],
+    format: str,
+    schema: type[pydantic.BaseModel],
+    load: Loader,
+) -> dict:
+    """
+    Import a stream of rows.
+
+    Args:
+        db (AsyncSession): Active database session.
+        chunks (AsyncIterator[bytes]): Raw input, in arbitrary chunks.
+        format (str): Input format, `ndjson` or `csv` (with a header line).
+            Empty CSV fields are read as null.
+        schema (type[BaseModel]): Schema each row is validated against.
+        load (Loader): Coroutine loading and committing a batch of
+            `(line, row)` pairs, returning the number of created rows and
+            the `(line, detail)` pairs of rejected ones.
+
+    Returns:
+        dict: Number of created and rejected rows, and the rejected rows.
+
+    Raises:
+        HTTPException:
+            - 413 if a line is longer than `MAX_LINE_BYTES`.
+    """
+    report = ImportReport()
+    parse = _parse_csv if format == "csv" else _parse_ndjson
+    batch: Batch = []
+
+    async def flush():
+        created, rejected = await load(db, batch)
+        report.created += created
+        for line, detail in rejected:
+            report.reject(line, detail)
+        batch.clear()
+
+    async for line, data in parse(chunks):
+        if isinstance(data, str):
+            report.reject(line, data)
+            continue
+        try:
+            batch.append((line, schema.model_validate(data)))
+        except pydantic.ValidationError as error:
+            report.reject(line, _describe(error))
+            continue
+        if len(batch) >= BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return report.as_dict()
+
+
+async def copy_records(
+    db: AsyncSession, table: str, columns: list[str], records: list[tuple]
+):
+    """
+    Load records into a table with Postgres `COPY`.
+
+    The copy runs on the session's connection, inside its transaction.
+
+    Args:
+        db (AsyncSession): Active database session on an asyncpg engine.
+        table (str): Name of the target table.
+        columns (list[str]): Columns the record values map to.
+        records (list[tuple]): Rows to copy.
+    """
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        table, records=records, columns=columns
+    )
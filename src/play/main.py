@@ -1,31 +1,194 @@
 """
 Application entry point for the Play API.
 
-This module initializes the FastAPI application, registers routers,
-and exposes a root health endpoint.
+This module provides `create_app`, which builds a FastAPI application
+from `Settings` and registers its routers, middleware and root health
+endpoint. `play.main:app` (or `play:app`) is the application configured
+from the environment, created when first looked up; servers can also
+call the factory themselves (`uvicorn --factory play.main:create_app`).
 """
 
+import asyncio
 import typing
 from importlib import metadata
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from contextlib import asynccontextmanager
-from play.routers import companies, teams
+from fastapi.responses import JSONResponse
+from play import autocomplete, cache, compression, conditional, database, metrics
+from play import queries, replicas, slowqueries, warmup
+from play.routers import admin, companies, search, teams
+from play.routers import autocomplete as autocomplete_router
+from play.routers import metrics as metrics_router
+from play.routers import stats as stats_router
+from play.services import stats
+from play.settings import Settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    yield
+    """
+    Connect to the database, prepare in-process state and start
+    background refreshes.
+
+    The engines are created here rather than at import, so that workers
+    only pay for them once they start serving. The autocomplete index is
+    built from the database and the read replicas are health checked,
+    then the worker is warmed up (see `play.warmup`).
+
+    Background tasks only start once the warm-up is done, so that its
+    requests are not published as traffic: the autocomplete index is
+    rebuilt periodically to pick up writes made by other workers (if the
+    first build failed, it is retried at the next refresh), the statistics
+    rollups are kept fresh, the read replicas are health checked, and in
+    multiprocess mode the worker's metrics are published for the other
+    workers.
+
+    The worker is only reported ready by `GET /ready` once the warm-up is
+    done. It is reported not ready again as soon as it shuts down, and the
+    engines are disposed of.
+    """
+    settings: Settings = app.state.settings
+    db: database.Database = app.state.database
+    # Engines are created on first access: create them before serving.
+    sessions = db.async_session_factory
+    router = db.replica_router
+    await autocomplete.build(sessions)
+    await router.check()
+    app.state.warmup = await warmup.run(app)
+    tasks = []
+    if router.replicas:
+        tasks.append(asyncio.create_task(router.monitor()))
+    if settings.autocomplete_refresh_seconds > 0:
+        tasks.append(
+            asyncio.create_task(
+                autocomplete.refresh(sessions, settings.autocomplete_refresh_seconds)
+            )
+        )
+    if settings.stats_refresh_seconds > 0:
+        tasks.append(
+            asyncio.create_task(
+                stats.refresh_periodically(sessions, settings.stats_refresh_seconds)
+            )
+        )
+    if settings.metrics_multiprocess_dir is not None:
+        tasks.append(
+            asyncio.create_task(
+                metrics.publish(
+                    db.pools(),
+                    settings.metrics_multiprocess_dir,
+                    settings.metrics_publish_seconds,
+                )
+            )
+        )
+    app.state.ready = True
+    try:
+        yield
+    finally:
+        app.state.ready = False
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await db.dispose()
+
+
+def create_app(settings: Settings | None = None) -> FastAPI:
+    """
+    Create an application instance.
+
+    Creating the application does not connect to the database: the
+    engines of `app.state.database` are created by the lifespan, or on
+    first use when the lifespan does not run. The process-wide response
+    cache, compression, slow-query log and autocomplete index are
+    configured from `settings`.
+
+    Args:
+        settings (Settings | None): Configuration of the instance, read
+            from the environment by default.
+
+    Returns:
+        FastAPI: The application, with its routes and middleware.
+
+    Raises:
+        KeyError: If `settings` is not given and a required environment
+            variable is missing.
+    """
+    if settings is None:
+        settings = Settings.from_env()
+    app = FastAPI(
+        title="Play",
+        description="An API to manage videogame companies with their teams.",
+        version="0.1.0",
+        lifespan=lifespan,
+    )
+    app.state.settings = settings
+    app.state.database = database.Database(settings)
+    app.state.ready = False
+    app.state.warmup = None
+    configure(settings)
+
+    if settings.async_replica_urls:
+        app.add_middleware(
+            replicas.ReadYourWritesMiddleware,
+            sticky_seconds=settings.replica_sticky_seconds,
+        )
+
+    if compression.ENCODINGS:
+        app.add_middleware(
+            compression.CompressionMiddleware,
+            minimum_size=settings.compression_minimum_size,
+        )
+
+    app.add_middleware(queries.QueryTimingMiddleware)
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    app.include_router(companies.router)
+    app.include_router(teams.router)
+    app.include_router(search.router)
+    app.include_router(autocomplete_router.router)
+    app.include_router(stats_router.router)
+    app.include_router(admin.router)
+    app.include_router(metrics_router.router)
+    app.add_api_route("/", root, tags=["root"], methods=["GET"])
+    app.add_api_route(
+        "/ready",
+        ready,
+        tags=["root"],
+        methods=["GET"],
+        response_model=ReadinessResponse,
+        responses={503: {"model": ReadinessResponse}},
+    )
+    return app
 
 
-app = FastAPI(
-    title="Play",
-    description="An API to manage videogame companies with their teams.",
-    version="0.1.0",
-    lifespan=lifespan,
-)
+def configure(settings: Settings):
+    """
+    Apply settings to the state shared by the applications of a process.
+
+    Args:
+        settings (Settings): Configuration to apply.
+    """
+    cache.responses.configure(settings.cache_max_entries, settings.cache_ttl_seconds)
+    conditional.configure(settings.http_cache_max_age)
+    compression.configure(
+        settings.compression_encodings, settings.compression_minimum_size
+    )
+    slowqueries.slow_queries.configure(
+        settings.slow_query_seconds,
+        settings.slow_query_explain_rate,
+        settings.slow_query_log_size,
+    )
+    autocomplete.names.merge_threshold = settings.autocomplete_merge_threshold
 
-app.include_router(companies.router)
-app.include_router(teams.router)
+
+def __getattr__(name: str):
+    # `play.main:app`, the application configured from the environment,
+    # is only created when first looked up, not when the module is
+    # imported.
+    global app
+    if name == "app":
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class HealthResponse(typing.TypedDict):
@@ -43,7 +206,6 @@ class HealthResponse(typing.TypedDict):
     docs: str
 
 
-@app.get("/", tags=["root"])
 def root() -> HealthResponse:
     """
     Root health endpoint.
@@ -55,3 +217,35 @@ def root() -> HealthResponse:
         HealthResponse: API metadata information.
     """
     return {"name": "Play API", "version": metadata.version("play"), "docs": "/docs"}
+
+
+class ReadinessResponse(typing.TypedDict):
+    """
+    Response schema for the readiness endpoint.
+
+    Attributes:
+        ready (bool): Whether the worker is warmed up and serving.
+        warmup (dict | None): Report of the warm-up, see `warmup.run`.
+    """
+
+    ready: bool
+    warmup: dict | None
+
+
+def ready(request: Request) -> JSONResponse:
+    """
+    Readiness endpoint, for load balancers and orchestrators.
+
+    Args:
+        request (Request): Incoming request, used to find the worker state.
+
+    Returns:
+        JSONResponse: Readiness and warm-up report of the worker
+            (`ReadinessResponse`), with a 503 status until the warm-up is
+            done and once the worker is shutting down.
+    """
+    state = request.app.state
+    return JSONResponse(
+        {"ready": state.ready, "warmup": state.warmup},
+        status_code=200 if state.ready else 503,
+    )
@@ -0,0 +1,655 @@
+"""
+Prometheus metrics.
+
+This module counts requests per route, method and status, records their
+latency in fixed-bucket histograms, and renders them in the Prometheus
+text format together with gauges of the running worker: requests in
+flight, threadpool usage, and the state of the database pools.
+
+`MetricsMiddleware` runs on the event loop of its worker, and only ever
+updates the counters from there, so recording needs no lock: it costs
+two clock reads, a bisection and a few dictionary updates per request.
+
+Each uvicorn worker process keeps its own counters. When
+`METRICS_MULTIPROCESS_DIR` is set, every worker periodically writes a
+snapshot of its metrics to that directory, and `/metrics` merges the
+snapshots of every worker, so that any worker answers for all of them:
+counters and histograms are summed (including those of workers that
+exited), while gauges are reported per live worker with a `pid` label.
+
+Like `mark_process_dead` of prometheus_client, the snapshots of workers
+that exited are folded into a single archive of their counters and
+removed, so that a new worker reusing the pid of an exited one does not
+overwrite its totals. The workers of a server all have the server's
+process as parent: the first worker started by a new server empties the
+directory of what a previous server left, so that its counters start
+from zero.
+"""
+
+import asyncio
+import bisect
+import collections
+import contextlib
+import fcntl
+import json
+import logging
+import math
+import os
+import time
+import typing
+
+import anyio.to_thread
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from play import pooling
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# Files of the multiprocess directory besides the `<pid>.json` snapshots.
+ARCHIVE_FILE = "exited.json"
+SERVER_FILE = "server"
+LOCK_FILE = ".lock"
+
+Labels = tuple[tuple[str, str], ...]
+Sample = tuple[str, Labels, float]
+
+
+class Family(typing.NamedTuple):
+    """
+    Metric family in the Prometheus exposition format.
+
+    Attributes:
+        name (str): Metric name.
+        type (str): `counter`, `gauge` or `histogram`.
+        help (str): Description of the metric.
+        samples (list[Sample]): `(name, labels, value)` of every sample,
+            including the `_bucket`, `_sum` and `_count` samples of
+            histograms.
+    """
+
+    name: str
+    type: str
+    help: str
+    samples: list[Sample]
+
+
+class RequestStats:
+    """
+    Request counters of one worker process.
+
+    Attributes:
+        in_flight (int): Requests being handled.
+        requests (Counter): Completed requests by method, route and status.
+        latency (dict): Per method and route, the count of requests in each
+            latency bucket followed by the total latency in seconds.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.in_flight = 0
+        self.requests: collections.Counter[tuple[str, str, str]] = collections.Counter()
+        self.latency: dict[tuple[str, str], list] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        """
+        Record a completed request.
+
+        Args:
+            method (str): HTTP method.
+            route (str): Path template of the matched route.
+            status (int): Response status code.
+            seconds (float): Time taken to handle the request.
+        """
+        self.requests[method, route, str(status)] += 1
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[method, route] = [0] * (len(self.buckets) + 2)
+        histogram[bisect.bisect_left(self.buckets, seconds)] += 1
+        histogram[-1] += seconds
+
+    def families(self) -> list[Family]:
+        """
+        Build the metric families of the counters.
+
+        Returns:
+            list[Family]: Request counts, latency histograms and requests
+                in flight.
+        """
+        requests = [
+            (
+                "http_requests_total",
+                (("method", method), ("route", route), ("status", status)),
+                count,
+            )
+            for (method, route, status), count in list(self.requests.items())
+        ]
+        latency = []
+        bounds = (*(str(bound) for bound in self.buckets), "+Inf")
+        for (method, route), histogram in list(self.latency.items()):
+            labels = (("method", method), ("route", route))
+            total = 0
+            for bound, count in zip(bounds, histogram):
+                total += count
+                latency.append(
+                    (
+                        "http_request_duration_seconds_bucket",
+                        (*labels, ("le", bound)),
+                        total,
+                    )
+                )
+            latency.append(("http_request_duration_seconds_sum", labels, histogram[-1]))
+            latency.append(("http_request_duration_seconds_count", labels, total))
+        return [
+            Family(
+                "http_requests_total",
+                "counter",
+                "Completed HTTP requests.",
+                requests,
+            ),
+            Family(
+                "http_request_duration_seconds",
+                "histogram",
+                "Time taken to handle HTTP requests.",
+                latency,
+            ),
+            Family(
+                "http_requests_in_flight",
+                "gauge",
+                "HTTP requests being handled.",
+                [("http_requests_in_flight", (), self.in_flight)],
+            ),
+        ]
+
+    def clear(self):
+        """Reset every counter."""
+        self.in_flight = 0
+        self.requests.clear()
+        self.latency.clear()
+
+
+requests = RequestStats()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting and timing requests.
+
+    Requests are labelled with the path template of their route, such as
+    `/companies/{company_id}`, so that the number of series stays bounded;
+    requests matching no route share one label.
+
+    Args:
+        app (ASGIApp): Application to wrap.
+        stats (RequestStats): Counters to update.
+    """
+
+    def __init__(self, app: ASGIApp, stats: RequestStats = requests):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = self.stats
+        stats.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats.in_flight -= 1
+            route = scope.get("route")
+            stats.observe(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status,
+                elapsed,
+            )
+
+
+def threadpool_families() -> list[Family]:
+    """
+    Build the gauges of the worker threadpool.
+
+    Sync endpoints and dependencies run in this threadpool; requests
+    queue for it once every thread is borrowed.
+
+    Returns:
+        list[Family]: Threads in use and thread limit.
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return [
+        Family(
+            "threadpool_threads_in_use",
+            "gauge",
+            "Threads of the worker threadpool in use.",
+            [("threadpool_threads_in_use", (), limiter.borrowed_tokens)],
+        ),
+        Family(
+            "threadpool_threads_limit",
+            "gauge",
+            "Size of the worker threadpool.",
+            [("threadpool_threads_limit", (), limiter.total_tokens)],
+        ),
+    ]
+
+
+def pool_families(pools: dict[str, typing.Any]) -> list[Family]:
+    """
+    Build the gauges and counters of database connection pools.
+
+    Args:
+        pools (dict[str, QueuePool]): Pools by name, such as `primary`.
+
+    Returns:
+        list[Family]: Pool size, connections in use, overflow, checkout
+            and timeout counters and checkout wait histograms.
+    """
+    gauges = {
+        "size": "Connections kept open by the pool.",
+        "checked_out": "Connections in use.",
+        "overflow": "Connections opened beyond the pool size.",
+    }
+    counters = {
+        "checkouts": "Successful connection checkouts.",
+        "timeouts": "Connection checkouts that timed out.",
+    }
+    families = {
+        name: Family(f"db_pool_{name}", "gauge", help, [])
+        for name, help in gauges.items()
+    }
+    families |= {
+        name: Family(f"db_pool_{name}_total", "counter", help, [])
+        for name, help in counters.items()
+    }
+    wait = Family(
+        "db_pool_wait_seconds",
+        "histogram",
+        "Time spent waiting for a connection.",
+        [],
+    )
+    for pool_name, pool in pools.items():
+        snapshot = pooling.snapshot(pool)
+        labels = (("pool", pool_name),)
+        for name, family in families.items():
+            family.samples.append((family.name, labels, snapshot[name]))
+        for bound, count in snapshot["wait_seconds_histogram"].items():
+            wait.samples.append(
+                ("db_pool_wait_seconds_bucket", (*labels, ("le", bound)), count)
+            )
+        wait.samples.append(
+            ("db_pool_wait_seconds_sum", labels, snapshot["wait_seconds_sum"])
+        )
+        wait.samples.append(
+            (
+                "db_pool_wait_seconds_count",
+                labels,
+                snapshot["checkouts"] + snapshot["timeouts"],
+            )
+        )
+    return [*families.values(), wait]
+
+
+def collect(pools: dict[str, typing.Any]) -> list[Family]:
+    """
+    Collect every metric of the current worker.
+
+    Must be called from the worker's event loop.
+
+    Args:
+        pools (dict[str, QueuePool]): Database pools by name.
+
+    Returns:
+        list[Family]: Request, threadpool and pool metrics.
+    """
+    return [*requests.families(), *threadpool_families(), *pool_families(pools)]
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextlib.contextmanager
+def _locked(directory: str, exclusive: bool):
+    with open(os.path.join(directory, LOCK_FILE), "a") as file:
+        fcntl.flock(file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def _snapshot_pid(name: str) -> int | None:
+    pid, _, extension = name.partition(".")
+    if extension != "json" or not pid.isdigit():
+        return None
+    return int(pid)
+
+
+def _dump(path: str, families: list[Family]):
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as file:
+        json.dump([family._asdict() for family in families], file)
+    os.replace(temporary, path)
+
+
+def _load(path: str) -> list[Family]:
+    with open(path) as file:
+        families = json.load(file)
+    return [
+        Family(
+            family["name"],
+            family["type"],
+            family["help"],
+            [
+                (name, tuple(tuple(label) for label in labels), value)
+                for name, labels, value in family["samples"]
+            ],
+        )
+        for family in families
+    ]
+
+
+def write_snapshot(directory: str, families: list[Family]):
+    """
+    Write the metrics of the current worker for the other workers.
+
+    The file is replaced atomically, so readers never see a partial one.
+
+    Args:
+        directory (str): Directory shared by the workers.
+        families (list[Family]): Metrics of the current worker.
+    """
+    _dump(os.path.join(directory, f"{os.getpid()}.json"), families)
+
+
+def _combine(workers: list[tuple[str | None, list[Family]]]) -> list[Family]:
+    merged: dict[str, Family] = {}
+    totals: dict[str, dict[tuple[str, Labels], float]] = {}
+    for pid, families in workers:
+        for family in families:
+            if family.name not in merged:
+                merged[family.name] = Family(family.name, family.type, family.help, [])
+                totals[family.name] = {}
+            if family.type == "gauge":
+                if pid is not None:
+                    merged[family.name].samples.extend(
+                        (name, (*labels, ("pid", pid)), value)
+                        for name, labels, value in family.samples
+                    )
+                continue
+            sums = totals[family.name]
+            for name, labels, value in family.samples:
+                sums[name, labels] = sums.get((name, labels), 0) + value
+    for name, sums in totals.items():
+        merged[name].samples.extend(
+            (sample, labels, value) for (sample, labels), value in sums.items()
+        )
+    return list(merged.values())
+
+
+def merge(
+    snapshots: dict[int, list[Family]], exited: typing.Sequence[Family] = ()
+) -> list[Family]:
+    """
+    Merge the metrics of several workers.
+
+    Counter and histogram samples with the same labels are summed; gauge
+    samples are kept apart with a `pid` label, and only for live workers.
+
+    Args:
+        snapshots (dict[int, list[Family]]): Metrics of each worker, by
+            process identifier.
+        exited (Sequence[Family]): Counters archived from exited workers (see
+            `archive_exited`).
+
+    Returns:
+        list[Family]: Metrics of all the workers.
+    """
+    workers = [
+        (str(pid) if pid == os.getpid() or _alive(pid) else None, families)
+        for pid, families in snapshots.items()
+    ]
+    return _combine([*workers, (None, list(exited))])
+
+
+def read_snapshots(directory: str) -> dict[int, list[Family]]:
+    """
+    Read the metrics written by every worker.
+
+    Args:
+        directory (str): Directory shared by the workers.
+
+    Returns:
+        dict[int, list[Family]]: Metrics of each worker, by process
+            identifier.
+    """
+    snapshots = {}
+    for entry in os.scandir(directory):
+        pid = _snapshot_pid(entry.name)
+        if pid is None:
+            continue
+        try:
+            snapshots[pid] = _load(entry.path)
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def read_exited(directory: str) -> list[Family]:
+    """
+    Read the counters archived from the workers that exited.
+
+    Args:
+        directory (str): Directory shared by the workers.
+
+    Returns:
+        list[Family]: Counters and histograms of the exited workers.
+    """
+    try:
+        return _load(os.path.join(directory, ARCHIVE_FILE))
+    except FileNotFoundError:
+        return []
+
+
+def _archive_exited(directory: str, replaced: bool):
+    pid = os.getpid()
+    exited = {
+        worker: families
+        for worker, families in read_snapshots(directory).items()
+        if (worker == pid and replaced) or (worker != pid and not _alive(worker))
+    }
+    if not exited:
+        return
+    _dump(
+        os.path.join(directory, ARCHIVE_FILE),
+        _combine(
+            [
+                (None, families)
+                for families in [read_exited(directory), *exited.values()]
+            ]
+        ),
+    )
+    for worker in exited:
+        os.remove(os.path.join(directory, f"{worker}.json"))
+
+
+def archive_exited(directory: str, replaced: bool = False):
+    """
+    Fold the snapshots of exited workers into the archive and remove them.
+
+    Args:
+        directory (str): Directory shared by the workers.
+        replaced (bool): Whether the current worker has just started, in
+            which case a snapshot with its pid was left by an exited
+            process that had the same pid.
+    """
+    with _locked(directory, exclusive=True):
+        _archive_exited(directory, replaced)
+
+
+def prepare(directory: str):
+    """
+    Prepare the snapshot directory for a worker that starts.
+
+    The first worker of a server (the parent process of the workers)
+    removes the snapshots and archive left by a previous server; the
+    other workers archive the snapshots of the workers that exited,
+    including one left under their own, reused, pid.
+
+    Args:
+        directory (str): Directory shared by the workers.
+    """
+    server = str(os.getppid())
+    marker = os.path.join(directory, SERVER_FILE)
+    with _locked(directory, exclusive=True):
+        try:
+            with open(marker) as file:
+                previous = file.read()
+        except FileNotFoundError:
+            previous = None
+        if previous == server:
+            _archive_exited(directory, replaced=True)
+            return
+        for entry in os.scandir(directory):
+            if entry.name == ARCHIVE_FILE or _snapshot_pid(entry.name) is not None:
+                os.remove(entry.path)
+        with open(marker, "w") as file:
+            file.write(server)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
+    return str(value)
+
+
+def render(families: list[Family]) -> str:
+    """
+    Format metrics in the Prometheus text exposition format.
+
+    Args:
+        families (list[Family]): Metrics to format.
+
+    Returns:
+        str: The exposition, one sample per line.
+    """
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for name, labels, value in family.samples:
+            if labels:
+                pairs = ",".join(
+                    f'{key}="{_escape(str(label))}"' for key, label in labels
+                )
+                name = f"{name}{{{pairs}}}"
+            lines.append(f"{name} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _read_workers(directory: str) -> tuple[dict[int, list[Family]], list[Family]]:
+    with _locked(directory, exclusive=False):
+        return read_snapshots(directory), read_exited(directory)
+
+
+def _publish(directory: str, families: list[Family]):
+    archive_exited(directory)
+    write_snapshot(directory, families)
+
+
+async def exposition(pools: dict[str, typing.Any], directory: str | None = None) -> str:
+    """
+    Build the `/metrics` response body.
+
+    The metrics of the worker are collected on its event loop, while the
+    snapshots of the other workers are read in the threadpool, as waiting
+    for the directory lock and reading files would block the loop.
+
+    Args:
+        pools (dict[str, QueuePool]): Database pools of the worker.
+        directory (str | None): Directory of the worker snapshots, to
+            report every worker; None to report the current one only.
+
+    Returns:
+        str: Metrics in the Prometheus text format.
+    """
+    families = collect(pools)
+    if directory is None:
+        return render(families)
+    snapshots, exited = await anyio.to_thread.run_sync(_read_workers, directory)
+    snapshots[os.getpid()] = families
+    return render(merge(snapshots, exited))
+
+
+async def publish(pools: dict[str, typing.Any], directory: str, interval: float):
+    """
+    Write snapshots of the worker's metrics periodically, until cancelled.
+
+    The directory is first prepared for the worker (see `prepare`), and the
+    snapshots of workers that exited are archived before every snapshot.
+    A last snapshot is written on cancellation, so that the counters of a
+    worker shutting down are not lost. Metrics are collected on the event
+    loop, and the files written in the threadpool.
+
+    Args:
+        pools (dict[str, QueuePool]): Database pools of the worker.
+        directory (str): Directory shared by the workers.
+        interval (float): Seconds between snapshots.
+    """
+    try:
+        await anyio.to_thread.run_sync(prepare, directory)
+    except OSError:
+        logger.exception("Could not prepare the metrics directory")
+    try:
+        while True:
+            try:
+                await anyio.to_thread.run_sync(_publish, directory, collect(pools))
+            except OSError:
+                logger.exception("Could not write the metrics snapshot")
+            await asyncio.sleep(interval)
+    finally:
+        try:
+            await anyio.to_thread.run_sync(write_snapshot, directory, collect(pools))
+        except OSError:
+            logger.exception("Could not write the metrics snapshot")
@@ -3,9 +3,20 @@ SQLAlchemy ORM models for the play application.
 
 This module defines the database models representing companies and their teams.
 Each model maps to a database table and defines relationships between entities.
+
+Companies carry denormalized aggregates of their teams (`team_count` and
+`total_headcount`), maintained by the team services in the same
+transaction as each team write. Statistics grouped by country, specialty
+or company are precomputed into rollup tables, refreshed periodically.
+
+Full-text search indexes live outside the models: on Postgres, generated
+`search_vector` columns are added by an Alembic migration; on SQLite, an
+FTS5 table per model is created along with the model table (or by the
+same migration) and kept in sync by triggers.
 """
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey
+from sqlalchemy import DDL, JSON, BigInteger, Column, DateTime, Integer, String, Text
+from sqlalchemy import ForeignKey, Index, event
 from sqlalchemy import orm
 from play import database
 
@@ -24,11 +35,20 @@ class Company(database.Base):
         founded_year (int | None): Year the company was founded.
         website (str | None): Official website URL of the company.
         description (str | None): Optional textual description of the company.
+        version (int): Counter incremented whenever the company or one of
+            its teams changes.
+        team_count (int): Number of teams of the company.
+        total_headcount (int): Sum of the sizes of the company's teams.
         teams (list[Team]): List of teams associated with the company.
             Deleting a company will also delete its associated teams.
     """
 
     __tablename__ = "companies"
+    __table_args__ = (
+        Index("idx_companies_name_id", "name", "id"),
+        Index("idx_companies_country_id", "country", "id"),
+        Index("idx_companies_founded_year_id", "founded_year", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), unique=True, nullable=False, index=True)
@@ -36,6 +56,9 @@ class Company(database.Base):
     founded_year = Column(Integer, nullable=True)
     website = Column(String(255), nullable=True)
     description = Column(Text, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    team_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_headcount = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     teams = orm.relationship(
         "Team", back_populates="company", cascade="all, delete-orphan"
@@ -56,16 +79,135 @@ class Team(database.Base):
         size (int | None): Number of members in the team.
         description (str | None): Optional textual description of the team.
         company_id (int): Foreign key referencing the owning company.
+        version (int): Counter incremented whenever the team changes.
         company (Company): The company to which this team belongs.
     """
 
     __tablename__ = "teams"
+    __table_args__ = (
+        Index("idx_teams_name_id", "name", "id"),
+        Index("idx_teams_company_id_id", "company_id", "id"),
+        Index("idx_teams_specialty_id", "specialty", "id"),
+        Index("idx_teams_size_id", "size", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
     specialty = Column(String(100), nullable=False)
     size = Column(Integer, nullable=True)
     description = Column(Text, nullable=True)
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     company = orm.relationship("Company", back_populates="teams")
+
+
+class StatsRollup(database.Base):
+    """
+    Precomputed statistics of one group of companies or teams.
+
+    Attributes:
+        dimension (str): Grouping the row belongs to, such as
+            `companies.country` or `teams.specialty`.
+        key (str): Value of the grouping column, as text.
+        size (int): Number of rows in the group.
+        metrics (dict): Statistics of the group, including its typed key.
+    """
+
+    __tablename__ = "stats_rollups"
+    __table_args__ = (Index("idx_stats_rollups_dimension_size", "dimension", "size"),)
+
+    dimension = Column(String(50), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    size = Column(Integer, nullable=False)
+    metrics = Column(JSON, nullable=False)
+
+
+class StatsRefresh(database.Base):
+    """
+    Time of the last refresh of a statistics rollup.
+
+    Attributes:
+        dimension (str): Grouping that was refreshed.
+        refreshed_at (datetime): When the rollup was last computed.
+    """
+
+    __tablename__ = "stats_refreshes"
+
+    dimension = Column(String(50), primary_key=True)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+def sqlite_full_text_ddl(table: str) -> list[str]:
+    """
+    Build the statements creating the SQLite FTS5 index of a table.
+
+    The FTS5 table only stores the index of the table's name and
+    description, reading contents from `table` (external content).
+    Triggers mirror every insert, update and delete.
+
+    Args:
+        table (str): Name of a table with `id`, `name` and `description`
+            columns.
+
+    Returns:
+        list[str]: The statements creating the FTS5 table and its triggers.
+    """
+    fts = f"{table}_fts"
+    row = "{0}.id, {0}.name, {0}.description"
+    insert = (
+        f"INSERT INTO {fts}(rowid, name, description) VALUES ({row.format('new')});"
+    )
+    delete = (
+        f"INSERT INTO {fts}({fts}, rowid, name, description) "
+        f"VALUES ('delete', {row.format('old')});"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5(name, description, "
+        f"content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {table} BEGIN {delete} END",
+        f"CREATE TRIGGER {fts}_update AFTER UPDATE OF name, description "
+        f"ON {table} BEGIN {delete} {insert} END",
+    ]
+
+
+def sqlite_full_text_drop_ddl(table: str) -> list[str]:
+    """
+    Build the statements dropping the SQLite FTS5 index of a table.
+
+    Args:
+        table (str): Name of the indexed table.
+
+    Returns:
+        list[str]: The statements dropping the triggers and FTS5 table
+            created by `sqlite_full_text_ddl`.
+    """
+    fts = f"{table}_fts"
+    return [
+        *(
+            f"DROP TRIGGER IF EXISTS {fts}_{operation}"
+            for operation in ("insert", "delete", "update")
+        ),
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
+
+
+def _add_sqlite_full_text_index(table):
+    """
+    Maintain an FTS5 index of a table's name and description on SQLite.
+
+    Args:
+        table (Table): Table with `id`, `name` and `description` columns.
+    """
+    for statement in sqlite_full_text_ddl(table.name):
+        event.listen(table, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+    event.listen(
+        table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {table.name}_fts").execute_if(dialect="sqlite"),
+    )
+
+
+_add_sqlite_full_text_index(Company.__table__)
+_add_sqlite_full_text_index(Team.__table__)
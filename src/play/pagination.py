@@ -0,0 +1,151 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Offset pagination makes the database scan and discard every skipped row,
+so deep pages get slower as tables grow. Keyset pagination instead filters
+on the sort key of the last row already returned, which lets the database
+seek directly into an index: page N costs the same as page 1.
+
+Cursors are opaque to clients. They are URL-safe base64 encoded JSON
+documents holding the sort key name and the values of the last row.
+"""
+
+import base64
+import json
+
+from fastapi import HTTPException, status
+from sqlalchemy import or_, tuple_
+
+
+def encode_cursor(sort: str, values: list) -> str:
+    """
+    Encode the position of a row into an opaque cursor.
+
+    Args:
+        sort (str): Name of the sort key the cursor belongs to.
+        values (list): Sort key values of the row, ending with its id.
+
+    Returns:
+        str: URL-safe cursor string.
+    """
+    raw = json.dumps({"s": sort, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, kind: type | None = None) -> list:
+    """
+    Decode a cursor previously produced by `encode_cursor`.
+
+    Args:
+        cursor (str): Cursor string received from a client.
+        sort (str): Sort key of the current request.
+        kind (type | None): Python type of the sort key values, which may
+            also be null; not checked if None.
+
+    Returns:
+        list: Sort key values of the row the cursor points to.
+
+    Raises:
+        HTTPException:
+            - 400 if the cursor is malformed or was issued for another sort key.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_sort, values = data["s"], data["v"]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+    expected = 1 if sort == "id" else 2
+    if (
+        cursor_sort != sort
+        or not isinstance(values, list)
+        or len(values) != expected
+        or not isinstance(values[-1], int)
+        or (
+            kind is not None
+            and expected == 2
+            and values[0] is not None
+            and not isinstance(values[0], kind)
+        )
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    return values
+
+
+def paginate(query, model, sort: str, skip: int, after: str | None, limit: int):
+    """
+    Apply ordering and either offset or keyset pagination to a query.
+
+    Rows are always ordered by the sort key followed by the primary key,
+    so that the order is total and stable across pages. Null values of a
+    nullable sort key come last, as in a default ascending Postgres index.
+
+    Args:
+        query (Query): Query selecting rows of `model`.
+        model: ORM model class being listed.
+        sort (str): Name of the column to order by.
+        skip (int): Number of records to skip (offset mode).
+        after (str | None): Cursor of the last row of the previous page.
+        limit (int): Maximum number of records to return.
+
+    Returns:
+        Query: The paginated query.
+
+    Raises:
+        HTTPException:
+            - 400 if both `skip` and `after` are provided.
+            - 400 if the cursor is invalid.
+    """
+    if sort == "id":
+        query = query.order_by(model.id)
+    else:
+        column = getattr(model, sort)
+        nullable = model.__table__.c[sort].nullable
+        query = query.order_by(column.nulls_last() if nullable else column, model.id)
+
+    if after is None:
+        return query.offset(skip).limit(limit)
+
+    if skip:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="skip cannot be combined with after",
+        )
+
+    kind = None if sort == "id" else model.__table__.c[sort].type.python_type
+    values = decode_cursor(after, sort, kind)
+    if sort == "id":
+        query = query.filter(model.id > values[0])
+    elif values[0] is None:
+        query = query.filter(column.is_(None), model.id > values[1])
+    else:
+        condition = tuple_(column, model.id) > tuple_(*values)
+        if nullable:
+            condition = or_(condition, column.is_(None))
+        query = query.filter(condition)
+    return query.limit(limit)
+
+
+def next_cursor(items: list, sort: str, limit: int) -> str | None:
+    """
+    Build the cursor pointing after the last row of a page.
+
+    Args:
+        items (list): Rows of the current page.
+        sort (str): Sort key used for the page.
+        limit (int): Page size that was requested.
+
+    Returns:
+        str | None: Cursor of the next page, or None if this page is the last.
+    """
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    if sort == "id":
+        return encode_cursor(sort, [last.id])
+    return encode_cursor(sort, [getattr(last, sort), last.id])
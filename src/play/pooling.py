@@ -0,0 +1,134 @@
+"""
+Connection pool instrumentation.
+
+This module provides queue pool classes that record how long callers wait
+to check out a connection and how many checkouts time out. Together with
+the pool's own counters (checked out, overflow), this shows whether
+requests are queueing for connections, which is the signal needed to size
+the pool against the worker threadpool and Postgres `max_connections`.
+"""
+
+import bisect
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolStats:
+    """
+    Checkout counters of a connection pool.
+
+    Wait times are recorded in a fixed-bucket histogram, so that recording
+    is constant time and memory does not grow with traffic.
+
+    Attributes:
+        checkouts (int): Number of successful checkouts.
+        timeouts (int): Number of checkouts that timed out.
+        wait_seconds_sum (float): Total time spent waiting for checkouts.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = WAIT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, timed_out: bool = False):
+        """
+        Record a checkout attempt.
+
+        Args:
+            seconds (float): Time spent waiting for a connection.
+            timed_out (bool): Whether the attempt ended with a timeout.
+        """
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.wait_seconds_sum += seconds
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def histogram(self) -> dict[str, int]:
+        """
+        Return the cumulative wait-time histogram.
+
+        Returns:
+            dict[str, int]: Number of checkouts that waited at most each
+                bucket bound (in seconds), keyed like Prometheus `le` labels.
+        """
+        result = {}
+        total = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            result[str(bound)] = total
+        return result
+
+
+class _InstrumentedMixin:
+    """
+    Wrap connection checkout with wait-time recording.
+
+    `_do_get` is the hook queue pools implement to hand out a connection,
+    either from the idle queue, by opening an overflow connection, or by
+    blocking until one is returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.observe(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedMixin, QueuePool):
+    """QueuePool recording checkout wait times, for synchronous engines."""
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording checkout wait times, for async engines."""
+
+
+def snapshot(pool) -> dict:
+    """
+    Collect the live state and counters of a pool.
+
+    Args:
+        pool (QueuePool): Pool to inspect.
+
+    Returns:
+        dict: Pool size, checked-in/out connections, overflow, checkout and
+            timeout counters and the wait-time histogram.
+    """
+    stats = getattr(pool, "stats", None) or PoolStats()
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "timeout": pool.timeout(),
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "wait_seconds_sum": stats.wait_seconds_sum,
+        "wait_seconds_histogram": stats.histogram(),
+    }
@@ -0,0 +1,139 @@
+"""
+Per-request SQL statement counting and timing.
+
+This module counts the statements each request sends to the database
+and the time spent executing them, from the `before_cursor_execute` and
+`after_cursor_execute` events of every engine (synchronous ones and the
+engines behind the async ones, primary and replicas alike). Repeated
+lazy loads such as `Company.teams` in a loop then show up as a high
+statement count instead of having to be found by reading code.
+
+`QueryTimingMiddleware` starts a `QueryStats` for each request, reports
+it in a `Server-Timing` header (`db;dur=<ms>;desc="<n> queries"`) and
+logs it with the request on the `play.access` logger. Statements of a
+streamed body run after the headers are sent; they are only counted in
+the log line.
+"""
+
+import contextlib
+import contextvars
+import logging
+import time
+import typing
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+access_logger = logging.getLogger("play.access")
+
+
+class QueryStats:
+    """
+    Statements executed on behalf of one request.
+
+    Attributes:
+        count (int): Number of statements; an `executemany` counts once.
+        seconds (float): Time spent executing them.
+    """
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def server_timing(self) -> str:
+        """
+        Format the statistics as a `Server-Timing` metric.
+
+        Returns:
+            str: The `db` metric, with its duration in milliseconds and the
+                statement count as description.
+        """
+        return f'db;dur={self.seconds * 1000:.3f};desc="{self.count} queries"'
+
+
+_current: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar(
+    "query_stats", default=None
+)
+
+
+@contextlib.contextmanager
+def track() -> typing.Iterator[QueryStats]:
+    """
+    Count the statements executed in the current context.
+
+    The context is inherited by the tasks and threadpool calls started
+    from it, and by the greenlets SQLAlchemy's async engines run in.
+
+    Yields:
+        QueryStats: Statistics filled in as statements run.
+    """
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(connection, cursor, statement, parameters, context, executemany):
+    # The start is kept on the execution context rather than the pooled
+    # connection, so that it goes away with a statement that fails.
+    if context is not None and _current.get() is not None:
+        context._query_stats_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_timer(connection, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None:
+        start = getattr(context, "_query_stats_start", None)
+        if start is not None:
+            stats.seconds += time.perf_counter() - start
+        stats.count += 1
+
+
+class QueryTimingMiddleware:
+    """
+    ASGI middleware reporting the statements executed by each request.
+
+    Args:
+        app (ASGIApp): Application to wrap.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        start = time.perf_counter()
+        with track() as stats:
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                access_logger.info(
+                    '"%s %s" %d %d queries %.1fms db %.1fms total',
+                    scope["method"],
+                    scope["path"],
+                    status,
+                    stats.count,
+                    stats.seconds * 1000,
+                    (time.perf_counter() - start) * 1000,
+                )
@@ -0,0 +1,163 @@
+"""
+Read-replica routing.
+
+This module spreads read-only database work over a set of replica engines
+in round-robin order. Replicas are health checked by a background task
+(`ReplicaRouter.monitor`, started by the application lifespan) that probes
+every replica once per interval; routing only reads the result of the last
+probe, so requests never wait on a probe. A replica that failed its last
+probe is skipped, and when no replica is healthy, reads fall back to the
+primary.
+
+Replication is asynchronous, so a client that has just written could read
+stale data from a replica. `ReadYourWritesMiddleware` sets a short-lived
+cookie on successful writes, and requests carrying it are served from the
+primary until it expires.
+"""
+
+import asyncio
+import itertools
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "play_primary"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class Replica:
+    """
+    A replica engine together with its health state.
+
+    Attributes:
+        engine (AsyncEngine): Engine connected to the replica.
+        healthy (bool): Result of the last health check, True until the
+            first one.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.healthy = True
+
+
+class ReplicaRouter:
+    """
+    Round-robin selection of healthy replicas.
+
+    Args:
+        engines (list[AsyncEngine]): Engines connected to the replicas.
+        health_interval (float): Seconds between health checks of a replica.
+        check_timeout (float): Seconds a health check may take.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        health_interval: float = 10.0,
+        check_timeout: float = 2.0,
+    ):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.health_interval = health_interval
+        self.check_timeout = check_timeout
+        self._cycle = itertools.cycle(self.replicas)
+
+    async def _ping(self, engine: AsyncEngine):
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def _check(self, replica: Replica) -> bool:
+        try:
+            await asyncio.wait_for(self._ping(replica.engine), self.check_timeout)
+            replica.healthy = True
+        except Exception:
+            if replica.healthy:
+                logger.warning("Replica %s is unavailable", replica.engine.url)
+            replica.healthy = False
+        return replica.healthy
+
+    async def check(self) -> int:
+        """
+        Probe every replica concurrently and record whether it is healthy.
+
+        Returns:
+            int: Number of healthy replicas.
+        """
+        results = await asyncio.gather(
+            *(self._check(replica) for replica in self.replicas)
+        )
+        return sum(results)
+
+    async def monitor(self):
+        """
+        Probe the replicas every `health_interval` seconds, until cancelled.
+
+        The first probe runs immediately.
+        """
+        while True:
+            await self.check()
+            await asyncio.sleep(self.health_interval)
+
+    def choose(self) -> AsyncEngine | None:
+        """
+        Pick the next healthy replica, from the result of the last probes.
+
+        Returns:
+            AsyncEngine | None: Engine of a healthy replica, or None if no
+                replica is configured or healthy.
+        """
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if replica.healthy:
+                return replica.engine
+        return None
+
+
+def is_sticky(cookies: dict[str, str]) -> bool:
+    """
+    Tell whether a client must read from the primary.
+
+    Args:
+        cookies (dict[str, str]): Cookies sent with the request.
+
+    Returns:
+        bool: True if the client wrote recently.
+    """
+    return STICKY_COOKIE in cookies
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pin clients to the primary for a short time after they write.
+
+    Successful responses to unsafe methods (POST, PATCH, DELETE...) get a
+    cookie expiring after `sticky_seconds`; reads carrying it are routed to
+    the primary by `database.get_read_db`.
+
+    Args:
+        app: ASGI application to wrap.
+        sticky_seconds (float): Lifetime of the cookie, in seconds.
+    """
+
+    def __init__(self, app, sticky_seconds: float):
+        self.app = app
+        self.cookie = (
+            f"{STICKY_COOKIE}=1; Max-Age={max(int(sticky_seconds), 1)}; "
+            "Path=/; HttpOnly; SameSite=Lax"
+        ).encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = list(message.get("headers", []))
+                headers.append((b"set-cookie", self.cookie))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -1,7 +1,13 @@
 from fastapi import APIRouter
-from play.routers import companies, teams
+from play.routers import admin, autocomplete, companies, metrics, search, stats
+from play.routers import teams
 
 router = APIRouter()
 
 router.include_router(companies.router)
 router.include_router(teams.router)
+router.include_router(search.router)
+router.include_router(autocomplete.router)
+router.include_router(stats.router)
+router.include_router(admin.router)
+router.include_router(metrics.router)
@@ -0,0 +1,54 @@
+"""
+API routes for operational introspection.
+
+This module defines endpoints exposing the internal state of the running
+worker, such as the database connection pool, the response cache and
+the slow-query log.
+"""
+
+from fastapi import APIRouter, Query, Request
+from play import cache, database, pooling, schemas, slowqueries
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/pool", response_model=schemas.PoolStatsResponse)
+async def get_pool_stats(request: Request):
+    """
+    Retrieve live statistics of the database connection pool.
+
+    The statistics describe the pool used by the API request path of the
+    current worker process.
+
+    Args:
+        request (Request): Incoming request, used to find the pool.
+
+    Returns:
+        PoolStatsResponse: Pool usage and checkout wait-time statistics.
+    """
+    return pooling.snapshot(database.of(request).async_engine.pool)
+
+
+@router.get("/cache", response_model=schemas.CacheStatsResponse)
+async def get_cache_stats():
+    """
+    Retrieve statistics of the in-process response cache.
+
+    Returns:
+        CacheStatsResponse: Cache size, limits and hit/miss/eviction counters.
+    """
+    return cache.responses.stats()
+
+
+@router.get("/slow-queries", response_model=list[schemas.SlowQuery])
+async def get_slow_queries(limit: int = Query(default=100, ge=1, le=1000)):
+    """
+    Retrieve the recent slow statements of the current worker.
+
+    Args:
+        limit (int): Maximum number of statements to return (1–1000).
+
+    Returns:
+        list[SlowQuery]: Slow statements, most recent first.
+    """
+    return slowqueries.slow_queries.entries()[:limit]
@@ -0,0 +1,36 @@
+"""
+API routes for name autocompletion.
+
+This module defines the endpoint completing company and team names from
+the in-process prefix index, without querying the database.
+"""
+
+import typing
+
+from fastapi import APIRouter, Query
+from play import autocomplete, schemas
+
+router = APIRouter(prefix="/autocomplete", tags=["autocomplete"])
+
+
+@router.get("", response_model=list[schemas.AutocompleteItem])
+async def complete(
+    prefix: str = Query(min_length=1, max_length=255),
+    limit: int = Query(default=10, ge=1, le=50),
+    kind: typing.Literal["company", "team"] | None = Query(default=None),
+):
+    """
+    Complete company and team names starting with a prefix.
+
+    Matching ignores case and accents. Results come from memory, so this
+    endpoint never waits on the database.
+
+    Args:
+        prefix (str): Beginning of the name.
+        limit (int): Maximum number of names to return (1–50).
+        kind (str | None): Only complete `company` or `team` names.
+
+    Returns:
+        list[AutocompleteItem]: Matching records, in name order.
+    """
+    return autocomplete.names.search(prefix, limit, kind)
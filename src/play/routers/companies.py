@@ -5,60 +5,190 @@ This module defines all HTTP endpoints related to company management,
 including listing, retrieval, creation, update, and deletion.
 """
 
-from fastapi import APIRouter, Depends, Query, status
-from sqlalchemy import orm
-from play import database, schemas
+import functools
+
+from fastapi import APIRouter, Body, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from play import cache, conditional, database, export, fieldsets, pagination
+from play import schemas, serialization
 from play.services import companies
 
 router = APIRouter(prefix="/companies", tags=["companies"])
 
 
-@router.get("/", response_model=list[schemas.CompanyResponse])
-def list_companies(
+@router.get(
+    "/",
+    response_model=list[schemas.CompanyResponse] | list[schemas.CompanyWithAggregates],
+)
+async def list_companies(
+    request: Request,
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=100),
-    db: orm.Session = Depends(database.get_db),
+    after: str | None = Query(default=None),
+    sort: schemas.CompanySort = Query(default="id"),
+    country: str | None = Query(default=None, min_length=2, max_length=100),
+    founded_year_min: int | None = Query(default=None, ge=1800, le=2100),
+    founded_year_max: int | None = Query(default=None, ge=1800, le=2100),
+    aggregates: bool = Query(default=False),
+    fields: str | None = Query(default=None),
+    db: AsyncSession = Depends(database.get_read_db),
 ):
     """
-    Retrieve a paginated list of companies.
+    Retrieve a filtered, paginated list of companies.
+
+    Pages can be requested by offset (`skip`) or by cursor (`after`).
+    When more rows may follow, the cursor of the next page is returned
+    in the `X-Next-Cursor` response header. First pages are served from
+    the response cache.
 
     Args:
+        request (Request): Incoming request, for content negotiation.
         skip (int): Number of records to skip for pagination.
         limit (int): Maximum number of records to return (1–100).
-        db (Session): Database session dependency.
+        after (str | None): Cursor of the previous page.
+        sort (str): Column to order by (`id`, `name`, `country` or
+            `founded_year`).
+        country (str | None): Only include companies based in this country.
+        founded_year_min (int | None): Earliest founding year to include.
+        founded_year_max (int | None): Latest founding year to include.
+        aggregates (bool): Include the team aggregates of each company.
+            These responses are not cached, as team writes change them.
+        fields (str | None): Comma-separated fields to return, such as
+            `id,name`; only the matching columns are read.
+        db (AsyncSession): Database session dependency.
+
+    Returns:
+        list[CompanyResponse | CompanyWithAggregates]: List of companies.
+
+    Raises:
+        HTTPException: If `fields` names an unknown field.
+    """
+    filters = (country, founded_year_min, founded_year_max)
+    schema = schemas.CompanyWithAggregates if aggregates else schemas.CompanyResponse
+    selected = fieldsets.parse(fields, schema)
+    columns = fieldsets.columns(selected, sort)
+
+    async def load():
+        items = await companies.list_companies(
+            db, skip, limit, after, sort, *filters, columns
+        )
+        cursor = pagination.next_cursor(items, sort, limit)
+        headers = {"X-Next-Cursor": cursor} if cursor is not None else {}
+        return headers, functools.partial(serialization.dump, schema, items, selected)
+
+    first_page = skip == 0 and after is None and not aggregates
+    key = ("companies", limit, sort, *filters, selected) if first_page else None
+    return await cache.responses.fetch(key, load, request)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_companies(
+    format: schemas.DataFormat = Query(default="ndjson"),
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    """
+    Export every company as a single streamed response.
+
+    Rows are streamed from a server-side cursor as they are read, from one
+    consistent snapshot, so the whole dataset can be mirrored in one
+    transfer instead of paginating through it.
+
+    Args:
+        format (str): Output format, `ndjson` (default) or `csv`.
+        db (AsyncSession): Database session dependency.
 
     Returns:
-        list[CompanyResponse]: List of companies.
+        StreamingResponse: The companies, one per line, ordered by identifier.
     """
-    return companies.list_companies(db, skip, limit)
+    return StreamingResponse(
+        companies.export_companies(db, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="companies.{format}"'},
+    )
 
 
-@router.get("/{company_id}", response_model=schemas.CompanyResponse)
-def get_company(company_id: int, db: orm.Session = Depends(database.get_db)):
+@router.get(
+    "/{company_id}",
+    response_model=schemas.CompanyResponse | schemas.CompanyWithAggregates,
+)
+async def get_company(
+    company_id: int,
+    request: Request,
+    aggregates: bool = Query(default=False),
+    fields: str | None = Query(default=None),
+    db: AsyncSession = Depends(database.get_read_db),
+):
     """
     Retrieve a company by its identifier.
 
+    The response is served from the response cache when possible. It
+    carries an `ETag` derived from the company version, and a request whose
+    `If-None-Match` holds that tag gets an empty `304 Not Modified`.
+
     Args:
         company_id (int): Unique identifier of the company.
-        db (Session): Database session dependency.
+        request (Request): Incoming request, for conditional GET.
+        aggregates (bool): Include the team aggregates of the company. The
+            aggregates are stored on the company row, so this costs no
+            extra query.
+        fields (str | None): Comma-separated fields to return, such as
+            `id,name`; only the matching columns are read.
+        db (AsyncSession): Database session dependency.
 
     Returns:
-        CompanyResponse: The requested company.
+        CompanyResponse | CompanyWithAggregates: The requested company.
 
     Raises:
-        HTTPException: If the company does not exist.
+        HTTPException:
+            - 400 if `fields` names an unknown field.
+            - 404 if the company does not exist.
     """
-    return companies.get_company(db, company_id)
+    schema = schemas.CompanyWithAggregates if aggregates else schemas.CompanyResponse
+    selected = fieldsets.parse(fields, schema)
+    columns = fieldsets.columns(selected, "version")
+    variant = (conditional.query_digest(request),) if request.query_params else ()
+
+    async def load():
+        company = await companies.get_company(db, company_id, columns)
+        tag = conditional.etag(company.id, company.version, *variant)
+        headers = conditional.headers(tag)
+        return headers, functools.partial(serialization.dump, schema, company, selected)
+
+    key = ("company", company_id, aggregates, selected)
+    return await cache.responses.fetch(key, load, request)
 
 
 @router.get("/{company_id}/teams", response_model=schemas.CompanyWithTeams)
-def get_company_teams(company_id: int, db: orm.Session = Depends(database.get_db)):
+async def get_company_teams(
+    company_id: int,
+    request: Request,
+    specialty: str | None = Query(default=None, min_length=1, max_length=100),
+    skip: int = Query(default=0, ge=0),
+    limit: int | None = Query(default=None, ge=1, le=1000),
+    after: str | None = Query(default=None),
+    db: AsyncSession = Depends(database.get_read_db),
+):
     """
     Retrieve a company along with its associated teams.
 
+    Teams can be filtered by specialty and paginated. Without `limit`, all
+    matching teams are returned; with it, the cursor of the next page of
+    teams is returned in the `X-Next-Cursor` response header.
+
+    The `ETag` of the response is derived from the company version, which
+    changes with any of its teams, and from the query parameters. A request
+    whose `If-None-Match` holds it gets an empty `304 Not Modified` without
+    the teams being loaded.
+
     Args:
         company_id (int): Unique identifier of the company.
-        db (Session): Database session dependency.
+        request (Request): Incoming request, for conditional GET.
+        specialty (str | None): Only include teams with this specialty.
+        skip (int): Number of teams to skip.
+        limit (int | None): Maximum number of teams to return (1–1000).
+        after (str | None): Cursor of the previous page of teams.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         CompanyWithTeams: Company including its teams.
@@ -66,33 +196,101 @@ def get_company_teams(company_id: int, db: orm.Session = Depends(database.get_db
     Raises:
         HTTPException: If the company does not exist.
     """
-    return companies.get_company(db, company_id)
+    company = await companies.get_company(db, company_id)
+    headers = conditional.headers(
+        conditional.etag(company.id, company.version, conditional.query_digest(request))
+    )
+    if conditional.matches(request, headers["ETag"]):
+        return conditional.not_modified(headers)
+
+    company = await companies.get_company_with_teams(
+        db, company_id, specialty, skip, limit, after
+    )
+    if limit is not None:
+        cursor = pagination.next_cursor(company.teams, "id", limit)
+        if cursor is not None:
+            headers["X-Next-Cursor"] = cursor
+    return serialization.response(schemas.CompanyWithTeams, company, headers=headers)
 
 
 @router.post(
     "/", response_model=schemas.CompanyResponse, status_code=status.HTTP_201_CREATED
 )
-def create_company(
-    payload: schemas.CompanyCreate, db: orm.Session = Depends(database.get_db)
+async def create_company(
+    payload: schemas.CompanyCreate, db: AsyncSession = Depends(database.get_async_db)
 ):
     """
     Create a new company.
 
     Args:
         payload (CompanyCreate): Company data to create.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         CompanyResponse: The newly created company.
     """
-    return companies.create_company(db, payload)
+    company = await companies.create_company(db, payload)
+    return serialization.response(
+        schemas.CompanyResponse, company, status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.post("/bulk", response_model=schemas.BulkCreateResponse)
+async def bulk_create_companies(
+    payload: list[schemas.CompanyCreate] = Body(
+        min_length=1, max_length=schemas.BULK_MAX_ROWS
+    ),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """
+    Create many companies in a single transaction.
+
+    Every row is validated like a single creation; the whole request is
+    rejected if any row is invalid.
+
+    Rows whose name is already taken are reported as `conflict`.
+
+    Args:
+        payload (list[CompanyCreate]): Company rows to create (1–10000).
+        db (AsyncSession): Database session dependency.
+
+    Returns:
+        BulkCreateResponse: Outcome of each row, in request order.
+    """
+    return await companies.bulk_create_companies(db, payload)
+
+
+@router.post("/import", response_model=schemas.ImportResponse)
+async def import_companies(
+    request: Request,
+    format: schemas.DataFormat = Query(default="ndjson"),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """
+    Import companies from an NDJSON or CSV request body.
+
+    The body is read and loaded incrementally, in batches, so files of
+    any size can be sent. Each row is validated against `CompanyCreate`;
+    invalid rows are reported without stopping the import.
+
+    Args:
+        request (Request): Incoming request, whose body is streamed.
+        format (str): Input format, `ndjson` (default) or `csv` with a
+            header line.
+        db (AsyncSession): Database session dependency.
+
+    Returns:
+        ImportResponse: Created and rejected row counts, and the rejected
+            rows with their line number.
+    """
+    return await companies.import_companies(db, request.stream(), format)
 
 
 @router.patch("/{company_id}", response_model=schemas.CompanyResponse)
-def update_company(
+async def update_company(
     company_id: int,
     payload: schemas.CompanyUpdate,
-    db: orm.Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
 ):
     """
     Partially update an existing company.
@@ -100,7 +298,7 @@ def update_company(
     Args:
         company_id (int): Unique identifier of the company.
         payload (CompanyUpdate): Fields to update.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         CompanyResponse: The updated company.
@@ -108,17 +306,20 @@ def update_company(
     Raises:
         HTTPException: If the company does not exist.
     """
-    return companies.update_company(db, company_id, payload)
+    company = await companies.update_company(db, company_id, payload)
+    return serialization.response(schemas.CompanyResponse, company)
 
 
 @router.delete("/{company_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_company(company_id: int, db: orm.Session = Depends(database.get_db)):
+async def delete_company(
+    company_id: int, db: AsyncSession = Depends(database.get_async_db)
+):
     """
     Delete a company by its identifier.
 
     Args:
         company_id (int): Unique identifier of the company.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         None: No content is returned on successful deletion.
@@ -126,4 +327,4 @@ def delete_company(company_id: int, db: orm.Session = Depends(database.get_db)):
     Raises:
         HTTPException: If the company does not exist.
     """
-    companies.delete_company(db, company_id)
+    await companies.delete_company(db, company_id)
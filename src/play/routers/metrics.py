@@ -0,0 +1,36 @@
+"""
+API routes for monitoring.
+
+This module defines the endpoint scraped by Prometheus.
+"""
+
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+from play import database, metrics
+
+router = APIRouter(tags=["monitoring"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics(request: Request):
+    """
+    Retrieve metrics in the Prometheus text format.
+
+    When `METRICS_MULTIPROCESS_DIR` is set, the metrics of every worker
+    process are reported, as of their last snapshot; otherwise only those
+    of the answering worker.
+
+    Args:
+        request (Request): Incoming request, used to find the pools.
+
+    Returns:
+        PlainTextResponse: Request counts and latencies, requests in
+            flight, threadpool usage and database pool state.
+    """
+    return PlainTextResponse(
+        await metrics.exposition(
+            database.of(request).pools(),
+            request.app.state.settings.metrics_multiprocess_dir,
+        ),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -0,0 +1,38 @@
+"""
+API routes for full-text search.
+
+This module defines the endpoint searching companies and teams by name
+and description.
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from play import database, schemas
+from play.services import search as search_service
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=list[schemas.SearchResult])
+async def search(
+    q: str = Query(min_length=1, max_length=200),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    """
+    Search companies and teams by name and description.
+
+    Results of both kinds are ranked together, names weighing more than
+    descriptions, and come with a snippet highlighting the matched terms.
+
+    Args:
+        q (str): Free-text query.
+        skip (int): Number of results to skip for pagination.
+        limit (int): Maximum number of results to return (1–100).
+        db (AsyncSession): Database session dependency.
+
+    Returns:
+        list[SearchResult]: Matching companies and teams, best first.
+    """
+    return await search_service.search(db, q, skip, limit)
@@ -0,0 +1,73 @@
+"""
+API routes for aggregated statistics.
+
+This module defines the endpoints serving statistics of companies and
+teams grouped by a column, computed from periodically refreshed rollups.
+"""
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from play import database, schemas
+from play.services import stats
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/companies", response_model=schemas.CompanyStatsResponse)
+async def get_company_stats(
+    request: Request,
+    group_by: schemas.CompanyStatsGroup = Query(default="country"),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """
+    Retrieve statistics of companies grouped by a column.
+
+    Each group reports its number of companies, teams and team members,
+    and a histogram of founding decades. The statistics may lag behind
+    writes by up to `max_staleness` seconds.
+
+    Args:
+        request (Request): Incoming request, used to read the settings.
+        group_by (str): Column to group by (`country`).
+        skip (int): Number of groups to skip.
+        limit (int): Maximum number of groups to return (1–1000).
+        db (AsyncSession): Database session dependency, on the primary as
+            a stale rollup is refreshed before being served.
+
+    Returns:
+        CompanyStatsResponse: Statistics of each group, largest first.
+    """
+    max_age = request.app.state.settings.stats_refresh_seconds
+    return await stats.company_stats(db, group_by, skip, limit, max_age)
+
+
+@router.get("/teams", response_model=schemas.TeamStatsResponse)
+async def get_team_stats(
+    request: Request,
+    group_by: schemas.TeamStatsGroup = Query(default="specialty"),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """
+    Retrieve statistics of teams grouped by a column.
+
+    Each group reports its number of teams and their summed and average
+    sizes. The statistics may lag behind writes by up to `max_staleness`
+    seconds.
+
+    Args:
+        request (Request): Incoming request, used to read the settings.
+        group_by (str): Column to group by (`specialty` or `company_id`).
+        skip (int): Number of groups to skip.
+        limit (int): Maximum number of groups to return (1–1000).
+        db (AsyncSession): Database session dependency, on the primary as
+            a stale rollup is refreshed before being served.
+
+    Returns:
+        TeamStatsResponse: Statistics of each group, largest first.
+    """
+    max_age = request.app.state.settings.stats_refresh_seconds
+    return await stats.team_stats(db, group_by, skip, limit, max_age)
@@ -5,64 +5,161 @@ This module defines all HTTP endpoints related to team management,
 including listing, retrieval, creation, update, and deletion.
 """
 
-from fastapi import APIRouter, Depends, Query, status
-from sqlalchemy import orm
-from play import database, schemas
+import functools
+
+from fastapi import APIRouter, Body, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from play import cache, conditional, database, export, fieldsets, pagination
+from play import schemas, serialization
 from play.services import teams
 
 router = APIRouter(prefix="/teams", tags=["teams"])
 
 
 @router.get("/", response_model=list[schemas.TeamResponse])
-def list_teams(
+async def list_teams(
+    request: Request,
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=100, ge=1, le=100),
-    db: orm.Session = Depends(database.get_db),
+    after: str | None = Query(default=None),
+    sort: schemas.TeamSort = Query(default="id"),
+    company_id: int | None = Query(default=None),
+    specialty: str | None = Query(default=None, min_length=1, max_length=100),
+    size_min: int | None = Query(default=None, ge=1, le=100000),
+    size_max: int | None = Query(default=None, ge=1, le=100000),
+    fields: str | None = Query(default=None),
+    db: AsyncSession = Depends(database.get_read_db),
 ):
     """
-    Retrieve a paginated list of teams.
+    Retrieve a filtered, paginated list of teams.
+
+    Pages can be requested by offset (`skip`) or by cursor (`after`).
+    When more rows may follow, the cursor of the next page is returned
+    in the `X-Next-Cursor` response header. First pages are served from
+    the response cache.
 
     Args:
+        request (Request): Incoming request, for content negotiation.
         skip (int): Number of records to skip for pagination.
         limit (int): Maximum number of records to return (1–100).
-        db (Session): Database session dependency.
+        after (str | None): Cursor of the previous page.
+        sort (str): Column to order by (`id`, `name`, `specialty` or
+            `size`).
+        company_id (int | None): Only include teams of this company.
+        specialty (str | None): Only include teams with this specialty.
+        size_min (int | None): Smallest team size to include.
+        size_max (int | None): Largest team size to include.
+        fields (str | None): Comma-separated fields to return, such as
+            `id,name`; only the matching columns are read.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         list[TeamResponse]: List of teams.
+
+    Raises:
+        HTTPException: If `fields` names an unknown field.
+    """
+    filters = (company_id, specialty, size_min, size_max)
+    selected = fieldsets.parse(fields, schemas.TeamResponse)
+    columns = fieldsets.columns(selected, sort)
+
+    async def load():
+        items = await teams.list_teams(db, skip, limit, after, sort, *filters, columns)
+        cursor = pagination.next_cursor(items, sort, limit)
+        headers = {"X-Next-Cursor": cursor} if cursor is not None else {}
+        return headers, functools.partial(
+            serialization.dump, schemas.TeamResponse, items, selected
+        )
+
+    first_page = skip == 0 and after is None
+    key = ("teams", limit, sort, *filters, selected) if first_page else None
+    return await cache.responses.fetch(key, load, request)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_teams(
+    format: schemas.DataFormat = Query(default="ndjson"),
+    db: AsyncSession = Depends(database.get_read_db),
+):
+    """
+    Export every team as a single streamed response.
+
+    Rows are streamed from a server-side cursor as they are read, from one
+    consistent snapshot, so the whole dataset can be mirrored in one
+    transfer instead of paginating through it.
+
+    Args:
+        format (str): Output format, `ndjson` (default) or `csv`.
+        db (AsyncSession): Database session dependency.
+
+    Returns:
+        StreamingResponse: The teams, one per line, ordered by identifier.
     """
-    return teams.list_teams(db, skip, limit)
+    return StreamingResponse(
+        teams.export_teams(db, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="teams.{format}"'},
+    )
 
 
 @router.get("/{team_id}", response_model=schemas.TeamResponse)
-def get_team(team_id: int, db: orm.Session = Depends(database.get_db)):
+async def get_team(
+    team_id: int,
+    request: Request,
+    fields: str | None = Query(default=None),
+    db: AsyncSession = Depends(database.get_read_db),
+):
     """
     Retrieve a team by its identifier.
 
+    The response is served from the response cache when possible. It
+    carries an `ETag` derived from the team version, and a request whose
+    `If-None-Match` holds that tag gets an empty `304 Not Modified`.
+
     Args:
         team_id (int): Unique identifier of the team.
-        db (Session): Database session dependency.
+        request (Request): Incoming request, for conditional GET.
+        fields (str | None): Comma-separated fields to return, such as
+            `id,name`; only the matching columns are read.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         TeamResponse: The requested team.
 
     Raises:
-        HTTPException: If the team does not exist.
+        HTTPException:
+            - 400 if `fields` names an unknown field.
+            - 404 if the team does not exist.
     """
-    return teams.get_team(db, team_id)
+    selected = fieldsets.parse(fields, schemas.TeamResponse)
+    columns = fieldsets.columns(selected, "version")
+    variant = (conditional.query_digest(request),) if request.query_params else ()
+
+    async def load():
+        team = await teams.get_team(db, team_id, columns)
+        tag = conditional.etag(team.id, team.version, *variant)
+        headers = conditional.headers(tag)
+        return headers, functools.partial(
+            serialization.dump, schemas.TeamResponse, team, selected
+        )
+
+    key = ("team", team_id, selected)
+    return await cache.responses.fetch(key, load, request)
 
 
 @router.post(
     "/", response_model=schemas.TeamResponse, status_code=status.HTTP_201_CREATED
 )
-def create_team(
-    payload: schemas.TeamCreate, db: orm.Session = Depends(database.get_db)
+async def create_team(
+    payload: schemas.TeamCreate, db: AsyncSession = Depends(database.get_async_db)
 ):
     """
     Create a new team.
 
     Args:
         payload (TeamCreate): Team data to create.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         TeamResponse: The newly created team.
@@ -70,14 +167,69 @@ def create_team(
     Raises:
         HTTPException: If the referenced company does not exist.
     """
-    return teams.create_team(db, payload)
+    team = await teams.create_team(db, payload)
+    return serialization.response(
+        schemas.TeamResponse, team, status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.post("/bulk", response_model=schemas.BulkCreateResponse)
+async def bulk_create_teams(
+    payload: list[schemas.TeamCreate] = Body(
+        min_length=1, max_length=schemas.BULK_MAX_ROWS
+    ),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """
+    Create many teams in a single transaction.
+
+    Every row is validated like a single creation; the whole request is
+    rejected if any row is invalid.
+
+    Rows referencing an unknown company are reported as `company_not_found`.
+
+    Args:
+        payload (list[TeamCreate]): Team rows to create (1–10000).
+        db (AsyncSession): Database session dependency.
+
+    Returns:
+        BulkCreateResponse: Outcome of each row, in request order.
+    """
+    return await teams.bulk_create_teams(db, payload)
+
+
+@router.post("/import", response_model=schemas.ImportResponse)
+async def import_teams(
+    request: Request,
+    format: schemas.DataFormat = Query(default="ndjson"),
+    db: AsyncSession = Depends(database.get_async_db),
+):
+    """
+    Import teams from an NDJSON or CSV request body.
+
+    The body is read and loaded incrementally, in batches, so files of
+    any size can be sent. Each row is validated against `TeamImport`;
+    invalid rows are reported without stopping the import. Teams
+    reference their company by `company_id` or by `company_name`.
+
+    Args:
+        request (Request): Incoming request, whose body is streamed.
+        format (str): Input format, `ndjson` (default) or `csv` with a
+            header line.
+        db (AsyncSession): Database session dependency.
+
+    Returns:
+        ImportResponse: Created and rejected row counts, and the rejected
+            rows with their line number.
+    """
+    return await teams.import_teams(db, request.stream(), format)
 
 
 @router.patch("/{team_id}", response_model=schemas.TeamResponse)
-def update_team(
+async def update_team(
     team_id: int,
     payload: schemas.TeamUpdate,
-    db: orm.Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
 ):
     """
     Partially update an existing team.
@@ -85,7 +237,7 @@ def update_team(
     Args:
         team_id (int): Unique identifier of the team.
         payload (TeamUpdate): Fields to update.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         TeamResponse: The updated team.
@@ -93,17 +245,18 @@ def update_team(
     Raises:
         HTTPException: If the team does not exist.
     """
-    return teams.update_team(db, team_id, payload)
+    team = await teams.update_team(db, team_id, payload)
+    return serialization.response(schemas.TeamResponse, team)
 
 
 @router.delete("/{team_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_team(team_id: int, db: orm.Session = Depends(database.get_db)):
+async def delete_team(team_id: int, db: AsyncSession = Depends(database.get_async_db)):
     """
     Delete a team by its identifier.
 
     Args:
         team_id (int): Unique identifier of the team.
-        db (Session): Database session dependency.
+        db (AsyncSession): Database session dependency.
 
     Returns:
         None: No content is returned on successful deletion.
@@ -111,4 +264,4 @@ def delete_team(team_id: int, db: orm.Session = Depends(database.get_db)):
     Raises:
         HTTPException: If the team does not exist.
     """
-    teams.delete_team(db, team_id)
+    await teams.delete_team(db, team_id)
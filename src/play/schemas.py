@@ -9,9 +9,32 @@ Schemas are organized by purpose:
 - Create: schema used for creation payloads
 - Update: schema used for partial updates
 - Response: schema used for API responses
+
+It also defines the sort keys accepted by the list endpoints and the
+formats accepted by the export and import endpoints, and the groupings
+accepted by the statistics endpoints.
 """
 
-from pydantic import BaseModel, ConfigDict, HttpUrl, Field, field_validator
+import datetime
+import typing
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    HttpUrl,
+    Field,
+    field_validator,
+    model_validator,
+)
+
+CompanySort = typing.Literal["id", "name", "country", "founded_year"]
+TeamSort = typing.Literal["id", "name", "specialty", "size"]
+DataFormat = typing.Literal["ndjson", "csv"]
+CompanyStatsGroup = typing.Literal["country"]
+TeamStatsGroup = typing.Literal["specialty", "company_id"]
+
+BULK_MAX_ROWS = 10000
+IMPORT_MAX_ERRORS = 1000
 
 
 class CompanyBase(BaseModel):
@@ -94,6 +117,21 @@ class CompanyResponse(CompanyBase):
     id: int
 
 
+class CompanyWithAggregates(CompanyResponse):
+    """
+    Company response including aggregates of its teams.
+
+    Attributes:
+        team_count (int): Number of teams of the company.
+        total_headcount (int): Sum of the sizes of the company's teams.
+    """
+
+    model_config = ConfigDict(from_attributes=True, extra="ignore")
+
+    team_count: int
+    total_headcount: int
+
+
 class CompanyWithTeams(CompanyResponse):
     """
     Extended company response including related teams.
@@ -170,3 +208,274 @@ class TeamResponse(TeamBase):
     model_config = ConfigDict(from_attributes=True, extra="ignore")
 
     id: int
+
+
+class TeamImport(TeamBase):
+    """
+    Schema used for a Team row of an import.
+
+    The owning company is referenced either by identifier or by name,
+    exactly one of which must be given.
+
+    Attributes:
+        company_id (int | None): Identifier of the associated company.
+        company_name (str | None): Name of the associated company.
+    """
+
+    company_id: int | None = None
+    company_name: str | None = Field(default=None, min_length=1, max_length=255)
+
+    @model_validator(mode="after")
+    def validate_company(self):
+        if (self.company_id is None) == (self.company_name is None):
+            raise ValueError("exactly one of company_id and company_name is required")
+        return self
+
+
+class BulkItemResult(BaseModel):
+    """
+    Outcome of one row of a bulk creation request.
+
+    Attributes:
+        index (int): Position of the row in the request body.
+        status (str): `created`, `conflict` (name already taken) or
+            `company_not_found` (unknown `company_id`).
+        id (int | None): Identifier of the created record.
+    """
+
+    index: int
+    status: typing.Literal["created", "conflict", "company_not_found"]
+    id: int | None = None
+
+
+class BulkCreateResponse(BaseModel):
+    """
+    Schema returned by bulk creation endpoints.
+
+    Attributes:
+        created (int): Number of rows created.
+        failed (int): Number of rows rejected.
+        results (list[BulkItemResult]): Outcome of each row, in request order.
+    """
+
+    created: int
+    failed: int
+    results: list[BulkItemResult]
+
+
+class ImportRowError(BaseModel):
+    """
+    A row rejected by an import.
+
+    Attributes:
+        line (int): Line of the input where the row starts.
+        detail (str): Reason the row was rejected.
+    """
+
+    line: int
+    detail: str
+
+
+class ImportResponse(BaseModel):
+    """
+    Schema returned by import endpoints.
+
+    Attributes:
+        created (int): Number of rows created.
+        rejected (int): Number of rows rejected.
+        errors (list[ImportRowError]): Rejected rows. Only the first
+            `IMPORT_MAX_ERRORS` rejections are listed.
+    """
+
+    created: int
+    rejected: int
+    errors: list[ImportRowError]
+
+
+class SearchResult(BaseModel):
+    """
+    A company or team matching a full-text search.
+
+    Attributes:
+        kind (str): `company` or `team`.
+        id (int): Identifier of the company or team.
+        name (str): Name of the company or team.
+        snippet (str): Excerpt of the matching text, with matched terms
+            wrapped in `<mark>` tags.
+        rank (float): Relevance of the match; higher ranks come first.
+    """
+
+    kind: typing.Literal["company", "team"]
+    id: int
+    name: str
+    snippet: str
+    rank: float
+
+
+class AutocompleteItem(BaseModel):
+    """
+    A company or team whose name starts with an autocomplete prefix.
+
+    Attributes:
+        kind (str): `company` or `team`.
+        id (int): Identifier of the company or team.
+        name (str): Name of the company or team.
+    """
+
+    kind: typing.Literal["company", "team"]
+    id: int
+    name: str
+
+
+class CompanyStats(BaseModel):
+    """
+    Statistics of a group of companies.
+
+    Attributes:
+        key (str): Value shared by the companies of the group.
+        company_count (int): Number of companies.
+        team_count (int): Number of teams of these companies.
+        total_headcount (int): Sum of the sizes of these teams.
+        average_headcount (float): Mean headcount per company.
+        founded_years (dict[str, int]): Number of companies by founding
+            decade (such as `1980`), or `unknown`.
+    """
+
+    key: str
+    company_count: int
+    team_count: int
+    total_headcount: int
+    average_headcount: float
+    founded_years: dict[str, int]
+
+
+class TeamStats(BaseModel):
+    """
+    Statistics of a group of teams.
+
+    Attributes:
+        key (str | int): Value shared by the teams of the group.
+        team_count (int): Number of teams.
+        total_size (int): Sum of the sizes of the teams.
+        average_size (float | None): Mean size of the teams whose size is
+            known, or None if none is. Per company, the mean counts every
+            team, teams of unknown size as 0.
+    """
+
+    key: str | int
+    team_count: int
+    total_size: int
+    average_size: float | None
+
+
+class StatsResponse(BaseModel):
+    """
+    Statistics served from a precomputed rollup.
+
+    Attributes:
+        group_by (str): Column the rows are grouped by.
+        refreshed_at (datetime): When the rollup was computed. Writes made
+            since then are not reflected.
+        max_staleness (float): Seconds after which the rollup is always
+            recomputed before being served.
+    """
+
+    group_by: str
+    refreshed_at: datetime.datetime
+    max_staleness: float
+
+
+class CompanyStatsResponse(StatsResponse):
+    """
+    Statistics of companies, largest groups first.
+
+    Attributes:
+        groups (list[CompanyStats]): Statistics of each group.
+    """
+
+    groups: list[CompanyStats]
+
+
+class TeamStatsResponse(StatsResponse):
+    """
+    Statistics of teams, largest groups first.
+
+    Attributes:
+        groups (list[TeamStats]): Statistics of each group.
+    """
+
+    groups: list[TeamStats]
+
+
+class PoolStatsResponse(BaseModel):
+    """
+    Schema returned for the live state of a database connection pool.
+
+    Attributes:
+        size (int): Number of connections the pool keeps open.
+        checked_in (int): Idle connections available in the pool.
+        checked_out (int): Connections currently in use.
+        overflow (int): Connections opened beyond `size`.
+        timeout (float): Seconds a checkout waits before failing.
+        checkouts (int): Successful checkouts since startup.
+        timeouts (int): Checkouts that timed out since startup.
+        wait_seconds_sum (float): Total time spent waiting for checkouts.
+        wait_seconds_histogram (dict[str, int]): Cumulative number of
+            checkouts per wait-time upper bound, in seconds.
+    """
+
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    timeout: float
+    checkouts: int
+    timeouts: int
+    wait_seconds_sum: float
+    wait_seconds_histogram: dict[str, int]
+
+
+class CacheStatsResponse(BaseModel):
+    """
+    Schema returned for the state of the in-process response cache.
+
+    Attributes:
+        size (int): Number of cached responses.
+        max_entries (int): Maximum number of cached responses.
+        ttl (float): Seconds a cached response stays valid.
+        hits (int): Lookups answered from the cache.
+        misses (int): Lookups that reached the database.
+        evictions (int): Entries dropped to make room for new ones.
+        expirations (int): Entries dropped because they expired.
+        invalidations (int): Entries dropped by writes.
+    """
+
+    size: int
+    max_entries: int
+    ttl: float
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+
+class SlowQuery(BaseModel):
+    """
+    Schema returned for a statement recorded by the slow-query log.
+
+    Attributes:
+        at (datetime): When the statement completed.
+        duration_ms (float): Time the statement took, in milliseconds.
+        statement (str): Normalized SQL, literals replaced by `?`.
+        parameters (Any): Type names of the bind parameters.
+        caller (str | None): Service function that ran the statement.
+        plan (str | None): PostgreSQL plan, when it was sampled.
+    """
+
+    at: datetime.datetime
+    duration_ms: float
+    statement: str
+    parameters: typing.Any
+    caller: str | None
+    plan: str | None
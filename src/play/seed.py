@@ -0,0 +1,601 @@
+"""
+Synthetic data generator.
+
+This module fills a database with millions of realistic companies and
+teams, to reproduce production-scale behavior locally. Distributions are
+configurable: teams per company follow a power law (a few companies own
+most teams), description lengths are log-normal, and countries are drawn
+from a configurable number of countries, the first ones being the most
+common.
+
+Rows are generated in fixed-size batches. Each batch only depends on the
+seed, its own number and the identifiers already used when the first run
+started, so batches are generated and loaded in parallel
+worker processes, and the same seed always produces the same rows. On
+PostgreSQL, a batch is loaded with `COPY`; other databases get multi-row
+inserts. Every batch is recorded in a `seed_batches` table in the same
+transaction as its rows, so an interrupted run resumes where it stopped
+when started again with the same options. Generated identifiers start
+after the rows already in the database (such as the companies inserted
+by the migrations), and the identifiers taken when the first run started
+are recorded in a `seed_offsets` table for the runs that resume it.
+
+On PostgreSQL, the schema must have been created by the migrations
+(`alembic upgrade head`), which also create the full-text search columns
+and indexes; other databases, such as the SQLite files of the tests and
+benchmarks, get the tables of the models.
+
+Once every batch is loaded, the team aggregates of the companies are
+recomputed and, on PostgreSQL, the identifier sequences are moved past
+the generated rows.
+
+Usage:
+    play-seed --companies 1000000 --teams 10000000 --workers 8
+    python -m play.seed --url sqlite:///./play.db --companies 10000 --teams 100000
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import hashlib
+import io
+import json
+import math
+import random
+import sys
+import time
+import typing
+
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    create_engine,
+    func,
+    insert,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.engine import Engine
+
+from play import database, models
+from play.settings import Settings
+
+COUNTRIES = [
+    "United States",
+    "Japan",
+    "China",
+    "United Kingdom",
+    "France",
+    "Canada",
+    "Germany",
+    "South Korea",
+    "Sweden",
+    "Poland",
+    "Finland",
+    "Australia",
+    "Spain",
+    "Italy",
+    "Netherlands",
+    "Brazil",
+    "Russia",
+    "Ukraine",
+    "Denmark",
+    "Norway",
+    "Czech Republic",
+    "India",
+    "Mexico",
+    "Argentina",
+    "Belgium",
+    "Switzerland",
+    "Austria",
+    "Portugal",
+    "Ireland",
+    "New Zealand",
+]
+SPECIALTIES = [
+    "Gameplay",
+    "Rendering",
+    "Engine",
+    "Tools",
+    "Audio",
+    "Animation",
+    "Level Design",
+    "Narrative",
+    "Online Services",
+    "QA",
+    "Art",
+    "Porting",
+]
+SYLLABLES = ["ka", "to", "ri", "no", "sa", "mi", "ve", "lo", "da", "xu", "an", "el"]
+SUFFIXES = ["Games", "Studios", "Interactive", "Entertainment", "Software", "Works"]
+ADJECTIVES = ["Blue", "Iron", "Silent", "Rapid", "Golden", "Hidden", "Northern", "Red"]
+NOUNS = ["Falcon", "Forge", "Lantern", "Harbor", "Comet", "Grove", "Summit", "Tide"]
+WORDS = (
+    "game studio engine player world level team design build release "
+    "story combat open online multiplayer console mobile indie award "
+    "franchise sequel launch platform graphics sound music art craft"
+).split()
+
+COMPANY_COLUMNS = ["id", "name", "country", "founded_year", "website", "description"]
+TEAM_COLUMNS = ["id", "name", "specialty", "size", "description", "company_id"]
+
+# Batches already loaded, kept apart from the application models.
+metadata = MetaData()
+seed_batches = Table(
+    "seed_batches",
+    metadata,
+    Column("kind", String(20), primary_key=True),
+    Column("batch", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+)
+# Largest identifier of each kind before the first run, so that resumed
+# runs generate the same identifiers.
+seed_offsets = Table(
+    "seed_offsets",
+    metadata,
+    Column("kind", String(20), primary_key=True),
+    Column("id_offset", Integer, nullable=False),
+)
+
+
+class Options(typing.NamedTuple):
+    """
+    Volumes and distributions of a generated dataset.
+
+    Attributes:
+        companies (int): Number of companies.
+        teams (int): Number of teams.
+        seed (int): Seed of the random generators.
+        batch_size (int): Rows generated and loaded per batch.
+        countries (int): Number of distinct countries.
+        team_skew (float): Skew of the teams per company, 1 for a uniform
+            spread; the higher, the more teams the first companies own.
+        description_words (int): Median length of descriptions, in words.
+        description_null (float): Share of rows without description.
+    """
+
+    companies: int
+    teams: int
+    seed: int = 0
+    batch_size: int = 50_000
+    countries: int = 30
+    team_skew: float = 3.0
+    description_words: int = 30
+    description_null: float = 0.2
+
+    def fingerprint(self) -> str:
+        """
+        Identify the generated data, to resume only identical runs.
+
+        Returns:
+            str: Digest of the options that change the generated rows.
+        """
+        return hashlib.sha256(json.dumps(self._asdict()).encode()).hexdigest()
+
+
+def _country_names(count: int) -> list[str]:
+    return COUNTRIES[:count] + [
+        f"Country {number}" for number in range(len(COUNTRIES) + 1, count + 1)
+    ]
+
+
+def _skewed(rng: random.Random, count: int, skew: float) -> int:
+    # Index in [0, count), the lower ones drawn more often when skew > 1.
+    return min(int(count * rng.random() ** skew), count - 1)
+
+
+def _description(rng: random.Random, options: Options) -> str | None:
+    if rng.random() < options.description_null:
+        return None
+    length = rng.lognormvariate(math.log(options.description_words), 0.6)
+    words = rng.choices(WORDS, k=max(1, min(int(length), 700)))
+    return (" ".join(words).capitalize() + ".")[:5000]
+
+
+def _rng(options: Options, kind: str, batch: int) -> random.Random:
+    return random.Random(f"{options.seed}:{kind}:{batch}")
+
+
+def generate_companies(
+    options: Options, batch: int, offsets: dict[str, int] | None = None
+) -> list[tuple]:
+    """
+    Generate one batch of companies.
+
+    Args:
+        options (Options): Volumes and distributions.
+        batch (int): Number of the batch.
+        offsets (dict[str, int] | None): Identifiers already used per kind,
+            generated identifiers starting after them (none by default).
+
+    Returns:
+        list[tuple]: Rows, with values in `COMPANY_COLUMNS` order.
+    """
+    rng = _rng(options, "companies", batch)
+    countries = _country_names(options.countries)
+    offset = (offsets or {}).get("companies", 0)
+    first = offset + batch * options.batch_size + 1
+    last = offset + options.companies
+    rows = []
+    for id in range(first, min(first + options.batch_size, last + 1)):
+        stem = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).title()
+        website = (
+            f"https://{stem.lower()}{id}.example.com/" if rng.random() < 0.7 else None
+        )
+        rows.append(
+            (
+                id,
+                f"{stem} {rng.choice(SUFFIXES)} {id}",
+                countries[_skewed(rng, len(countries), 2.0)],
+                2025 - int(75 * rng.random() ** 2) if rng.random() < 0.95 else None,
+                website,
+                _description(rng, options),
+            )
+        )
+    return rows
+
+
+def generate_teams(
+    options: Options, batch: int, offsets: dict[str, int] | None = None
+) -> list[tuple]:
+    """
+    Generate one batch of teams, owned by generated companies.
+
+    Args:
+        options (Options): Volumes and distributions.
+        batch (int): Number of the batch.
+        offsets (dict[str, int] | None): Identifiers already used per kind,
+            generated identifiers starting after them (none by default).
+
+    Returns:
+        list[tuple]: Rows, with values in `TEAM_COLUMNS` order.
+    """
+    rng = _rng(options, "teams", batch)
+    offsets = offsets or {}
+    offset = offsets.get("teams", 0)
+    company_offset = offsets.get("companies", 0)
+    first = offset + batch * options.batch_size + 1
+    last = offset + options.teams
+    rows = []
+    for id in range(first, min(first + options.batch_size, last + 1)):
+        size = rng.lognormvariate(math.log(12), 0.9)
+        rows.append(
+            (
+                id,
+                f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} Team",
+                rng.choice(SPECIALTIES),
+                max(1, min(int(size), 100_000)) if rng.random() < 0.9 else None,
+                _description(rng, options),
+                company_offset + 1 + _skewed(rng, options.companies, options.team_skew),
+            )
+        )
+    return rows
+
+
+KINDS = {
+    "companies": (models.Company.__table__, COMPANY_COLUMNS, generate_companies),
+    "teams": (models.Team.__table__, TEAM_COLUMNS, generate_teams),
+}
+
+
+def _copy(connection, table: str, columns: list[str], rows: list[tuple]):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def load_batch(
+    engine: Engine,
+    options: Options,
+    kind: str,
+    batch: int,
+    offsets: dict[str, int] | None = None,
+) -> int:
+    """
+    Generate a batch and load it, recording it as done.
+
+    Args:
+        engine (Engine): Synchronous engine of the target database.
+        options (Options): Volumes and distributions.
+        kind (str): `companies` or `teams`.
+        batch (int): Number of the batch.
+        offsets (dict[str, int] | None): Identifiers already used per kind
+            (see `reserve_offsets`).
+
+    Returns:
+        int: Number of rows loaded.
+    """
+    table, columns, generate = KINDS[kind]
+    rows = generate(options, batch, offsets)
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            _copy(connection, table.name, columns, rows)
+        else:
+            connection.execute(insert(table), [dict(zip(columns, row)) for row in rows])
+        connection.execute(
+            insert(seed_batches).values(
+                kind=kind, batch=batch, fingerprint=options.fingerprint()
+            )
+        )
+    return len(rows)
+
+
+_worker_engine: Engine | None = None
+
+
+def _init_worker(url: str):
+    global _worker_engine
+    _worker_engine = create_engine(url, pool_size=1, max_overflow=0)
+
+
+def _load_in_worker(
+    options: Options, kind: str, batch: int, offsets: dict[str, int]
+) -> int:
+    return load_batch(_worker_engine, options, kind, batch, offsets)
+
+
+def prepare_schema(engine: Engine):
+    """
+    Check or create the tables to seed.
+
+    Args:
+        engine (Engine): Synchronous engine of the target database.
+
+    Raises:
+        SystemExit: If a PostgreSQL database was not migrated.
+    """
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            revision = MigrationContext.configure(connection).get_current_revision()
+        if revision is None:
+            raise SystemExit(
+                "The database is not migrated; run `alembic upgrade head` "
+                "before seeding it."
+            )
+    else:
+        database.Base.metadata.create_all(engine)
+    metadata.create_all(engine)
+
+
+def reserve_offsets(engine: Engine) -> dict[str, int]:
+    """
+    Find the identifiers already used, recording them on the first run.
+
+    Args:
+        engine (Engine): Synchronous engine of the target database.
+
+    Returns:
+        dict[str, int]: Largest identifier of each kind before the first
+            run, which generated identifiers start after.
+    """
+    with engine.begin() as connection:
+        offsets = dict(
+            connection.execute(
+                select(seed_offsets.c.kind, seed_offsets.c.id_offset)
+            ).all()
+        )
+        if offsets:
+            return offsets
+        for kind, (table, _, _) in KINDS.items():
+            offsets[kind] = connection.scalar(
+                select(func.coalesce(func.max(table.c.id), 0))
+            )
+        connection.execute(
+            insert(seed_offsets),
+            [{"kind": kind, "id_offset": offset} for kind, offset in offsets.items()],
+        )
+    return offsets
+
+
+def pending_batches(engine: Engine, options: Options, kind: str) -> list[int]:
+    """
+    List the batches of a kind not loaded yet.
+
+    Args:
+        engine (Engine): Synchronous engine of the target database.
+        options (Options): Volumes and distributions.
+        kind (str): `companies` or `teams`.
+
+    Returns:
+        list[int]: Numbers of the missing batches.
+
+    Raises:
+        SystemExit: If the database was seeded with other options.
+    """
+    with engine.connect() as connection:
+        fingerprints = set(
+            connection.scalars(select(seed_batches.c.fingerprint).distinct())
+        )
+        done = set(
+            connection.scalars(
+                select(seed_batches.c.batch).where(seed_batches.c.kind == kind)
+            )
+        )
+    if fingerprints - {options.fingerprint()}:
+        raise SystemExit(
+            "The database was seeded with other options; "
+            "resume with the same options or seed an empty database."
+        )
+    total = options.companies if kind == "companies" else options.teams
+    count = math.ceil(total / options.batch_size)
+    return [batch for batch in range(count) if batch not in done]
+
+
+def finish(engine: Engine):
+    """
+    Recompute company aggregates and identifier sequences after loading.
+
+    Args:
+        engine (Engine): Synchronous engine of the target database.
+    """
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(
+                text(
+                    "UPDATE companies SET team_count = totals.teams, "
+                    "total_headcount = totals.headcount FROM ("
+                    "SELECT company_id, count(*) AS teams, "
+                    "coalesce(sum(size), 0) AS headcount "
+                    "FROM teams GROUP BY company_id) AS totals "
+                    "WHERE companies.id = totals.company_id"
+                )
+            )
+            for table in ("companies", "teams"):
+                connection.execute(
+                    text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                        f"coalesce((SELECT max(id) FROM {table}), 1))"
+                    )
+                )
+            return
+        where = models.Team.company_id == models.Company.id
+        connection.execute(
+            update(models.Company).values(
+                team_count=select(func.count()).where(where).scalar_subquery(),
+                total_headcount=select(func.coalesce(func.sum(models.Team.size), 0))
+                .where(where)
+                .scalar_subquery(),
+            )
+        )
+
+
+def run(
+    url: str,
+    options: Options,
+    workers: int = 1,
+    progress: typing.Callable[[str, int, int, float], None] | None = None,
+) -> dict[str, int]:
+    """
+    Seed a database, resuming a previous run with the same options.
+
+    Args:
+        url (str): Synchronous database URL.
+        options (Options): Volumes and distributions.
+        workers (int): Worker processes generating and loading batches in
+            parallel; SQLite databases always use one.
+        progress (Callable | None): Called after each batch with the kind,
+            the rows loaded so far in this run, the rows to load, and the
+            elapsed seconds.
+
+    Returns:
+        dict[str, int]: Rows loaded by this run, per kind.
+
+    Raises:
+        SystemExit: If the database is not migrated or was seeded with
+            other options.
+    """
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+        workers = 1
+    executor = (
+        concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(url,)
+        )
+        if workers > 1
+        else None
+    )
+    loaded = {}
+    try:
+        prepare_schema(engine)
+        offsets = reserve_offsets(engine)
+        start = time.perf_counter()
+        # Teams reference companies, so every company is loaded first.
+        for kind in KINDS:
+            batches = pending_batches(engine, options, kind)
+            total = options.companies if kind == "companies" else options.teams
+            expected = sum(
+                min(options.batch_size, total - batch * options.batch_size)
+                for batch in batches
+            )
+            loaded[kind] = 0
+            if executor is None:
+                results = (
+                    load_batch(engine, options, kind, batch, offsets)
+                    for batch in batches
+                )
+            else:
+                results = (
+                    future.result()
+                    for future in concurrent.futures.as_completed(
+                        executor.submit(_load_in_worker, options, kind, batch, offsets)
+                        for batch in batches
+                    )
+                )
+            for count in results:
+                loaded[kind] += count
+                if progress is not None:
+                    progress(kind, loaded[kind], expected, time.perf_counter() - start)
+        finish(engine)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        engine.dispose()
+    return loaded
+
+
+def _print_progress(kind: str, done: int, expected: int, seconds: float):
+    rate = done / max(seconds, 1e-9)
+    print(
+        f"\r{kind}: {done:,}/{expected:,} rows, {rate:,.0f} rows/s",
+        end="" if done < expected else "\n",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main(argv: list[str] | None = None):
+    """Command-line entry point of the generator."""
+    defaults = Options(companies=0, teams=0)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="Database URL (default: POSTGRES_* variables)")
+    parser.add_argument("--companies", type=int, default=100_000)
+    parser.add_argument("--teams", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--countries", type=int, default=defaults.countries)
+    parser.add_argument("--team-skew", type=float, default=defaults.team_skew)
+    parser.add_argument(
+        "--description-words", type=int, default=defaults.description_words
+    )
+    parser.add_argument(
+        "--description-null", type=float, default=defaults.description_null
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    options = Options(
+        companies=args.companies,
+        teams=args.teams,
+        seed=args.seed,
+        batch_size=args.batch_size,
+        countries=args.countries,
+        team_skew=args.team_skew,
+        description_words=args.description_words,
+        description_null=args.description_null,
+    )
+    start = time.perf_counter()
+    url = args.url or Settings.from_env().database_url
+    loaded = run(url, options, args.workers, _print_progress)
+    seconds = time.perf_counter() - start
+    print(
+        f"Loaded {loaded['companies']:,} companies and {loaded['teams']:,} teams "
+        f"in {seconds:.1f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -7,35 +7,99 @@ including CRUD operations and validation handling.
 All database interactions related to companies should go through this layer.
 """
 
-from sqlalchemy import orm, exc
+import importlib
+import typing
+
+from sqlalchemy import exc, orm, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
-from play import models
+from play import autocomplete, cache, export, importer, models, pagination
 from play import schemas
 
 
-def list_companies(db: orm.Session, skip: int = 0, limit: int = 100):
+def _load_only(columns: typing.Iterable[str]):
+    return orm.load_only(*(getattr(models.Company, column) for column in columns))
+
+
+async def list_companies(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after: str | None = None,
+    sort: str = "id",
+    country: str | None = None,
+    founded_year_min: int | None = None,
+    founded_year_max: int | None = None,
+    columns: typing.Iterable[str] | None = None,
+):
     """
-    Retrieve a paginated list of companies.
+    Retrieve a filtered, paginated list of companies.
+
+    Either offset pagination (`skip`) or keyset pagination (`after`) is
+    used. Keyset pagination seeks directly past the previous page, so its
+    cost does not grow with the page number. Filters and sort keys are
+    backed by `(column, id)` indexes.
 
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         skip (int): Number of records to skip.
         limit (int): Maximum number of records to return.
+        after (str | None): Cursor returned with the previous page.
+        sort (str): Column to order by (see `schemas.CompanySort`).
+        country (str | None): Only include companies based in this country.
+        founded_year_min (int | None): Only include companies founded in
+            or after this year.
+        founded_year_max (int | None): Only include companies founded in
+            or before this year.
+        columns (Iterable[str] | None): Columns to load, or None for all;
+            the others are left unloaded and must not be accessed.
 
     Returns:
         list[Company]: List of company ORM objects.
+
+    Raises:
+        HTTPException:
+            - 400 if the cursor is invalid or combined with `skip`.
     """
-    return db.query(models.Company).offset(skip).limit(limit).all()
+    query = select(models.Company)
+    if country is not None:
+        query = query.where(models.Company.country == country)
+    if founded_year_min is not None:
+        query = query.where(models.Company.founded_year >= founded_year_min)
+    if founded_year_max is not None:
+        query = query.where(models.Company.founded_year <= founded_year_max)
+    if columns is not None:
+        query = query.options(_load_only(columns))
+    query = pagination.paginate(query, models.Company, sort, skip, after, limit)
+    return list(await db.scalars(query))
 
 
-def get_company(db: orm.Session, company_id: int):
+def export_companies(db: AsyncSession, format: str = "ndjson"):
+    """
+    Stream every company, ordered by identifier.
+
+    Args:
+        db (AsyncSession): Database session, not yet in a transaction.
+        format (str): Output format, `ndjson` or `csv`.
+
+    Returns:
+        AsyncIterator[bytes]: Encoded chunks of companies.
+    """
+    columns = ["id", "name", "country", "founded_year", "website", "description"]
+    return export.stream_table(db, models.Company, columns, format)
+
+
+async def get_company(
+    db: AsyncSession, company_id: int, columns: typing.Iterable[str] | None = None
+):
     """
     Retrieve a company by its identifier.
 
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         company_id (int): Unique identifier of the company.
+        columns (Iterable[str] | None): Columns to load, or None for all.
 
     Returns:
         Company: The requested company ORM object.
@@ -43,7 +107,8 @@ def get_company(db: orm.Session, company_id: int):
     Raises:
         HTTPException: If the company does not exist.
     """
-    company = db.query(models.Company).filter(models.Company.id == company_id).first()
+    options = None if columns is None else [_load_only(columns)]
+    company = await db.get(models.Company, company_id, options=options)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Company not found"
@@ -51,12 +116,57 @@ def get_company(db: orm.Session, company_id: int):
     return company
 
 
-def create_company(db: orm.Session, payload: schemas.CompanyCreate):
+async def get_company_with_teams(
+    db: AsyncSession,
+    company_id: int,
+    specialty: str | None = None,
+    skip: int = 0,
+    limit: int | None = None,
+    after: str | None = None,
+):
+    """
+    Retrieve a company by its identifier together with a page of its teams.
+
+    The company and its teams are fetched with two explicit queries; the
+    teams query is filtered and paginated in SQL, so only the requested
+    page is loaded and serialized. The page is attached to the company
+    without being recorded as a change, so it must not be used to modify
+    the relationship.
+
+    Args:
+        db (AsyncSession): Active database session.
+        company_id (int): Unique identifier of the company.
+        specialty (str | None): Only include teams with this specialty.
+        skip (int): Number of teams to skip.
+        limit (int | None): Maximum number of teams to return, or None for all.
+        after (str | None): Cursor of the last team of the previous page.
+
+    Returns:
+        Company: The requested company ORM object, with `teams` loaded.
+
+    Raises:
+        HTTPException:
+            - 404 if the company does not exist.
+            - 400 if the cursor is invalid or combined with `skip`.
+    """
+    company = await get_company(db, company_id)
+
+    query = select(models.Team).where(models.Team.company_id == company_id)
+    if specialty is not None:
+        query = query.where(models.Team.specialty == specialty)
+    query = pagination.paginate(query, models.Team, "id", skip, after, limit)
+
+    teams = list(await db.scalars(query))
+    orm.attributes.set_committed_value(company, "teams", teams)
+    return company
+
+
+async def create_company(db: AsyncSession, payload: schemas.CompanyCreate):
     """
     Create a new company.
 
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         payload (CompanyCreate): Validated company creation data.
 
     Returns:
@@ -69,24 +179,175 @@ def create_company(db: orm.Session, payload: schemas.CompanyCreate):
     try:
         company = models.Company(**payload.model_dump())
         db.add(company)
-        db.commit()
-        db.refresh(company)
+        await db.commit()
+        await db.refresh(company)
+        cache.responses.invalidate(groups=["companies"])
+        autocomplete.names.add("company", company.id, company.name)
         return company
     except exc.IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="Company already exists"
         )
 
 
-def update_company(db: orm.Session, company_id: int, payload: schemas.CompanyUpdate):
+async def bulk_create_companies(
+    db: AsyncSession, payloads: list[schemas.CompanyCreate]
+):
+    """
+    Create many companies in a single transaction.
+
+    Rows are sent as one multi-row `INSERT ... ON CONFLICT DO NOTHING`
+    statement (split in batches by the driver), so names that already
+    exist, including those inserted concurrently, are reported as
+    conflicts instead of aborting the whole batch. Only the first of
+    several rows sharing a name is inserted.
+
+    Args:
+        db (AsyncSession): Active database session.
+        payloads (list[CompanyCreate]): Validated company creation data.
+
+    Returns:
+        dict: Number of created and failed rows, and the outcome of each row.
+    """
+    first_index: dict[str, int] = {}
+    for index, payload in enumerate(payloads):
+        first_index.setdefault(payload.name, index)
+
+    ids: dict[str, int] = {}
+    if first_index:
+        # The dialect package is already loaded by the engine in use.
+        dialect = importlib.import_module(
+            f"sqlalchemy.dialects.{db.get_bind().dialect.name}"
+        )
+        statement = (
+            dialect.insert(models.Company)
+            .on_conflict_do_nothing(index_elements=[models.Company.name])
+            .returning(models.Company.id, models.Company.name)
+        )
+        rows = [payloads[index].model_dump() for index in first_index.values()]
+        result = await db.execute(statement, rows)
+        ids = {name: company_id for company_id, name in result}
+        await db.commit()
+        cache.responses.invalidate(groups=["companies"])
+        for name, company_id in ids.items():
+            autocomplete.names.add("company", company_id, name)
+
+    results = []
+    for index, payload in enumerate(payloads):
+        if first_index[payload.name] == index and payload.name in ids:
+            results.append(
+                {"index": index, "status": "created", "id": ids[payload.name]}
+            )
+        else:
+            results.append({"index": index, "status": "conflict"})
+    return {
+        "created": len(ids),
+        "failed": len(payloads) - len(ids),
+        "results": results,
+    }
+
+
+IMPORT_COLUMNS = ["name", "country", "founded_year", "website", "description"]
+
+
+async def _copy_companies(db: AsyncSession, batch: importer.Batch):
+    await db.execute(
+        text(
+            "CREATE TEMP TABLE IF NOT EXISTS import_companies ("
+            "row_index integer, name varchar(255), country varchar(100), "
+            "founded_year integer, website varchar(255), description text"
+            ") ON COMMIT DELETE ROWS"
+        )
+    )
+    await importer.copy_records(
+        db,
+        "import_companies",
+        ["row_index", *IMPORT_COLUMNS],
+        [
+            (index, *(getattr(row, column) for column in IMPORT_COLUMNS))
+            for index, (_, row) in enumerate(batch)
+        ],
+    )
+    columns = ", ".join(IMPORT_COLUMNS)
+    result = await db.execute(
+        text(
+            f"INSERT INTO companies ({columns}) "
+            f"SELECT DISTINCT ON (name) {columns} FROM import_companies "
+            "ORDER BY name, row_index "
+            "ON CONFLICT (name) DO NOTHING RETURNING id, name"
+        )
+    )
+    ids = dict(result.tuples().all())
+    await db.commit()
+    cache.responses.invalidate(groups=["companies"])
+    for company_id, name in ids.items():
+        autocomplete.names.add("company", company_id, name)
+    created = set(ids.values())
+
+    rejected = []
+    for line, row in batch:
+        if row.name in created:
+            created.discard(row.name)
+        else:
+            rejected.append((line, "Company already exists"))
+    return len(batch) - len(rejected), rejected
+
+
+async def _load_companies(db: AsyncSession, batch: importer.Batch):
+    if db.get_bind().dialect.name == "postgresql":
+        return await _copy_companies(db, batch)
+    result = await bulk_create_companies(db, [row for _, row in batch])
+    rejected = [
+        (batch[item["index"]][0], "Company already exists")
+        for item in result["results"]
+        if item["status"] != "created"
+    ]
+    return result["created"], rejected
+
+
+async def import_companies(
+    db: AsyncSession,
+    chunks: typing.AsyncIterator[bytes],
+    format: str = "ndjson",
+):
+    """
+    Import companies from an NDJSON or CSV stream.
+
+    Rows are validated against `CompanyCreate` and loaded in batches. On
+    Postgres each batch is copied into a temporary staging table with
+    `COPY` and merged with one `INSERT ... SELECT ... ON CONFLICT DO
+    NOTHING`; other databases fall back to a multi-row insert. Rows whose
+    name is already taken are rejected.
+
+    Args:
+        db (AsyncSession): Active database session.
+        chunks (AsyncIterator[bytes]): Raw input, in arbitrary chunks.
+        format (str): Input format, `ndjson` or `csv`.
+
+    Returns:
+        dict: Number of created and rejected rows, and the rejected rows.
+
+    Raises:
+        HTTPException:
+            - 413 if a line of the input is too long.
+    """
+    return await importer.run(
+        db, chunks, format, schemas.CompanyCreate, _load_companies
+    )
+
+
+async def update_company(
+    db: AsyncSession, company_id: int, payload: schemas.CompanyUpdate
+):
     """
     Update an existing company.
 
-    Applies partial updates based on provided fields.
+    Applies partial updates based on provided fields, and increments the
+    company version.
 
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         company_id (int): Identifier of the company to update.
         payload (CompanyUpdate): Fields to update.
 
@@ -97,26 +358,50 @@ def update_company(db: orm.Session, company_id: int, payload: schemas.CompanyUpd
         HTTPException:
             - 404 if the company does not exist.
     """
-    company = get_company(db, company_id)
+    company = await get_company(db, company_id)
+    name = company.name
     for field, value in payload.model_dump(exclude_unset=True).items():
         setattr(company, field, value)
-    db.commit()
-    db.refresh(company)
+    company.version = models.Company.version + 1
+    await db.commit()
+    await db.refresh(company)
+    cache.responses.invalidate(("company", company_id), groups=["companies"])
+    autocomplete.names.rename("company", company_id, name, company.name)
     return company
 
 
-def delete_company(db: orm.Session, company_id: int):
+async def delete_company(db: AsyncSession, company_id: int):
     """
     Delete a company by its identifier.
 
+    Its teams are deleted with it, and dropped from the response cache
+    and the autocomplete index.
+
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         company_id (int): Identifier of the company to delete.
 
     Raises:
         HTTPException:
             - 404 if the company does not exist.
     """
-    company = get_company(db, company_id)
-    db.delete(company)
-    db.commit()
+    company = await get_company(db, company_id)
+    team_names = dict(
+        (
+            await db.execute(
+                select(models.Team.id, models.Team.name).where(
+                    models.Team.company_id == company_id
+                )
+            )
+        ).all()
+    )
+    await db.delete(company)
+    await db.commit()
+    cache.responses.invalidate(
+        ("company", company_id),
+        *(("team", team_id) for team_id in team_names),
+        groups=["companies", "teams"],
+    )
+    autocomplete.names.remove("company", company_id, company.name)
+    for team_id, name in team_names.items():
+        autocomplete.names.remove("team", team_id, name)
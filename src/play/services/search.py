@@ -0,0 +1,125 @@
+"""
+Service layer for full-text search.
+
+This module ranks companies and teams matching a free-text query against
+their names and descriptions. On Postgres, matches are found through the
+GIN-indexed generated `search_vector` columns; elsewhere, through the
+SQLite FTS5 index tables. Names weigh more than descriptions, and
+snippets are only built for the returned page.
+
+Snippets are HTML: the database delimits matched terms with private-use
+characters, then the text is escaped and the delimiters replaced with
+`<mark>` tags, so names and descriptions are never returned as markup.
+"""
+
+import html
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+POSTGRES_SEARCH = text(
+    """
+    WITH matches AS (
+        SELECT 'company' AS kind, id, name, description,
+               ts_rank_cd(search_vector, query) AS rank, query
+        FROM companies, websearch_to_tsquery('english', :q) AS query
+        WHERE search_vector @@ query
+        UNION ALL
+        SELECT 'team', id, name, description,
+               ts_rank_cd(search_vector, query), query
+        FROM teams, websearch_to_tsquery('english', :q) AS query
+        WHERE search_vector @@ query
+        ORDER BY rank DESC, kind, id
+        LIMIT :limit OFFSET :skip
+    )
+    SELECT kind, id, name,
+           ts_headline(
+               'english', concat_ws(' ', name, description), query,
+               'StartSel=' || :start || ', StopSel=' || :stop
+               || ', MaxWords=24, MinWords=8'
+           ) AS snippet,
+           rank
+    FROM matches
+    ORDER BY rank DESC, kind, id
+    """
+)
+
+SQLITE_SEARCH = text(
+    """
+    SELECT kind, id, name, snippet, rank FROM (
+        SELECT 'company' AS kind, rowid AS id, name,
+               snippet(companies_fts, -1, :start, :stop, '…', 16) AS snippet,
+               -bm25(companies_fts, 10.0, 1.0) AS rank
+        FROM companies_fts WHERE companies_fts MATCH :q
+        UNION ALL
+        SELECT 'team', rowid, name,
+               snippet(teams_fts, -1, :start, :stop, '…', 16),
+               -bm25(teams_fts, 10.0, 1.0)
+        FROM teams_fts WHERE teams_fts MATCH :q
+    )
+    ORDER BY rank DESC, kind, id
+    LIMIT :limit OFFSET :skip
+    """
+)
+
+# Private-use characters delimiting matched terms in snippets.
+START = "\ue000"
+STOP = "\ue001"
+
+
+def highlight(snippet: str) -> str:
+    """
+    Turn a snippet delimited by `START` and `STOP` into safe HTML.
+
+    Args:
+        snippet (str): Snippet built by the database.
+
+    Returns:
+        str: Escaped snippet, with matched terms wrapped in `<mark>` tags.
+    """
+    escaped = html.escape(snippet)
+    return escaped.replace(START, "<mark>").replace(STOP, "</mark>")
+
+
+def _fts5_query(q: str) -> str:
+    """
+    Turn free text into an FTS5 query matching all of its words.
+
+    Every word is quoted, so FTS5 operators and punctuation in user input
+    are searched for literally instead of raising syntax errors.
+
+    Args:
+        q (str): Free-text query.
+
+    Returns:
+        str: FTS5 query expression.
+    """
+    return " ".join('"' + word.replace('"', '""') + '"' for word in q.split())
+
+
+async def search(db: AsyncSession, q: str, skip: int = 0, limit: int = 20):
+    """
+    Search companies and teams by name and description.
+
+    Args:
+        db (AsyncSession): Active database session.
+        q (str): Free-text query. On Postgres, web search syntax (quoted
+            phrases, `or`, `-word`) is supported.
+        skip (int): Number of results to skip.
+        limit (int): Maximum number of results to return.
+
+    Returns:
+        list[dict]: Matching companies and teams, most relevant first.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        statement, params = POSTGRES_SEARCH, {"q": q}
+    else:
+        query = _fts5_query(q)
+        if not query:
+            return []
+        statement, params = SQLITE_SEARCH, {"q": query}
+    result = await db.execute(
+        statement,
+        {**params, "start": START, "stop": STOP, "skip": skip, "limit": limit},
+    )
+    return [{**row, "snippet": highlight(row["snippet"])} for row in result.mappings()]
@@ -0,0 +1,303 @@
+"""
+Service layer for aggregated statistics.
+
+This module serves statistics of companies and teams grouped by a column
+from rollup tables, instead of grouping the full tables on every call.
+A rollup is recomputed with one `GROUP BY` query once it is older than
+the staleness bound: a background task refreshes every rollup
+periodically, and a request finding its rollup too old recomputes it
+before answering, so responses are never older than the bound.
+
+Refreshes of a rollup are serialized by a row lock on its
+`stats_refreshes` row; a worker that waited for another one's refresh
+finds the rollup fresh and skips it.
+
+With a staleness bound of 0, rollups are disabled: groups are computed
+for each request and nothing is written. Statistics of teams per company
+have no rollup either, as there is one group per company: they are read
+from the aggregates the service functions keep on each company.
+"""
+
+import asyncio
+import datetime
+import functools
+import logging
+
+from sqlalchemy import delete, exc, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from play import const, models
+
+logger = logging.getLogger(__name__)
+
+
+async def _company_rollup(db: AsyncSession, column) -> list[tuple]:
+    query = select(
+        column,
+        models.Company.founded_year,
+        func.count(),
+        func.sum(models.Company.team_count),
+        func.sum(models.Company.total_headcount),
+    ).group_by(column, models.Company.founded_year)
+    groups: dict = {}
+    for key, year, companies, teams, headcount in await db.execute(query):
+        group = groups.setdefault(
+            key,
+            {
+                "key": key,
+                "company_count": 0,
+                "team_count": 0,
+                "total_headcount": 0,
+                "founded_years": {},
+            },
+        )
+        group["company_count"] += companies
+        group["team_count"] += int(teams)
+        group["total_headcount"] += int(headcount)
+        decade = "unknown" if year is None else str(year // 10 * 10)
+        group["founded_years"][decade] = (
+            group["founded_years"].get(decade, 0) + companies
+        )
+    for group in groups.values():
+        group["average_headcount"] = group["total_headcount"] / group["company_count"]
+    return [(key, group["company_count"], group) for key, group in groups.items()]
+
+
+async def _team_rollup(db: AsyncSession, column) -> list[tuple]:
+    query = select(
+        column,
+        func.count(),
+        func.count(models.Team.size),
+        func.coalesce(func.sum(models.Team.size), 0),
+    ).group_by(column)
+    return [
+        (
+            key,
+            teams,
+            {
+                "key": key,
+                "team_count": teams,
+                "total_size": int(total),
+                "average_size": int(total) / sized if sized else None,
+            },
+        )
+        for key, teams, sized, total in await db.execute(query)
+    ]
+
+
+async def _teams_per_company(db: AsyncSession, skip: int, limit: int) -> list:
+    query = (
+        select(
+            models.Company.id,
+            models.Company.team_count,
+            models.Company.total_headcount,
+        )
+        .where(models.Company.team_count > 0)
+        .order_by(models.Company.team_count.desc(), models.Company.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [
+        {
+            "key": id,
+            "team_count": teams,
+            "total_size": int(total),
+            # Sizes of the company's teams are not counted separately.
+            "average_size": int(total) / teams,
+        }
+        for id, teams, total in await db.execute(query)
+    ]
+
+
+ROLLUPS = {
+    "companies.country": functools.partial(
+        _company_rollup, column=models.Company.country
+    ),
+    "teams.specialty": functools.partial(_team_rollup, column=models.Team.specialty),
+}
+
+
+def _aware(moment: datetime.datetime) -> datetime.datetime:
+    # SQLite does not store time zones; refresh times are always UTC.
+    return moment if moment.tzinfo else moment.replace(tzinfo=datetime.UTC)
+
+
+async def refresh(
+    db: AsyncSession, dimension: str, max_age: float
+) -> datetime.datetime:
+    """
+    Recompute a rollup unless it is more recent than `max_age`.
+
+    The rollup is replaced in one transaction, so readers see either the
+    previous or the new rollup, never a mix.
+
+    Args:
+        db (AsyncSession): Database session on the primary.
+        dimension (str): Rollup to refresh (see `ROLLUPS`).
+        max_age (float): Seconds below which the rollup is kept.
+
+    Returns:
+        datetime: When the rollup was last computed.
+    """
+    state = await db.scalar(
+        select(models.StatsRefresh)
+        .where(models.StatsRefresh.dimension == dimension)
+        .with_for_update()
+    )
+    now = datetime.datetime.now(datetime.UTC)
+    if state is not None:
+        refreshed_at = _aware(state.refreshed_at)
+        if (now - refreshed_at).total_seconds() < max_age:
+            await db.rollback()
+            return refreshed_at
+
+    rows = await ROLLUPS[dimension](db)
+    try:
+        await db.execute(
+            delete(models.StatsRollup).where(models.StatsRollup.dimension == dimension)
+        )
+        if rows:
+            await db.execute(
+                insert(models.StatsRollup),
+                [
+                    {
+                        "dimension": dimension,
+                        "key": str(key),
+                        "size": size,
+                        "metrics": metrics,
+                    }
+                    for key, size, metrics in rows
+                ],
+            )
+        if state is None:
+            db.add(models.StatsRefresh(dimension=dimension, refreshed_at=now))
+        else:
+            state.refreshed_at = now
+        await db.commit()
+    except exc.IntegrityError:
+        # Another worker computed the first rollup at the same time.
+        await db.rollback()
+    return now
+
+
+async def _compute(db: AsyncSession, dimension: str, skip: int, limit: int) -> list:
+    rows = await ROLLUPS[dimension](db)
+    rows.sort(key=lambda row: (-row[1], str(row[0])))
+    return [metrics for _, _, metrics in rows[skip : skip + limit]]
+
+
+async def _get_stats(
+    db: AsyncSession, dimension: str, skip: int, limit: int, max_age: float
+) -> dict:
+    group_by = dimension.split(".")[1]
+    if dimension == "teams.company_id":
+        groups = await _teams_per_company(db, skip, limit)
+    elif max_age <= 0:
+        groups = await _compute(db, dimension, skip, limit)
+    else:
+        groups = None
+    if groups is not None:
+        return {
+            "group_by": group_by,
+            "refreshed_at": datetime.datetime.now(datetime.UTC),
+            "max_staleness": 0,
+            "groups": groups,
+        }
+
+    refreshed_at = await db.scalar(
+        select(models.StatsRefresh.refreshed_at).where(
+            models.StatsRefresh.dimension == dimension
+        )
+    )
+    now = datetime.datetime.now(datetime.UTC)
+    if refreshed_at is None or (now - _aware(refreshed_at)).total_seconds() >= max_age:
+        refreshed_at = await refresh(db, dimension, max_age)
+    groups = await db.scalars(
+        select(models.StatsRollup.metrics)
+        .where(models.StatsRollup.dimension == dimension)
+        .order_by(models.StatsRollup.size.desc(), models.StatsRollup.key)
+        .offset(skip)
+        .limit(limit)
+    )
+    return {
+        "group_by": group_by,
+        "refreshed_at": _aware(refreshed_at),
+        "max_staleness": max_age,
+        "groups": list(groups),
+    }
+
+
+async def company_stats(
+    db: AsyncSession,
+    group_by: str = "country",
+    skip: int = 0,
+    limit: int = 100,
+    max_age: float = const.STATS_REFRESH_SECONDS,
+) -> dict:
+    """
+    Retrieve statistics of companies grouped by a column.
+
+    Args:
+        db (AsyncSession): Database session on the primary, used to
+            refresh the rollup when it is too old.
+        group_by (str): Column to group by (see `schemas.CompanyStatsGroup`).
+        skip (int): Number of groups to skip.
+        limit (int): Maximum number of groups to return.
+        max_age (float): Staleness bound of the rollup in seconds, 0 to
+            compute the groups without a rollup.
+
+    Returns:
+        dict: Grouping, refresh time, staleness bound, and statistics of
+            each group, largest groups first.
+    """
+    return await _get_stats(db, f"companies.{group_by}", skip, limit, max_age)
+
+
+async def team_stats(
+    db: AsyncSession,
+    group_by: str = "specialty",
+    skip: int = 0,
+    limit: int = 100,
+    max_age: float = const.STATS_REFRESH_SECONDS,
+) -> dict:
+    """
+    Retrieve statistics of teams grouped by a column.
+
+    Teams grouped by `company_id` are read from the aggregates of each
+    company, so they are always current and not limited by `max_age`.
+
+    Args:
+        db (AsyncSession): Database session on the primary, used to
+            refresh the rollup when it is too old.
+        group_by (str): Column to group by (see `schemas.TeamStatsGroup`).
+        skip (int): Number of groups to skip.
+        limit (int): Maximum number of groups to return.
+        max_age (float): Staleness bound of the rollup in seconds, 0 to
+            compute the groups without a rollup.
+
+    Returns:
+        dict: Grouping, refresh time, staleness bound, and statistics of
+            each group, largest groups first.
+    """
+    return await _get_stats(db, f"teams.{group_by}", skip, limit, max_age)
+
+
+async def refresh_periodically(session_factory: async_sessionmaker, interval: float):
+    """
+    Keep every rollup fresh, until cancelled.
+
+    Rollups are refreshed every half `interval`, so that requests rarely
+    find one older than `interval` and have to wait for its refresh.
+
+    Args:
+        session_factory (async_sessionmaker): Factory of primary sessions.
+        interval (float): Staleness bound of the rollups, in seconds.
+    """
+    while True:
+        for dimension in ROLLUPS:
+            try:
+                async with session_factory() as db:
+                    await refresh(db, dimension, interval / 2)
+            except Exception:
+                logger.exception("Could not refresh the %s statistics", dimension)
+        await asyncio.sleep(interval / 2)
@@ -7,35 +7,100 @@ including CRUD operations and validation rules.
 All database interactions related to teams should go through this layer.
 """
 
-from sqlalchemy import orm, exc
+import typing
+
+from sqlalchemy import bindparam, delete, exc, insert, orm, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 
-from play import models
+from play import autocomplete, cache, export, importer, models, pagination
 from play import schemas
 
 
-def list_teams(db: orm.Session, skip: int = 0, limit: int = 100):
+def _load_only(columns: typing.Iterable[str]):
+    return orm.load_only(*(getattr(models.Team, column) for column in columns))
+
+
+async def list_teams(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after: str | None = None,
+    sort: str = "id",
+    company_id: int | None = None,
+    specialty: str | None = None,
+    size_min: int | None = None,
+    size_max: int | None = None,
+    columns: typing.Iterable[str] | None = None,
+):
     """
-    Retrieve a paginated list of teams.
+    Retrieve a filtered, paginated list of teams.
+
+    Either offset pagination (`skip`) or keyset pagination (`after`) is
+    used. Keyset pagination seeks directly past the previous page, so its
+    cost does not grow with the page number. Filters and sort keys are
+    backed by `(column, id)` indexes.
 
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         skip (int): Number of records to skip.
         limit (int): Maximum number of records to return.
+        after (str | None): Cursor returned with the previous page.
+        sort (str): Column to order by (see `schemas.TeamSort`).
+        company_id (int | None): Only include teams of this company.
+        specialty (str | None): Only include teams with this specialty.
+        size_min (int | None): Only include teams with at least this size.
+        size_max (int | None): Only include teams with at most this size.
+        columns (Iterable[str] | None): Columns to load, or None for all;
+            the others are left unloaded and must not be accessed.
 
     Returns:
         list[Team]: List of team ORM objects.
+
+    Raises:
+        HTTPException:
+            - 400 if the cursor is invalid or combined with `skip`.
+    """
+    query = select(models.Team)
+    if company_id is not None:
+        query = query.where(models.Team.company_id == company_id)
+    if specialty is not None:
+        query = query.where(models.Team.specialty == specialty)
+    if size_min is not None:
+        query = query.where(models.Team.size >= size_min)
+    if size_max is not None:
+        query = query.where(models.Team.size <= size_max)
+    if columns is not None:
+        query = query.options(_load_only(columns))
+    query = pagination.paginate(query, models.Team, sort, skip, after, limit)
+    return list(await db.scalars(query))
+
+
+def export_teams(db: AsyncSession, format: str = "ndjson"):
+    """
+    Stream every team, ordered by identifier.
+
+    Args:
+        db (AsyncSession): Database session, not yet in a transaction.
+        format (str): Output format, `ndjson` or `csv`.
+
+    Returns:
+        AsyncIterator[bytes]: Encoded chunks of teams.
     """
-    return db.query(models.Team).offset(skip).limit(limit).all()
+    columns = ["id", "name", "specialty", "size", "description", "company_id"]
+    return export.stream_table(db, models.Team, columns, format)
 
 
-def get_team(db: orm.Session, team_id: int):
+async def get_team(
+    db: AsyncSession, team_id: int, columns: typing.Iterable[str] | None = None
+):
     """
     Retrieve a team by its identifier.
 
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         team_id (int): Unique identifier of the team.
+        columns (Iterable[str] | None): Columns to load, or None for all.
 
     Returns:
         Team: The requested team ORM object.
@@ -43,7 +108,8 @@ def get_team(db: orm.Session, team_id: int):
     Raises:
         HTTPException: If the team does not exist.
     """
-    team = db.query(models.Team).filter(models.Team.id == team_id).first()
+    options = None if columns is None else [_load_only(columns)]
+    team = await db.get(models.Team, team_id, options=options)
     if not team:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Team not found"
@@ -51,30 +117,76 @@ def get_team(db: orm.Session, team_id: int):
     return team
 
 
-def _check_company_exists(db: orm.Session, company_id: int):
+async def _check_company_exists(db: AsyncSession, company_id: int):
     """
     Ensure that a company exists.
 
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         company_id (int): Identifier of the company.
 
     Raises:
         HTTPException: If the company does not exist.
     """
-    company = db.query(models.Company).filter(models.Company.id == company_id).first()
+    company = await db.get(models.Company, company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Company not found"
         )
 
 
-def create_team(db: orm.Session, payload: schemas.TeamCreate):
+async def _update_companies(db: AsyncSession, changes):
+    """
+    Apply team changes to the aggregates and version of companies.
+
+    The aggregates are adjusted by deltas rather than recounted, so that
+    concurrent writes to teams of the same company add up: each update
+    waits for the previous one on the company row and applies its delta
+    to the committed values.
+
+    Args:
+        db (AsyncSession): Active database session.
+        changes (Iterable[tuple[int, int, int]]): Company identifier, change
+            in team count and change in headcount of each changed team.
+            The version of every listed company is incremented, even if
+            its aggregates do not change.
+    """
+    totals: dict[int, tuple[int, int]] = {}
+    for company_id, teams, headcount in changes:
+        previous = totals.get(company_id, (0, 0))
+        totals[company_id] = (previous[0] + teams, previous[1] + headcount)
+    if not totals:
+        return
+    companies = models.Company.__table__
+    await db.execute(
+        companies.update()
+        .where(companies.c.id == bindparam("company_id"))
+        .values(
+            version=companies.c.version + 1,
+            team_count=companies.c.team_count + bindparam("teams"),
+            total_headcount=companies.c.total_headcount + bindparam("headcount"),
+        ),
+        [
+            {"company_id": company_id, "teams": teams, "headcount": headcount}
+            for company_id, (teams, headcount) in sorted(totals.items())
+        ],
+    )
+
+
+def _invalidate(team_ids=(), company_ids=()):
+    cache.responses.invalidate(
+        *(("team", team_id) for team_id in team_ids),
+        *(("company", company_id) for company_id in company_ids),
+        groups=["teams"],
+    )
+
+
+async def create_team(db: AsyncSession, payload: schemas.TeamCreate):
     """
     Create a new team.
 
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         payload (TeamCreate): Validated team creation data.
 
     Returns:
@@ -87,22 +199,227 @@ def create_team(db: orm.Session, payload: schemas.TeamCreate):
     try:
         team = models.Team(**payload.model_dump())
         db.add(team)
-        db.commit()
-        db.refresh(team)
+        await _update_companies(db, [(payload.company_id, 1, payload.size or 0)])
+        await db.commit()
+        await db.refresh(team)
+        _invalidate(company_ids=[payload.company_id])
+        autocomplete.names.add("team", team.id, team.name)
         return team
     except exc.IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Company not found")
 
 
-def update_team(db: orm.Session, team_id: int, payload: schemas.TeamUpdate):
+async def bulk_create_teams(db: AsyncSession, payloads: list[schemas.TeamCreate]):
+    """
+    Create many teams in a single transaction.
+
+    Referenced companies are checked with one query, which also key-share
+    locks them so they cannot be deleted before the insert. Valid rows are
+    then sent as one multi-row `INSERT` statement (split in batches by the
+    driver).
+
+    Args:
+        db (AsyncSession): Active database session.
+        payloads (list[TeamCreate]): Validated team creation data.
+
+    Returns:
+        dict: Number of created and failed rows, and the outcome of each row.
+    """
+    company_ids = {payload.company_id for payload in payloads}
+    existing = set(
+        await db.scalars(
+            select(models.Company.id)
+            .where(models.Company.id.in_(company_ids))
+            .with_for_update(read=True, key_share=True)
+        )
+    )
+    valid = [i for i, payload in enumerate(payloads) if payload.company_id in existing]
+
+    ids: dict[int, int] = {}
+    if valid:
+        statement = insert(models.Team).returning(
+            models.Team.id, sort_by_parameter_order=True
+        )
+        result = await db.scalars(
+            statement, [payloads[index].model_dump() for index in valid]
+        )
+        ids = dict(zip(valid, result))
+        await _update_companies(
+            db,
+            (
+                (payloads[index].company_id, 1, payloads[index].size or 0)
+                for index in valid
+            ),
+        )
+    await db.commit()
+    _invalidate(company_ids=existing)
+    for index, team_id in ids.items():
+        autocomplete.names.add("team", team_id, payloads[index].name)
+
+    results = [
+        {"index": index, "status": "created", "id": ids[index]}
+        if index in ids
+        else {"index": index, "status": "company_not_found"}
+        for index in range(len(payloads))
+    ]
+    return {
+        "created": len(ids),
+        "failed": len(payloads) - len(ids),
+        "results": results,
+    }
+
+
+IMPORT_COLUMNS = ["name", "specialty", "size", "description", "company_id"]
+
+
+async def _copy_teams(db: AsyncSession, batch: importer.Batch):
+    await db.execute(
+        text(
+            "CREATE TEMP TABLE IF NOT EXISTS import_teams ("
+            "row_index integer, name varchar(255), specialty varchar(100), "
+            "size integer, description text, company_id integer, "
+            "company_name varchar(255)"
+            ") ON COMMIT DELETE ROWS"
+        )
+    )
+    await importer.copy_records(
+        db,
+        "import_teams",
+        ["row_index", *IMPORT_COLUMNS, "company_name"],
+        [
+            (
+                index,
+                *(getattr(row, column) for column in IMPORT_COLUMNS),
+                row.company_name,
+            )
+            for index, (_, row) in enumerate(batch)
+        ],
+    )
+    await db.execute(
+        text(
+            "UPDATE import_teams AS s SET company_id = c.id FROM companies AS c "
+            "WHERE s.company_id IS NULL AND c.name = s.company_name"
+        )
+    )
+    await db.execute(
+        text(
+            "SELECT id FROM companies "
+            "WHERE id IN (SELECT company_id FROM import_teams) FOR KEY SHARE"
+        )
+    )
+    missing = await db.scalars(
+        text(
+            "SELECT row_index FROM import_teams AS s WHERE NOT EXISTS "
+            "(SELECT 1 FROM companies AS c WHERE c.id = s.company_id) "
+            "ORDER BY row_index"
+        )
+    )
+    rejected = [(batch[index][0], "Company not found") for index in missing]
+    columns = ", ".join(IMPORT_COLUMNS)
+    result = await db.execute(
+        text(
+            f"INSERT INTO teams ({columns}) "
+            f"SELECT {', '.join(f's.{column}' for column in IMPORT_COLUMNS)} "
+            "FROM import_teams AS s JOIN companies AS c ON c.id = s.company_id "
+            "ORDER BY s.row_index RETURNING id, name"
+        )
+    )
+    created = result.tuples().all()
+    company_ids = list(
+        await db.scalars(
+            text(
+                "UPDATE companies AS c SET version = c.version + 1, "
+                "team_count = c.team_count + s.team_count, "
+                "total_headcount = c.total_headcount + s.headcount "
+                "FROM (SELECT company_id, count(*) AS team_count, "
+                "coalesce(sum(size), 0) AS headcount "
+                "FROM import_teams GROUP BY company_id) AS s "
+                "WHERE c.id = s.company_id RETURNING c.id"
+            )
+        )
+    )
+    await db.commit()
+    _invalidate(company_ids=company_ids)
+    for team_id, name in created:
+        autocomplete.names.add("team", team_id, name)
+    return len(batch) - len(rejected), rejected
+
+
+async def _load_teams(db: AsyncSession, batch: importer.Batch):
+    if db.get_bind().dialect.name == "postgresql":
+        return await _copy_teams(db, batch)
+
+    names = {row.company_name for _, row in batch if row.company_id is None}
+    company_ids = dict(
+        (
+            await db.execute(
+                select(models.Company.name, models.Company.id).where(
+                    models.Company.name.in_(names)
+                )
+            )
+        ).all()
+    )
+    rows = []
+    rejected = []
+    for line, row in batch:
+        company_id = row.company_id or company_ids.get(row.company_name)
+        if company_id is None:
+            rejected.append((line, "Company not found"))
+            continue
+        data = row.model_dump(exclude={"company_name"})
+        rows.append((line, schemas.TeamCreate(**{**data, "company_id": company_id})))
+
+    result = await bulk_create_teams(db, [row for _, row in rows])
+    rejected += [
+        (rows[item["index"]][0], "Company not found")
+        for item in result["results"]
+        if item["status"] != "created"
+    ]
+    rejected.sort()
+    return result["created"], rejected
+
+
+async def import_teams(
+    db: AsyncSession,
+    chunks: typing.AsyncIterator[bytes],
+    format: str = "ndjson",
+):
+    """
+    Import teams from an NDJSON or CSV stream.
+
+    Rows are validated against `TeamImport`, which accepts the owning
+    company either as `company_id` or as `company_name`, and loaded in
+    batches. On Postgres each batch is copied into a temporary staging
+    table with `COPY`, company names are resolved there, and the batch is
+    merged with one `INSERT ... SELECT`; other databases fall back to a
+    multi-row insert. Rows referencing an unknown company are rejected.
+
+    Args:
+        db (AsyncSession): Active database session.
+        chunks (AsyncIterator[bytes]): Raw input, in arbitrary chunks.
+        format (str): Input format, `ndjson` or `csv`.
+
+    Returns:
+        dict: Number of created and rejected rows, and the rejected rows.
+
+    Raises:
+        HTTPException:
+            - 413 if a line of the input is too long.
+    """
+    return await importer.run(db, chunks, format, schemas.TeamImport, _load_teams)
+
+
+async def update_team(db: AsyncSession, team_id: int, payload: schemas.TeamUpdate):
     """
     Update an existing team.
 
-    Applies partial updates based on provided fields.
+    Applies partial updates based on provided fields, increments the
+    version of the team, and updates the version and aggregates of its
+    previous and new company.
 
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         team_id (int): Identifier of the team to update.
         payload (TeamUpdate): Fields to update.
 
@@ -115,38 +432,63 @@ def update_team(db: orm.Session, team_id: int, payload: schemas.TeamUpdate):
             - 404 if the updated company reference does not exist.
     """
     try:
-        team = (
-            db.query(models.Team)
-            .filter(models.Team.id == team_id)
-            .with_for_update()
-            .first()
+        team = await db.scalar(
+            select(models.Team).where(models.Team.id == team_id).with_for_update()
         )
         if not team:
             raise HTTPException(status_code=404, detail="Team not found")
 
+        before = (team.company_id, team.size or 0)
+        name = team.name
         data = payload.model_dump(exclude_unset=True)
         for field, value in data.items():
             setattr(team, field, value)
+        company_ids = {before[0], team.company_id}
+        team.version = models.Team.version + 1
+        await _update_companies(
+            db,
+            [
+                (before[0], -1, -before[1]),
+                (team.company_id, 1, team.size or 0),
+            ],
+        )
 
-        db.commit()
-        db.refresh(team)
+        await db.commit()
+        await db.refresh(team)
+        _invalidate([team_id], company_ids)
+        autocomplete.names.rename("team", team_id, name, team.name)
         return team
     except exc.IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Company not found")
 
 
-def delete_team(db: orm.Session, team_id: int):
+async def delete_team(db: AsyncSession, team_id: int):
     """
     Delete a team by its identifier.
 
+    The team is deleted with `DELETE ... RETURNING`, so the company and
+    size subtracted from the aggregates are those of the deleted row, even
+    when a concurrent update moved or resized it.
+
     Args:
-        db (Session): Active database session.
+        db (AsyncSession): Active database session.
         team_id (int): Identifier of the team to delete.
 
     Raises:
         HTTPException: If the team does not exist.
     """
-    team = get_team(db, team_id)
-    db.delete(team)
-    db.commit()
+    deleted = (
+        await db.execute(
+            delete(models.Team)
+            .where(models.Team.id == team_id)
+            .returning(models.Team.company_id, models.Team.size, models.Team.name)
+        )
+    ).one_or_none()
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    company_id, size, name = deleted
+    await _update_companies(db, [(company_id, -1, -(size or 0))])
+    await db.commit()
+    _invalidate([team_id], [company_id])
+    autocomplete.names.remove("team", team_id, name)
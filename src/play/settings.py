@@ -0,0 +1,258 @@
+"""
+Application settings.
+
+This module defines the typed settings an application is created from
+(see `play.main.create_app`): database connections, pools, replicas,
+response caching and compression, the slow-query log and the background
+work of each worker. Settings are read from the environment only when
+asked to, by `Settings.from_env`, so importing the application modules
+neither requires the database variables nor connects anywhere; tests and
+tools build `Settings` directly instead.
+
+Every setting but the database connection is optional and defaults to
+the value of `play.const`.
+
+Environment Variables:
+    POSTGRES_USER (str): Database username.
+    POSTGRES_PASSWORD (str): Database user password.
+    POSTGRES_DB (str): Database name.
+    POSTGRES_HOST (str): Database host address.
+    POSTGRES_PORT (str): Database port.
+    POSTGRES_REPLICA_HOSTS (str): Comma-separated `host[:port]` list of
+        read replicas sharing the primary credentials (default none).
+    DB_POOL_SIZE (int): Connections kept open in the pool (default 5).
+    DB_MAX_OVERFLOW (int): Extra connections allowed beyond the pool size
+        under load (default 10).
+    DB_POOL_TIMEOUT (float): Seconds to wait for a free connection before
+        failing (default 30).
+    DB_POOL_RECYCLE (int): Seconds after which a connection is replaced,
+        -1 to disable (default -1).
+    DB_POOL_PRE_PING (bool): Whether to test connections on checkout
+        (default false).
+    REPLICA_HEALTH_INTERVAL (float): Seconds between health checks of a
+        replica, and before a failed replica is retried (default 10).
+    REPLICA_STICKY_SECONDS (float): Seconds during which a client that
+        wrote keeps reading from the primary (default 5).
+    CACHE_MAX_ENTRIES (int): Responses kept in the in-process cache,
+        0 to disable it (default 10000).
+    CACHE_TTL_SECONDS (float): Seconds a cached response stays valid
+        (default 30).
+    HTTP_CACHE_MAX_AGE (int): Seconds clients may reuse a company or team
+        response without revalidating it (default 0).
+    AUTOCOMPLETE_REFRESH_SECONDS (float): Seconds between rebuilds of the
+        autocomplete index from the database, 0 to only build it at startup
+        (default 300).
+    AUTOCOMPLETE_MERGE_THRESHOLD (int): Names added to or removed from the
+        autocomplete index since its last merge above which they are
+        merged into its sorted arrays (default 10000).
+    STATS_REFRESH_SECONDS (float): Maximum age of the statistics rollups;
+        older rollups are recomputed before being served, and a background
+        task refreshes them twice as often (default 60).
+    COMPRESSION_MINIMUM_SIZE (int): Smallest response body, in bytes, that
+        gets compressed (default 500).
+    COMPRESSION_ENCODINGS (str): Comma-separated content codings offered
+        to clients, preferred first, among `zstd`, `br` and `gzip`; empty
+        to disable compression (default `zstd,br,gzip`).
+    METRICS_MULTIPROCESS_DIR (str): Directory shared by the worker
+        processes, where each one writes its metrics so that `/metrics`
+        reports all of them; unset to report the answering worker only
+        (default unset).
+    METRICS_PUBLISH_SECONDS (float): Seconds between two writes of a
+        worker's metrics to `METRICS_MULTIPROCESS_DIR` (default 5).
+    SLOW_QUERY_SECONDS (float): Duration from which a statement is logged
+        as slow, 0 to disable the slow-query log (default 0.2).
+    SLOW_QUERY_EXPLAIN_RATE (float): Share of slow statements whose
+        PostgreSQL plan is captured, between 0 and 1 (default 0.1).
+    SLOW_QUERY_LOG_SIZE (int): Recent slow statements kept for
+        `/admin/slow-queries` (default 100).
+    WARMUP_CONNECTIONS (int): Connections of each pool opened at startup,
+        up to the pool size (default `DB_POOL_SIZE`).
+    WARMUP_REQUESTS (bool): Whether to serve a sample of read requests at
+        startup, compiling their queries and building their serializers
+        (default true).
+    WARMUP_HOT_COMPANIES (int): Companies with the most teams whose
+        responses are cached at startup (default 0).
+    WARMUP_TIMEOUT (float): Seconds after which the warm-up is abandoned
+        and the worker starts serving anyway (default 30).
+"""
+
+import dataclasses
+import os
+import typing
+
+from play import const
+
+
+# Fields read from the POSTGRES_* variables.
+_REQUIRED = {"database_url", "async_database_url", "async_replica_urls"}
+# Variables of the fields not named after them.
+_VARIABLES = {
+    "pool_size": "DB_POOL_SIZE",
+    "max_overflow": "DB_MAX_OVERFLOW",
+    "pool_timeout": "DB_POOL_TIMEOUT",
+    "pool_recycle": "DB_POOL_RECYCLE",
+    "pool_pre_ping": "DB_POOL_PRE_PING",
+}
+
+
+def _parse(kind, value: str):
+    if kind is bool:
+        return value.strip().lower() in {"1", "true", "yes"}
+    if kind == tuple[str, ...]:
+        return tuple(part.strip().lower() for part in value.split(",") if part.strip())
+    if kind == str | None:
+        return value or None
+    return kind(value)
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Settings:
+    """
+    Configuration of an application instance.
+
+    Attributes:
+        database_url (str): Synchronous (psycopg2) database URL, used by
+            tooling and scripts.
+        async_database_url (str): Asynchronous (asyncpg) database URL,
+            used by the API request path.
+        async_replica_urls (tuple[str, ...]): Asynchronous URLs of the
+            read replicas.
+        pool_size (int): Connections kept open in each pool.
+        max_overflow (int): Extra connections allowed under load.
+        pool_timeout (float): Seconds to wait for a free connection.
+        pool_recycle (int): Seconds after which a connection is replaced,
+            -1 to disable.
+        pool_pre_ping (bool): Whether to test connections on checkout.
+        replica_health_interval (float): Seconds between health checks of
+            a replica.
+        replica_sticky_seconds (float): Seconds during which a client that
+            wrote keeps reading from the primary.
+        cache_max_entries (int): Responses kept in the in-process cache,
+            0 to disable it.
+        cache_ttl_seconds (float): Seconds a cached response stays valid.
+        http_cache_max_age (int): Seconds clients may reuse a company or
+            team response without revalidating it.
+        compression_encodings (tuple[str, ...]): Content codings offered
+            to clients, preferred first; empty to disable compression.
+        compression_minimum_size (int): Smallest response body, in bytes,
+            that gets compressed.
+        slow_query_seconds (float): Duration from which a statement is
+            logged as slow, 0 to disable the slow-query log.
+        slow_query_explain_rate (float): Share of slow statements whose
+            PostgreSQL plan is captured.
+        slow_query_log_size (int): Recent slow statements kept.
+        autocomplete_refresh_seconds (float): Seconds between rebuilds of
+            the autocomplete index, 0 to only build it at startup.
+        autocomplete_merge_threshold (int): Pending writes of the
+            autocomplete index above which they are merged into it.
+        stats_refresh_seconds (float): Seconds between background
+            refreshes of the statistics rollups, 0 to disable them.
+        metrics_multiprocess_dir (str | None): Directory where the worker
+            publishes its metrics for the other workers.
+        metrics_publish_seconds (float): Seconds between two publications
+            of the worker's metrics.
+        warmup_connections (int): Connections of each pool opened before
+            serving, up to the pool size.
+        warmup_requests (bool): Whether to serve a sample of read requests
+            before serving.
+        warmup_hot_companies (int): Companies with the most teams whose
+            responses are cached before serving.
+        warmup_timeout (float): Seconds after which the warm-up is
+            abandoned.
+    """
+
+    database_url: str
+    async_database_url: str
+    async_replica_urls: tuple[str, ...] = ()
+    pool_size: int = const.DB_POOL_SIZE
+    max_overflow: int = const.DB_MAX_OVERFLOW
+    pool_timeout: float = const.DB_POOL_TIMEOUT
+    pool_recycle: int = const.DB_POOL_RECYCLE
+    pool_pre_ping: bool = const.DB_POOL_PRE_PING
+    replica_health_interval: float = const.REPLICA_HEALTH_INTERVAL
+    replica_sticky_seconds: float = const.REPLICA_STICKY_SECONDS
+    cache_max_entries: int = const.CACHE_MAX_ENTRIES
+    cache_ttl_seconds: float = const.CACHE_TTL_SECONDS
+    http_cache_max_age: int = const.HTTP_CACHE_MAX_AGE
+    compression_encodings: tuple[str, ...] = const.COMPRESSION_ENCODINGS
+    compression_minimum_size: int = const.COMPRESSION_MINIMUM_SIZE
+    slow_query_seconds: float = const.SLOW_QUERY_SECONDS
+    slow_query_explain_rate: float = const.SLOW_QUERY_EXPLAIN_RATE
+    slow_query_log_size: int = const.SLOW_QUERY_LOG_SIZE
+    autocomplete_refresh_seconds: float = const.AUTOCOMPLETE_REFRESH_SECONDS
+    autocomplete_merge_threshold: int = const.AUTOCOMPLETE_MERGE_THRESHOLD
+    stats_refresh_seconds: float = const.STATS_REFRESH_SECONDS
+    metrics_multiprocess_dir: str | None = const.METRICS_MULTIPROCESS_DIR
+    metrics_publish_seconds: float = const.METRICS_PUBLISH_SECONDS
+    warmup_connections: int = const.WARMUP_CONNECTIONS
+    warmup_requests: bool = const.WARMUP_REQUESTS
+    warmup_hot_companies: int = const.WARMUP_HOT_COMPANIES
+    warmup_timeout: float = const.WARMUP_TIMEOUT
+
+    @classmethod
+    def from_env(cls, environ: typing.Mapping[str, str] | None = None) -> "Settings":
+        """
+        Read the settings from environment variables.
+
+        Optional settings missing from the environment keep their default
+        value.
+
+        Args:
+            environ (Mapping[str, str] | None): Variables to read, the
+                process environment by default.
+
+        Returns:
+            Settings: Settings of a PostgreSQL deployment.
+
+        Raises:
+            KeyError: If any required environment variable is missing.
+            ValueError: If an optional variable has an invalid value.
+        """
+        environ = os.environ if environ is None else environ
+        user = environ["POSTGRES_USER"]
+        password = environ["POSTGRES_PASSWORD"]
+        name = environ["POSTGRES_DB"]
+        host = environ["POSTGRES_HOST"]
+        port = environ["POSTGRES_PORT"]
+        replica_hosts = [
+            replica if ":" in replica else f"{replica}:{port}"
+            for replica in (
+                part.strip()
+                for part in environ.get("POSTGRES_REPLICA_HOSTS", "").split(",")
+            )
+            if replica
+        ]
+        options = {
+            field.name: _parse(field.type, environ[variable])
+            for field in dataclasses.fields(cls)
+            if field.name not in _REQUIRED
+            and (variable := _VARIABLES.get(field.name, field.name.upper())) in environ
+        }
+        if "WARMUP_CONNECTIONS" not in environ and "pool_size" in options:
+            options["warmup_connections"] = options["pool_size"]
+        return cls(
+            **options,
+            database_url=f"postgresql://{user}:{password}@{host}:{port}/{name}",
+            async_database_url=(
+                f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{name}"
+            ),
+            async_replica_urls=tuple(
+                f"postgresql+asyncpg://{user}:{password}@{replica}/{name}"
+                for replica in replica_hosts
+            ),
+        )
+
+    def pool_options(self) -> dict:
+        """
+        Build the connection pool arguments of an engine.
+
+        Returns:
+            dict: Keyword arguments of `create_engine`.
+        """
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
@@ -0,0 +1,269 @@
+"""
+Slow-query log.
+
+This module times every statement sent to the database, from the
+`before_cursor_execute` and `after_cursor_execute` events of every
+engine, and records the statements slower than `SLOW_QUERY_SECONDS`:
+their normalized SQL (literals and placeholders replaced by `?`), the
+types of their bind parameters (never their values), and the service
+function that ran them. Fast statements only cost two clock reads.
+
+For a sampled share of the slow statements on PostgreSQL, the plan is
+captured right after the statement: `EXPLAIN (ANALYZE, BUFFERS)` for
+plain `SELECT` statements, which runs the statement again, and a plain
+`EXPLAIN` for anything else (writes, and `WITH` queries, which may hold
+data-modifying statements), which must not be applied twice. The plan is
+run in a savepoint that is always rolled back, so neither a failure nor
+the statement's effects reach the transaction of the request.
+
+Recent slow statements are logged and kept in a bounded ring buffer,
+available at `GET /admin/slow-queries`.
+"""
+
+import collections
+import datetime
+import logging
+import random
+import re
+import sys
+import threading
+import time
+
+import greenlet
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from play import const
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(
+    r"'(?:''|[^'])*'"  # strings
+    r"|\$\d+"  # asyncpg placeholders
+    r"|%\(\w+\)s|%s"  # psycopg2 placeholders
+    r"|(?<!:):\w+"  # named placeholders, not casts
+    r"|\b\d+(?:\.\d+)?\b"  # numbers
+)
+_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(statement: str) -> str:
+    """
+    Reduce a statement to its shape.
+
+    Args:
+        statement (str): SQL statement.
+
+    Returns:
+        str: The statement on one line, with literals and placeholders
+            replaced by `?` and lists of them by `?, ...`.
+    """
+    statement = _LITERALS.sub("?", statement)
+    statement = _LISTS.sub("?, ...", statement)
+    return _SPACES.sub(" ", statement).strip()
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """
+    Describe bind parameters without their values.
+
+    Args:
+        parameters: Parameters passed to the DBAPI cursor.
+        executemany (bool): Whether `parameters` holds one set per row.
+
+    Returns:
+        The type name of each parameter, as a dict or list like
+            `parameters`; for `executemany`, the row count and the shape of
+            the first row.
+    """
+    if executemany:
+        rows = list(parameters)
+        return {"rows": len(rows), "row": parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def _frames():
+    frame = sys._getframe(2)
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    # Async engines run statements in a greenlet whose stack stops at the
+    # driver; the caller is found in the stack of the parent greenlet,
+    # suspended while the statement runs.
+    parent = greenlet.getcurrent().parent
+    frame = parent.gr_frame if parent is not None else None
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+
+
+def caller() -> str | None:
+    """
+    Find the application function that ran the current statement.
+
+    Returns:
+        str | None: Qualified name of the innermost service function on
+            the stack, or of another application function if no service
+            is involved; None if the statement came from elsewhere.
+    """
+    fallback = None
+    for frame in _frames():
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("play.services."):
+            return f"{module}.{frame.f_code.co_qualname}"
+        if fallback is None and module.startswith("play.") and module != __name__:
+            fallback = f"{module}.{frame.f_code.co_qualname}"
+    return fallback
+
+
+def explain(dbapi_connection, statement: str, parameters) -> str:
+    """
+    Capture the PostgreSQL plan of a statement that just ran.
+
+    Args:
+        dbapi_connection: DBAPI connection the statement ran on.
+        statement (str): SQL statement, as sent to the driver.
+        parameters: Its bind parameters.
+
+    Returns:
+        str: The plan, one line per node.
+    """
+    words = statement.lstrip().split(None, 1)
+    select = bool(words) and words[0].lower() == "select"
+    options = "(ANALYZE, BUFFERS) " if select else ""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("SAVEPOINT slow_query_explain")
+        try:
+            cursor.execute(f"EXPLAIN {options}{statement}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        finally:
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+    finally:
+        cursor.close()
+    return plan
+
+
+class SlowQueryLog:
+    """
+    Recorder of slow statements.
+
+    Args:
+        threshold (float): Seconds from which a statement is slow, 0 or
+            less to disable the log.
+        explain_rate (float): Share of slow statements whose plan is
+            captured, between 0 and 1.
+        size (int): Number of recent slow statements kept.
+
+    Attributes:
+        recorded (int): Slow statements seen since startup.
+    """
+
+    def __init__(self, threshold: float, explain_rate: float, size: int):
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+        self.recorded = 0
+        self._entries: collections.deque[dict] = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, connection, statement: str, parameters, context, seconds: float):
+        """
+        Record a slow statement, capturing its plan if sampled.
+
+        Args:
+            connection (Connection): SQLAlchemy connection it ran on.
+            statement (str): SQL statement, as sent to the driver.
+            parameters: Its bind parameters.
+            context (ExecutionContext | None): Execution context.
+            seconds (float): Time the statement took.
+        """
+        executemany = context is not None and context.executemany
+        entry = {
+            "at": datetime.datetime.now(datetime.UTC),
+            "duration_ms": round(seconds * 1000, 3),
+            "statement": normalize(statement),
+            "parameters": parameter_shape(parameters, executemany),
+            "caller": caller(),
+            "plan": None,
+        }
+        if (
+            connection.dialect.name == "postgresql"
+            and not executemany
+            and not (
+                context is not None and context.execution_options.get("stream_results")
+            )
+            and random.random() < self.explain_rate
+        ):
+            try:
+                entry["plan"] = explain(connection.connection, statement, parameters)
+            except Exception:
+                logger.exception("Could not explain a slow query")
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s parameters=%s",
+            entry["duration_ms"],
+            entry["caller"],
+            entry["statement"],
+            entry["parameters"],
+        )
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+
+    def entries(self) -> list[dict]:
+        """
+        List the recent slow statements.
+
+        Returns:
+            list[dict]: Slow statements, most recent first.
+        """
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def configure(self, threshold: float, explain_rate: float, size: int):
+        """
+        Change the settings of the log, keeping the most recent entries.
+
+        Args:
+            threshold (float): Seconds from which a statement is slow, 0 or
+                less to disable the log.
+            explain_rate (float): Share of slow statements whose plan is
+                captured, between 0 and 1.
+            size (int): Number of recent slow statements kept.
+        """
+        with self._lock:
+            self.threshold = threshold
+            self.explain_rate = explain_rate
+            self._entries = collections.deque(self._entries, maxlen=size)
+
+    def clear(self):
+        """Forget the recorded statements."""
+        with self._lock:
+            self._entries.clear()
+            self.recorded = 0
+
+
+slow_queries = SlowQueryLog(
+    const.SLOW_QUERY_SECONDS, const.SLOW_QUERY_EXPLAIN_RATE, const.SLOW_QUERY_LOG_SIZE
+)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(connection, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._slow_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _check_duration(connection, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_slow_query_start", None)
+    if start is None or slow_queries.threshold <= 0:
+        return
+    seconds = time.perf_counter() - start
+    if seconds >= slow_queries.threshold:
+        slow_queries.record(connection, statement, parameters, context, seconds)
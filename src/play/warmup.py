@@ -0,0 +1,247 @@
+"""
+Startup warm-up.
+
+A fresh worker pays, on its first requests, for opening database
+connections, compiling SQL statements, building the OpenAPI document and
+the serializers of each response model, which shows up as a latency spike
+after every deploy. This module does that work in the lifespan, before the
+worker serves:
+
+- a number of connections of each pool are opened and checked;
+- a sample of read requests is served in-process, through the whole
+  middleware stack, which compiles the statements of the read services
+  and builds their serializers;
+- the OpenAPI document is generated;
+- optionally, the responses of the companies with the most teams are
+  cached.
+
+The warm-up is best effort: a step that fails is logged and skipped, and
+the whole warm-up is abandoned after a timeout, so that a worker never
+fails to start because of it. Write statements are not warmed up, as
+serving writes would change the data.
+"""
+
+import asyncio
+import logging
+import time
+import typing
+
+from fastapi import FastAPI
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from play import metrics, models
+
+logger = logging.getLogger(__name__)
+
+# Read requests served at startup, `{company_id}` and `{team_id}` being
+# replaced by identifiers of existing rows.
+REQUESTS = [
+    "/companies/?limit=1",
+    "/companies/?limit=1&sort=name",
+    "/companies/{company_id}",
+    "/companies/{company_id}/teams?limit=1",
+    "/teams/?limit=1",
+    "/teams/?limit=1&company_id={company_id}",
+    "/teams/{team_id}",
+    "/search?q=game&limit=1",
+    "/stats/companies?limit=1",
+    "/stats/teams?limit=1",
+]
+ACCEPT_ENCODING = b"gzip, deflate, br, zstd"
+
+
+async def open_connections(engine: AsyncEngine, count: int) -> int:
+    """
+    Open connections of an engine's pool, so that requests find them open.
+
+    The connections are opened concurrently and held together, so that
+    each one is a distinct connection, then returned to the pool.
+
+    Args:
+        engine (AsyncEngine): Engine whose pool is filled.
+        count (int): Connections to open, capped to the pool size.
+
+    Returns:
+        int: Connections opened and checked.
+    """
+    count = min(count, engine.pool.size())
+    results = await asyncio.gather(
+        *(engine.connect().start() for _ in range(count)), return_exceptions=True
+    )
+    connections = [result for result in results if not isinstance(result, Exception)]
+    try:
+        for connection in connections:
+            await connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            await connection.close()
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return len(connections)
+
+
+async def get(app: FastAPI, path: str) -> int:
+    """
+    Serve a GET request in-process, through the middleware stack.
+
+    Args:
+        app (FastAPI): Application serving the request.
+        path (str): Path and query string of the request.
+
+    Returns:
+        int: Status code of the response.
+    """
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"warmup"), (b"accept-encoding", ACCEPT_ENCODING)],
+        "client": None,
+        "server": None,
+    }
+    status = 500
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def hot_companies(sessions: async_sessionmaker, count: int) -> list[int]:
+    """
+    Find the companies with the most teams, likely the most requested.
+
+    Args:
+        sessions (async_sessionmaker): Factory of database sessions.
+        count (int): Number of companies.
+
+    Returns:
+        list[int]: Identifiers of the companies, largest first.
+    """
+    async with sessions() as db:
+        result = await db.scalars(
+            select(models.Company.id)
+            .order_by(models.Company.team_count.desc(), models.Company.id)
+            .limit(count)
+        )
+        return list(result)
+
+
+async def _serve(app: FastAPI, paths: list[str]) -> int:
+    served = 0
+    for path in paths:
+        status = await get(app, path)
+        if status >= 500:
+            logger.warning("Warm-up request %s failed with status %d", path, status)
+        else:
+            served += 1
+    return served
+
+
+async def _sample_paths(sessions: async_sessionmaker) -> list[str]:
+    async with sessions() as db:
+        company_id = await db.scalar(select(models.Company.id).limit(1))
+        team_id = await db.scalar(select(models.Team.id).limit(1))
+    return [
+        path.format(company_id=company_id, team_id=team_id)
+        for path in REQUESTS
+        if not (company_id is None and "{company_id}" in path)
+        and not (team_id is None and "{team_id}" in path)
+    ]
+
+
+async def _step(report: dict, name: str, work: typing.Awaitable):
+    start = time.perf_counter()
+    try:
+        report[name] = await work
+    except Exception:
+        logger.exception("Warm-up step %s failed", name)
+        report[name] = None
+    report[f"{name}_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+
+async def _generate_openapi(app: FastAPI) -> int:
+    return len(app.openapi()["paths"])
+
+
+async def _open_pools(engines: list[AsyncEngine], count: int) -> int:
+    opened = await asyncio.gather(
+        *(open_connections(engine, count) for engine in engines)
+    )
+    return sum(opened)
+
+
+async def _warm_requests(app: FastAPI, sessions: async_sessionmaker) -> int:
+    return await _serve(app, await _sample_paths(sessions))
+
+
+async def _cache_companies(
+    app: FastAPI, sessions: async_sessionmaker, count: int
+) -> int:
+    ids = await hot_companies(sessions, count)
+    return await _serve(app, [f"/companies/{id}" for id in ids])
+
+
+async def run(app: FastAPI) -> dict:
+    """
+    Warm up an application before it serves.
+
+    Args:
+        app (FastAPI): Application, whose settings and database are read
+            from its state.
+
+    Returns:
+        dict: Result and duration in milliseconds of each step that ran:
+            `connections` opened, warm-up `requests` served, OpenAPI
+            `paths` documented, `hot_companies` cached; None for a failed
+            step. `completed` is False when the warm-up timed out.
+    """
+    settings = app.state.settings
+    db = app.state.database
+    sessions = db.async_session_factory
+    report = {"completed": False}
+    start = time.perf_counter()
+    try:
+        async with asyncio.timeout(settings.warmup_timeout):
+            if settings.warmup_connections > 0:
+                await _step(
+                    report,
+                    "connections",
+                    _open_pools(
+                        list(db.async_engines().values()),
+                        settings.warmup_connections,
+                    ),
+                )
+            if settings.warmup_requests:
+                await _step(report, "requests", _warm_requests(app, sessions))
+            await _step(report, "paths", _generate_openapi(app))
+            if settings.warmup_hot_companies > 0:
+                await _step(
+                    report,
+                    "hot_companies",
+                    _cache_companies(app, sessions, settings.warmup_hot_companies),
+                )
+            report["completed"] = True
+    except TimeoutError:
+        logger.warning("Warm-up abandoned after %.1f s", settings.warmup_timeout)
+    # Warm-up requests are not traffic; the lifespan only starts publishing
+    # the metrics afterwards.
+    metrics.requests.clear()
+    report["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info("Warm-up done: %s", report)
+    return report
@@ -1,22 +1,40 @@
+import contextlib
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, pool
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-from play.database import Base, get_db
-from play.main import app
+from play import autocomplete, cache, metrics, slowqueries
+from play.database import Base, get_async_db, get_read_db
+from play.main import create_app
+from play.settings import Settings
 
 SQLITE_URL = "sqlite:///./test.db"
+ASYNC_SQLITE_URL = "sqlite+aiosqlite:///./test.db"
 
 engine = create_engine(SQLITE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_SQLITE_URL, poolclass=pool.NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
+app = create_app(Settings(database_url=SQLITE_URL, async_database_url=ASYNC_SQLITE_URL))
+
 
 @pytest.fixture(autouse=True)
 def setup_database():
     Base.metadata.create_all(bind=engine)
     yield
     Base.metadata.drop_all(bind=engine)
+    cache.responses.clear()
+    autocomplete.names.clear()
+    metrics.requests.clear()
+    slowqueries.slow_queries.clear()
 
 
 @pytest.fixture
@@ -28,14 +46,50 @@ def db():
         session.close()
 
 
+@pytest.fixture
+async def async_db():
+    async with TestingAsyncSessionLocal() as session:
+        yield session
+
+
 @pytest.fixture
 def client(db):
-    def override_get_db():
-        try:
-            yield db
-        finally:
-            db.close()
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
 
-    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_read_db] = override_get_async_db
     yield TestClient(app)
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def max_queries():
+    """
+    Assert that a block executes at most a number of SQL statements.
+
+    Catches N+1 regressions, such as relationships lazily loaded in a loop:
+
+        with max_queries(2):
+            client.get("/companies/1/teams")
+    """
+
+    @contextlib.contextmanager
+    def check(limit: int):
+        statements = []
+
+        def record(connection, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", record)
+        assert len(statements) <= limit, (
+            f"{len(statements)} statements executed, expected at most {limit}:\n"
+            + "\n".join(statements)
+        )
+
+    return check
@@ -0,0 +1,116 @@
+from play import autocomplete, models
+
+
+def test_fold_ignores_case_and_accents():
+    assert autocomplete.fold("Ubisoft Montréal") == "ubisoft montreal"
+    assert autocomplete.fold("STRASSE") == autocomplete.fold("straße")
+
+
+def test_search_matches_prefix_in_name_order():
+    index = autocomplete.PrefixIndex()
+    index.add("company", 2, "Nintendo")
+    index.add("company", 1, "Naughty Dog")
+    index.add("team", 5, "Nights Team")
+    index.add("company", 3, "Ubisoft")
+    assert index.search("n") == [
+        {"kind": "company", "id": 1, "name": "Naughty Dog"},
+        {"kind": "team", "id": 5, "name": "Nights Team"},
+        {"kind": "company", "id": 2, "name": "Nintendo"},
+    ]
+    assert [item["id"] for item in index.search("NI", limit=1)] == [5]
+    assert index.search("ni", kind="company") == [
+        {"kind": "company", "id": 2, "name": "Nintendo"}
+    ]
+    assert index.search("z") == []
+
+
+def test_search_matches_accented_names():
+    index = autocomplete.PrefixIndex()
+    index.add("team", 1, "Éclair")
+    assert index.search("ecl") == [{"kind": "team", "id": 1, "name": "Éclair"}]
+
+
+def test_add_remove_and_rename():
+    index = autocomplete.PrefixIndex()
+    index.add("company", 1, "Sega")
+    index.add("company", 1, "Sega")
+    assert len(index) == 1
+    index.rename("company", 1, "Sega", "Atlus")
+    assert index.search("sega") == []
+    assert index.search("atl") == [{"kind": "company", "id": 1, "name": "Atlus"}]
+    index.remove("company", 1, "Atlus")
+    index.remove("company", 1, "Atlus")
+    assert len(index) == 0
+
+
+async def test_rebuild_loads_companies_and_teams(db, async_db):
+    company = models.Company(name="Capcom", country="Japan")
+    db.add(company)
+    db.commit()
+    db.add(
+        models.Team(
+            name="Capcom Vancouver", specialty="Development", company_id=company.id
+        )
+    )
+    db.commit()
+
+    index = autocomplete.PrefixIndex()
+    index.add("company", 99, "Stale")
+    await index.rebuild(async_db)
+    assert index.loaded
+    assert [item["name"] for item in index.search("cap")] == [
+        "Capcom",
+        "Capcom Vancouver",
+    ]
+    assert index.search("stale") == []
+
+
+def test_search_by_kind_skips_other_kinds():
+    index = autocomplete.PrefixIndex()
+    index.load(("team", id, f"Arcade {id}") for id in range(1000))
+    index.add("company", 1, "Arcade Works")
+    assert index.search("arc", kind="company") == [
+        {"kind": "company", "id": 1, "name": "Arcade Works"}
+    ]
+    assert len(index.search("arc", limit=5)) == 5
+
+
+def test_pending_writes_are_merged():
+    index = autocomplete.PrefixIndex(merge_threshold=1000)
+    index.load([("company", 1, "Sega"), ("company", 2, "Sony")])
+    index.add("company", 3, "Square")
+    index.remove("company", 1, "Sega")
+    before = index.search("s")
+    index.merge()
+    assert index.search("s") == before
+    assert [item["name"] for item in before] == ["Sony", "Square"]
+    assert len(index) == 2
+    assert index.nbytes() > 0
+
+
+def test_merge_starts_past_threshold():
+    index = autocomplete.PrefixIndex(merge_threshold=3)
+    for id in range(5):
+        index.add("team", id, f"Team {id}")
+    merging = index._merging
+    if merging is not None:
+        merging.join()
+    assert len(index) == 5
+    assert [item["id"] for item in index.search("team")] == [0, 1, 2, 3, 4]
+
+
+def test_writes_during_merge_are_kept(monkeypatch):
+    index = autocomplete.PrefixIndex(merge_threshold=1000)
+    index.add("company", 1, "Sega")
+    index.add("company", 2, "Sony")
+    merged = autocomplete._KindIndex.merged
+
+    def merged_while_writing(self):
+        keys = merged(self)
+        index.remove("company", 2, "Sony")
+        index.add("company", 3, "Square")
+        return keys
+
+    monkeypatch.setattr(autocomplete._KindIndex, "merged", merged_while_writing)
+    index.merge()
+    assert [item["name"] for item in index.search("s")] == ["Sega", "Square"]
@@ -0,0 +1,143 @@
+import pytest
+from starlette.requests import Request
+
+from play import cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_get_counts_hits_and_misses():
+    responses = cache.ResponseCache(max_entries=10, ttl=30)
+    assert responses.get(("company", 1)) is None
+    responses.set(("company", 1), (b"{}", {}))
+    assert responses.get(("company", 1)) == (b"{}", {})
+    assert responses.stats()["hits"] == 1
+    assert responses.stats()["misses"] == 1
+
+
+def test_set_evicts_least_recently_used():
+    responses = cache.ResponseCache(max_entries=2, ttl=30)
+    responses.set(("company", 1), (b"1", {}))
+    responses.set(("company", 2), (b"2", {}))
+    responses.get(("company", 1))
+    responses.set(("company", 3), (b"3", {}))
+    assert responses.get(("company", 2)) is None
+    assert responses.get(("company", 1)) is not None
+    assert responses.evictions == 1
+
+
+def test_get_expires_entries(clock):
+    responses = cache.ResponseCache(max_entries=10, ttl=30)
+    responses.set(("team", 1), (b"1", {}))
+    clock[0] = 31.0
+    assert responses.get(("team", 1)) is None
+    assert responses.expirations == 1
+    assert len(responses) == 0
+
+
+def test_invalidate_keys_and_groups():
+    responses = cache.ResponseCache(max_entries=10, ttl=30)
+    responses.set(("company", 1), (b"1", {}))
+    responses.set(("company", 2), (b"2", {}))
+    responses.set(("companies", 100, "id"), (b"[]", {}))
+    responses.set(("companies", 100, "name"), (b"[]", {}))
+    responses.invalidate(("company", 1), groups=["companies"])
+    assert len(responses) == 1
+    assert responses.get(("company", 2)) is not None
+    assert responses.invalidations == 3
+
+
+def test_invalidate_drops_every_variant():
+    responses = cache.ResponseCache(max_entries=10, ttl=30)
+    responses.set(("company", 1, None), (b"1", {}))
+    responses.set(("company", 1, ("id", "name")), (b"1", {}))
+    responses.set(("company", 2, None), (b"2", {}))
+    responses.invalidate(("company", 1))
+    assert len(responses) == 1
+    assert responses.get(("company", 2, None)) is not None
+
+
+def test_set_skips_values_loaded_across_a_write():
+    responses = cache.ResponseCache(max_entries=10, ttl=30)
+    generation = responses.generation
+    responses.invalidate(("company", 1))
+    responses.set(("company", 1), (b"stale", {}), generation)
+    assert responses.get(("company", 1)) is None
+
+
+def test_disabled_cache_stores_nothing():
+    responses = cache.ResponseCache(max_entries=0, ttl=30)
+    responses.set(("company", 1), (b"1", {}))
+    assert len(responses) == 0
+
+
+async def test_fetch_loads_once():
+    responses = cache.ResponseCache(max_entries=10, ttl=30)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return {"X-Next-Cursor": "abc"}, lambda: b'{"id":1}'
+
+    for _ in range(2):
+        response = await responses.fetch(("company", 1), load)
+    assert len(calls) == 1
+    assert response.body == b'{"id":1}'
+    assert response.headers["x-next-cursor"] == "abc"
+    await responses.fetch(None, load)
+    assert len(calls) == 2
+
+
+def make_request(cookie=None, replica_lag=None):
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    request = Request({"type": "http", "method": "GET", "headers": headers})
+    if replica_lag is not None:
+        request.state.replica_lag = replica_lag
+    return request
+
+
+def counting_loader(calls):
+    async def load():
+        calls.append(1)
+        return {}, lambda: b'{"id":1}'
+
+    return load
+
+
+async def test_fetch_bypasses_cache_for_sticky_clients():
+    responses = cache.ResponseCache(max_entries=10, ttl=30)
+    calls = []
+    await responses.fetch(("company", 1), counting_loader(calls))
+    await responses.fetch(
+        ("company", 1), counting_loader(calls), make_request("play_primary=1")
+    )
+    assert len(calls) == 2
+    await responses.fetch(
+        ("company", 2), counting_loader(calls), make_request("play_primary=1")
+    )
+    assert responses.get(("company", 2)) is None
+
+
+async def test_fetch_skips_replica_values_after_invalidation(clock):
+    responses = cache.ResponseCache(max_entries=10, ttl=30)
+    calls = []
+    responses.invalidate(("company", 1))
+    clock[0] = 2
+    await responses.fetch(
+        ("company", 1), counting_loader(calls), make_request(replica_lag=5)
+    )
+    assert responses.get(("company", 1)) is None
+    await responses.fetch(("company", 1), counting_loader(calls), make_request())
+    assert responses.get(("company", 1)) is not None
+
+    responses.invalidate(("company", 1))
+    clock[0] = 8
+    await responses.fetch(
+        ("company", 1), counting_loader(calls), make_request(replica_lag=5)
+    )
+    assert responses.get(("company", 1)) is not None
@@ -0,0 +1,137 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from play import cache, compression
+
+BODY = b'{"name":"Sega"}' * 100
+
+
+def make_client(**kwargs) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(compression.CompressionMiddleware, minimum_size=500)
+
+    @app.get("/large")
+    def large():
+        return Response(BODY, media_type="application/json", headers={"ETag": '"1"'})
+
+    @app.get("/small")
+    def small():
+        return Response(b"{}", media_type="application/json")
+
+    @app.get("/image")
+    def image():
+        return Response(BODY, media_type="image/png")
+
+    @app.get("/encoded")
+    def encoded():
+        return Response(
+            gzip.compress(BODY),
+            media_type="application/json",
+            headers={"Content-Encoding": "gzip"},
+        )
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(
+            (b'{"id":%d}\n' % id for id in range(3)),
+            media_type="application/x-ndjson",
+        )
+
+    return TestClient(app, **kwargs)
+
+
+def test_negotiate_prefers_server_order():
+    assert compression.negotiate("gzip, zstd", ["zstd", "gzip"]) == "zstd"
+    assert compression.negotiate("gzip;q=0.5, zstd;q=0", ["zstd", "gzip"]) == "gzip"
+    assert compression.negotiate("*", ["zstd", "gzip"]) == "zstd"
+    assert compression.negotiate("*, zstd;q=0", ["zstd", "gzip"]) == "gzip"
+    assert compression.negotiate("identity", ["zstd", "gzip"]) is None
+    assert compression.negotiate("", ["zstd", "gzip"]) is None
+
+
+@pytest.mark.parametrize("encoding", sorted(compression.COMPRESSORS))
+def test_compress_round_trips(encoding):
+    client = make_client()
+    response = client.get("/large", headers={"Accept-Encoding": encoding})
+    assert response.headers["content-encoding"] == encoding
+    assert response.content == BODY
+
+
+def test_middleware_compresses_large_bodies():
+    client = make_client()
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["etag"] == 'W/"1"'
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.content == BODY
+
+
+def test_middleware_skips_small_and_binary_bodies():
+    client = make_client()
+    for path in ["/small", "/image"]:
+        response = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_middleware_keeps_encoded_bodies():
+    client = make_client()
+    response = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == BODY
+
+
+def test_middleware_streams_compressed_chunks():
+    client = make_client()
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == '{"id":0}\n{"id":1}\n{"id":2}\n'
+
+
+async def test_cache_compresses_entries_once(monkeypatch):
+    responses = cache.ResponseCache(max_entries=10, ttl=30)
+    calls = []
+    compress = compression.compress
+    monkeypatch.setattr(
+        compression, "compress", lambda *args: calls.append(args) or compress(*args)
+    )
+    request = Request(
+        {
+            "type": "http",
+            "headers": [(b"accept-encoding", b"gzip")],
+            "query_string": b"",
+        }
+    )
+
+    async def load():
+        return {"ETag": '"1.1"'}, lambda: BODY
+
+    for _ in range(3):
+        response = await responses.fetch(("company", 1), load, request)
+    assert len(calls) == 1
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"1.1"'
+    assert gzip.decompress(response.body) == BODY
+
+
+def test_cached_list_is_compressed(client):
+    for id in range(10):
+        client.post(
+            "/companies/",
+            json={
+                "name": f"Company {id}",
+                "country": "Japan",
+                "description": "Makes games. " * 10,
+            },
+        )
+    for _ in range(2):
+        response = client.get("/companies/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()) == 10
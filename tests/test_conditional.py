@@ -0,0 +1,32 @@
+from starlette.requests import Request
+
+from play import conditional
+
+
+def make_request(if_none_match=None, query=b""):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request(
+        {"type": "http", "method": "GET", "headers": headers, "query_string": query}
+    )
+
+
+def test_etag_is_strong_and_quoted():
+    assert conditional.etag(3, 7) == '"3.7"'
+
+
+def test_matches():
+    tag = conditional.etag(3, 7)
+    assert conditional.matches(make_request('"3.7"'), tag)
+    assert conditional.matches(make_request('"1.1", W/"3.7"'), tag)
+    assert conditional.matches(make_request("*"), tag)
+    assert not conditional.matches(make_request('"3.6"'), tag)
+    assert not conditional.matches(make_request(), tag)
+    assert not conditional.matches(None, tag)
+
+
+def test_query_digest_ignores_parameter_order():
+    first = conditional.query_digest(make_request(query=b"limit=5&specialty=Art"))
+    second = conditional.query_digest(make_request(query=b"specialty=Art&limit=5"))
+    other = conditional.query_digest(make_request(query=b"limit=6&specialty=Art"))
+    assert first == second
+    assert first != other
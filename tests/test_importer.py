@@ -0,0 +1,101 @@
+import pytest
+from fastapi import HTTPException
+
+from play import importer, schemas
+
+
+async def chunked(data: bytes, size: int = 7):
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
+
+
+def collecting_loader(batches):
+    async def load(db, batch):
+        batches.append([(line, row.name) for line, row in batch])
+        return len(batch), []
+
+    return load
+
+
+async def test_run_ndjson_reports_rejected_rows():
+    data = (
+        b'{"name": "Nintendo", "country": "Japan"}\n'
+        b"\n"
+        b"not json\n"
+        b'["Sega"]\n'
+        b'{"name": "Sega"}\n'
+        b'{"name": "Ubisoft", "country": "France"}'
+    )
+    batches = []
+    report = await importer.run(
+        None,
+        chunked(data),
+        "ndjson",
+        schemas.CompanyCreate,
+        collecting_loader(batches),
+    )
+    assert batches == [[(1, "Nintendo"), (6, "Ubisoft")]]
+    assert report["created"] == 2
+    assert report["rejected"] == 3
+    assert [error["line"] for error in report["errors"]] == [3, 4, 5]
+    assert report["errors"][2]["detail"] == "country: Field required"
+
+
+async def test_run_csv_quoted_fields_and_nulls():
+    data = (
+        "﻿name,country,founded_year,description\r\n"
+        'Nintendo,Japan,1889,"Mario, Zelda\nand ""Pokémon"""\r\n'
+        "Sega,Japan,,\r\n"
+        "Atari,USA\r\n"
+    ).encode()
+    batches = []
+    rows = []
+
+    async def load(db, batch):
+        batches.append(list(batch))
+        rows.extend(row for _, row in batch)
+        return len(batch), []
+
+    report = await importer.run(
+        None, chunked(data, 5), "csv", schemas.CompanyCreate, load
+    )
+    assert report["created"] == 2
+    assert report["errors"] == [{"line": 5, "detail": "Expected 4 fields, got 2"}]
+    assert rows[0].description == 'Mario, Zelda\nand "Pokémon"'
+    assert rows[1].founded_year is None
+    assert [line for line, _ in batches[0]] == [2, 4]
+
+
+async def test_run_loads_in_batches(monkeypatch):
+    monkeypatch.setattr(importer, "BATCH_SIZE", 2)
+    data = b"".join(
+        b'{"name": "C%d", "country": "France"}\n' % index for index in range(5)
+    )
+    batches = []
+    report = await importer.run(
+        None, chunked(data), "ndjson", schemas.CompanyCreate, collecting_loader(batches)
+    )
+    assert report["created"] == 5
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+async def test_run_rejects_overlong_line(monkeypatch):
+    monkeypatch.setattr(importer, "MAX_LINE_BYTES", 10)
+    with pytest.raises(HTTPException) as error:
+        await importer.run(
+            None,
+            chunked(b"x" * 30),
+            "ndjson",
+            schemas.CompanyCreate,
+            collecting_loader([]),
+        )
+    assert error.value.status_code == 413
+
+
+def test_import_report_caps_errors(monkeypatch):
+    monkeypatch.setattr(schemas, "IMPORT_MAX_ERRORS", 2)
+    report = importer.ImportReport()
+    for line in range(5):
+        report.reject(line, "bad")
+    assert report.rejected == 5
+    assert len(report.errors) == 2
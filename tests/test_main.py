@@ -0,0 +1,63 @@
+import httpx
+
+from play import autocomplete, cache, compression, conditional, database, main
+from play import slowqueries
+from play.main import create_app
+from play.settings import Settings
+
+
+def make_app(tmp_path):
+    return create_app(
+        Settings(
+            database_url=f"sqlite:///{tmp_path / 'play.db'}",
+            async_database_url=f"sqlite+aiosqlite:///{tmp_path / 'play.db'}",
+            autocomplete_refresh_seconds=0,
+            stats_refresh_seconds=0,
+        )
+    )
+
+
+def test_create_app_does_not_connect(tmp_path):
+    app = make_app(tmp_path)
+    assert isinstance(app.state.database, database.Database)
+    assert "async_engine" not in vars(app.state.database)
+    assert "engine" not in vars(app.state.database)
+
+
+async def test_lifespan_creates_and_disposes_engines(tmp_path):
+    app = make_app(tmp_path)
+    async with app.router.lifespan_context(app):
+        assert "async_engine" in vars(app.state.database)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://t"
+        ) as client:
+            response = await client.get("/autocomplete?prefix=a")
+        assert response.status_code == 200
+    # The synchronous engine is only for tooling.
+    assert "engine" not in vars(app.state.database)
+
+
+def test_create_app_configures_shared_state(tmp_path):
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path / 'play.db'}",
+        async_database_url=f"sqlite+aiosqlite:///{tmp_path / 'play.db'}",
+        cache_max_entries=3,
+        http_cache_max_age=60,
+        compression_encodings=("gzip",),
+        slow_query_seconds=0,
+        autocomplete_merge_threshold=7,
+    )
+    try:
+        create_app(settings)
+        assert cache.responses.max_entries == 3
+        assert conditional.headers('"1"')["Cache-Control"] == (
+            "max-age=60, must-revalidate"
+        )
+        assert compression.ENCODINGS == ["gzip"]
+        assert slowqueries.slow_queries.threshold == 0
+        assert autocomplete.names.merge_threshold == 7
+    finally:
+        main.configure(
+            Settings(database_url="sqlite://", async_database_url="sqlite://")
+        )
@@ -0,0 +1,131 @@
+import os
+
+from play import metrics
+
+
+def sample(families, name, **labels):
+    for family in families:
+        for sample_name, sample_labels, value in family.samples:
+            if sample_name == name and dict(sample_labels) == labels:
+                return value
+    return None
+
+
+def test_observe_fills_counters_and_histogram():
+    stats = metrics.RequestStats(buckets=(0.01, 0.1))
+    stats.observe("GET", "/teams/{team_id}", 200, 0.005)
+    stats.observe("GET", "/teams/{team_id}", 404, 0.05)
+    stats.observe("GET", "/teams/{team_id}", 200, 1.0)
+    families = stats.families()
+    route = {"method": "GET", "route": "/teams/{team_id}"}
+    assert sample(families, "http_requests_total", **route, status="200") == 2
+    assert sample(families, "http_requests_total", **route, status="404") == 1
+    bucket = "http_request_duration_seconds_bucket"
+    assert sample(families, bucket, **route, le="0.01") == 1
+    assert sample(families, bucket, **route, le="0.1") == 2
+    assert sample(families, bucket, **route, le="+Inf") == 3
+    assert sample(families, "http_request_duration_seconds_count", **route) == 3
+    assert sample(families, "http_request_duration_seconds_sum", **route) == 1.055
+
+
+def test_render_formats_samples():
+    family = metrics.Family(
+        "http_requests_total",
+        "counter",
+        "Completed HTTP requests.",
+        [("http_requests_total", (("route", '/a"b'),), 3)],
+    )
+    assert metrics.render([family]) == (
+        "# HELP http_requests_total Completed HTTP requests.\n"
+        "# TYPE http_requests_total counter\n"
+        'http_requests_total{route="/a\\"b"} 3\n'
+    )
+
+
+def test_merge_sums_counters_and_labels_gauges(monkeypatch):
+    monkeypatch.setattr(metrics, "_alive", lambda pid: pid != 2)
+
+    def worker(requests, in_flight):
+        return [
+            metrics.Family(
+                "http_requests_total",
+                "counter",
+                "",
+                [("http_requests_total", (), requests)],
+            ),
+            metrics.Family(
+                "http_requests_in_flight",
+                "gauge",
+                "",
+                [("http_requests_in_flight", (), in_flight)],
+            ),
+        ]
+
+    merged = metrics.merge({1: worker(3, 1), 2: worker(4, 5)})
+    assert sample(merged, "http_requests_total") == 7
+    assert sample(merged, "http_requests_in_flight", pid="1") == 1
+    assert sample(merged, "http_requests_in_flight", pid="2") is None
+
+
+def test_exposition_reads_worker_snapshots(tmp_path):
+    stats = metrics.RequestStats()
+    stats.observe("GET", "/", 200, 0.001)
+    metrics.write_snapshot(str(tmp_path), stats.families())
+    other = tmp_path / f"{os.getpid()}.json"
+    other.rename(tmp_path / "1.json")
+    snapshots = metrics.read_snapshots(str(tmp_path))
+    assert (
+        sample(
+            snapshots[1], "http_requests_total", method="GET", route="/", status="200"
+        )
+        == 1
+    )
+
+
+def counters(requests, in_flight=0):
+    stats = metrics.RequestStats()
+    for _ in range(requests):
+        stats.observe("GET", "/", 200, 0.001)
+    stats.in_flight = in_flight
+    return stats.families()
+
+
+def total(families):
+    return sample(
+        families, "http_requests_total", method="GET", route="/", status="200"
+    )
+
+
+def test_archive_exited_folds_dead_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "_alive", lambda pid: pid != 1)
+    metrics._dump(str(tmp_path / "1.json"), counters(2, in_flight=1))
+    metrics._dump(str(tmp_path / "2.json"), counters(3))
+    metrics.archive_exited(str(tmp_path))
+    metrics.archive_exited(str(tmp_path))
+    assert sorted(metrics.read_snapshots(str(tmp_path))) == [2]
+    exited = metrics.read_exited(str(tmp_path))
+    assert total(exited) == 2
+    assert sample(exited, "http_requests_in_flight") is None
+    merged = metrics.merge(metrics.read_snapshots(str(tmp_path)), exited)
+    assert total(merged) == 5
+
+
+def test_prepare_archives_snapshot_of_reused_pid(tmp_path):
+    directory = str(tmp_path)
+    metrics.prepare(directory)
+    metrics.write_snapshot(directory, counters(4))
+    metrics.prepare(directory)
+    assert metrics.read_snapshots(directory) == {}
+    metrics.write_snapshot(directory, counters(1))
+    snapshots = metrics.read_snapshots(directory)
+    assert total(metrics.merge(snapshots, metrics.read_exited(directory))) == 5
+
+
+def test_prepare_empties_directory_of_previous_server(tmp_path):
+    (tmp_path / metrics.SERVER_FILE).write_text("1")
+    metrics._dump(str(tmp_path / "1.json"), counters(2))
+    metrics._dump(str(tmp_path / metrics.ARCHIVE_FILE), counters(3))
+    metrics.prepare(str(tmp_path))
+    assert metrics.read_snapshots(str(tmp_path)) == {}
+    assert metrics.read_exited(str(tmp_path)) == []
+    assert (tmp_path / metrics.SERVER_FILE).read_text() == str(os.getppid())
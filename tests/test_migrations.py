@@ -0,0 +1,46 @@
+import pathlib
+
+import alembic.command
+import alembic.config
+from fastapi.testclient import TestClient
+
+from play.main import create_app
+from play.settings import Settings
+
+ALEMBIC_INI = pathlib.Path(__file__).parents[1] / "alembic.ini"
+
+
+def test_seeded_rows_have_the_response_shape(tmp_path, monkeypatch):
+    path = tmp_path / "migrated.db"
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{path}")
+    alembic.command.upgrade(alembic.config.Config(ALEMBIC_INI), "head")
+    app = create_app(
+        Settings(
+            database_url=f"sqlite:///{path}",
+            async_database_url=f"sqlite+aiosqlite:///{path}",
+            autocomplete_refresh_seconds=0,
+            stats_refresh_seconds=0,
+            warmup_requests=False,
+        )
+    )
+
+    with TestClient(app) as client:
+        response = client.get("/companies/", params={"limit": 1})
+        search = client.get("/search", params={"q": "nintendo"})
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            "id": 1,
+            "name": "Nintendo",
+            "country": "Japan",
+            "founded_year": 1889,
+            "website": "https://www.nintendo.com/",
+            "description": (
+                "Japanese multinational video game company known for iconic "
+                "franchises like Mario, Zelda, and Pokémon."
+            ),
+        }
+    ]
+    assert search.status_code == 200
+    assert [result["name"] for result in search.json()][:1] == ["Nintendo"]
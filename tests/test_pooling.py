@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from play import pooling
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=pooling.InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    yield engine
+    engine.dispose()
+
+
+def test_snapshot_counts_checkouts(engine):
+    with engine.connect():
+        stats = pooling.snapshot(engine.pool)
+        assert stats["checked_out"] == 1
+        assert stats["checkouts"] == 1
+    stats = pooling.snapshot(engine.pool)
+    assert stats["checked_out"] == 0
+    assert stats["checked_in"] == 1
+    assert stats["wait_seconds_histogram"]["+Inf"] == 1
+
+
+def test_snapshot_counts_timeouts(engine):
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    stats = pooling.snapshot(engine.pool)
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds_sum"] >= 0.01
+
+
+def test_histogram_is_cumulative():
+    stats = pooling.PoolStats(buckets=(0.1, 1.0))
+    stats.observe(0.05)
+    stats.observe(0.5)
+    stats.observe(5.0)
+    assert stats.histogram() == {"0.1": 1, "1.0": 2, "+Inf": 3}
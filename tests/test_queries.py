@@ -0,0 +1,24 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from play import queries
+
+
+def test_track_counts_and_times_statements():
+    engine = create_engine("sqlite://")
+    with queries.track() as stats, engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("SELECT 2"))
+    assert stats.count == 2
+    assert stats.seconds > 0
+
+
+def test_failed_statements_leave_nothing_on_the_connection():
+    engine = create_engine("sqlite://")
+    with queries.track() as stats, engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(exc.OperationalError):
+                connection.execute(text("SELECT * FROM missing"))
+        connection.execute(text("SELECT 1"))
+        assert "query_start" not in connection.info
+    assert stats.count == 1
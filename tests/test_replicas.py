@@ -0,0 +1,107 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+
+from play import database, replicas
+from play.settings import Settings
+
+
+def make_engine(path):
+    return create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=pool.NullPool)
+
+
+def make_request(cookie=None, db=None):
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    app = FastAPI()
+    app.state.database = db
+    return Request({"type": "http", "method": "GET", "headers": headers, "app": app})
+
+
+def test_choose_round_robin(tmp_path):
+    first, second = make_engine(tmp_path / "a.db"), make_engine(tmp_path / "b.db")
+    router = replicas.ReplicaRouter([first, second])
+    assert [router.choose() for _ in range(4)] == [first, second, first, second]
+
+
+async def test_check_marks_unhealthy_replica(tmp_path):
+    broken = make_engine(tmp_path / "missing" / "replica.db")
+    healthy = make_engine(tmp_path / "replica.db")
+    router = replicas.ReplicaRouter([broken, healthy], health_interval=60)
+    assert await router.check() == 1
+    assert router.replicas[0].healthy is False
+    assert router.choose() is healthy
+    assert router.choose() is healthy
+
+
+async def test_choose_does_not_probe(tmp_path, monkeypatch):
+    router = replicas.ReplicaRouter([make_engine(tmp_path / "missing" / "x.db")])
+
+    async def fail(engine):
+        raise AssertionError("probed on the request path")
+
+    monkeypatch.setattr(router, "_ping", fail)
+    assert router.choose() is router.replicas[0].engine
+
+
+async def test_monitor_probes_in_the_background(tmp_path):
+    router = replicas.ReplicaRouter(
+        [make_engine(tmp_path / "missing" / "x.db")], health_interval=60
+    )
+    task = asyncio.create_task(router.monitor())
+    for _ in range(100):
+        if not router.replicas[0].healthy:
+            break
+        await asyncio.sleep(0.01)
+    task.cancel()
+    assert router.choose() is None
+    assert replicas.ReplicaRouter([]).choose() is None
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    return database.Database(
+        Settings(
+            database_url=f"sqlite:///{tmp_path / 'primary.db'}",
+            async_database_url=f"sqlite+aiosqlite:///{tmp_path / 'primary.db'}",
+            async_replica_urls=(f"sqlite+aiosqlite:///{tmp_path / 'replica.db'}",),
+        )
+    )
+
+
+async def test_get_read_db_uses_replica(replicated):
+    request = make_request(db=replicated)
+    async for session in database.get_read_db(request):
+        assert session.bind is replicated.replica_router.replicas[0].engine
+    assert request.state.replica_lag == replicated.settings.replica_sticky_seconds
+    await replicated.dispose()
+
+
+async def test_get_read_db_sticky_client_uses_primary(replicated):
+    request = make_request("play_primary=1", db=replicated)
+    async for session in database.get_read_db(request):
+        assert session.bind is replicated.async_engine
+    await replicated.dispose()
+
+
+def test_read_your_writes_middleware_sets_cookie_on_writes():
+    app = FastAPI()
+    app.add_middleware(replicas.ReadYourWritesMiddleware, sticky_seconds=5)
+
+    @app.get("/")
+    async def read():
+        return {}
+
+    @app.post("/")
+    async def write():
+        return {}
+
+    client = TestClient(app)
+    assert "set-cookie" not in client.get("/").headers
+    cookie = client.post("/").headers["set-cookie"]
+    assert cookie.startswith("play_primary=1")
+    assert "Max-Age=5" in cookie
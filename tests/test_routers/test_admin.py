@@ -0,0 +1,31 @@
+from play import slowqueries
+
+
+def test_get_pool_stats(client):
+    response = client.get("/admin/pool")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["size"] == 5
+    assert data["timeouts"] == 0
+    assert "+Inf" in data["wait_seconds_histogram"]
+
+
+def test_get_cache_stats(client):
+    client.get("/companies/")
+    client.get("/companies/")
+    response = client.get("/admin/cache")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["size"] == 1
+    assert data["hits"] == 1
+    assert data["misses"] == 1
+
+
+def test_get_slow_queries(client, monkeypatch):
+    monkeypatch.setattr(slowqueries.slow_queries, "threshold", 1e-9)
+    client.get("/companies/1")
+    response = client.get("/admin/slow-queries")
+    assert response.status_code == 200
+    (entry,) = response.json()
+    assert entry["caller"] == "play.services.companies.get_company"
+    assert entry["parameters"] == ["int"]
@@ -0,0 +1,30 @@
+def test_autocomplete_follows_writes(client):
+    company = client.post(
+        "/companies/", json={"name": "Remedy", "country": "Finland"}
+    ).json()
+    client.post(
+        "/teams/",
+        json={
+            "name": "Render Team",
+            "specialty": "Graphics",
+            "company_id": company["id"],
+        },
+    )
+
+    response = client.get("/autocomplete", params={"prefix": "re"})
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["Remedy", "Render Team"]
+
+    client.patch(f"/companies/{company['id']}", json={"name": "Remedy Entertainment"})
+    response = client.get("/autocomplete", params={"prefix": "re", "kind": "company"})
+    assert response.json() == [
+        {"kind": "company", "id": company["id"], "name": "Remedy Entertainment"}
+    ]
+
+    client.delete(f"/companies/{company['id']}")
+    assert client.get("/autocomplete", params={"prefix": "re"}).json() == []
+
+
+def test_autocomplete_validates_prefix(client):
+    assert client.get("/autocomplete", params={"prefix": ""}).status_code == 422
+    assert client.get("/autocomplete").status_code == 422
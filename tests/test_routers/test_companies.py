@@ -1,4 +1,8 @@
-from play import models
+import csv
+import io
+import json
+
+from play import models, pagination
 
 
 def make_company(db, name="Nintendo", country="Japan", founded_year=None):
@@ -15,10 +19,11 @@ def test_list_companies_empty(client):
     assert response.json() == []
 
 
-def test_list_companies(client, db):
+def test_list_companies(client, db, max_queries):
     make_company(db, name="Nintendo")
     make_company(db, name="Ubisoft", country="France")
-    response = client.get("/companies/")
+    with max_queries(1):
+        response = client.get("/companies/")
     assert response.status_code == 200
     assert len(response.json()) == 2
 
@@ -82,18 +87,295 @@ def test_delete_company_not_found(client):
     assert response.status_code == 404
 
 
-def test_get_company_teams(client, db):
+def test_get_company_teams(client, db, max_queries):
     company = make_company(db, name="FromSoftware")
-    team = models.Team(
-        name="Soulsborne Team", specialty="Development", company_id=company.id
-    )
-    db.add(team)
+    for name in ["Soulsborne Team", "Armored Core Team"]:
+        db.add(models.Team(name=name, specialty="Development", company_id=company.id))
     db.commit()
-    response = client.get(f"/companies/{company.id}/teams")
+    url = f"/companies/{company.id}/teams"
+    with max_queries(2):
+        response = client.get(url)
     assert response.status_code == 200
-    assert len(response.json()["teams"]) == 1
+    assert len(response.json()["teams"]) == 2
 
 
 def test_get_company_teams_not_found(client):
     response = client.get("/companies/9999/teams")
     assert response.status_code == 404
+
+
+def test_list_companies_cursor_pagination(client, db):
+    for name in ["A", "B", "C"]:
+        make_company(db, name=name)
+    response = client.get("/companies/", params={"limit": 2})
+    assert [c["name"] for c in response.json()] == ["A", "B"]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/companies/", params={"limit": 2, "after": cursor})
+    assert [c["name"] for c in response.json()] == ["C"]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_list_companies_invalid_cursor(client):
+    response = client.get("/companies/", params={"after": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_list_companies_malformed_name_cursor(client):
+    cursor = pagination.encode_cursor("name", [["Sega"], 1])
+    response = client.get("/companies/", params={"sort": "name", "after": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_list_companies_invalid_sort(client):
+    response = client.get("/companies/", params={"sort": "website"})
+    assert response.status_code == 422
+
+
+def test_get_company_teams_filtered_and_paginated(client, db):
+    company = make_company(db, name="Nintendo")
+    for name, specialty in [("EPD 1", "Development"), ("NST", "Studio")]:
+        db.add(models.Team(name=name, specialty=specialty, company_id=company.id))
+    db.add(models.Team(name="EPD 3", specialty="Development", company_id=company.id))
+    db.commit()
+
+    response = client.get(
+        f"/companies/{company.id}/teams", params={"specialty": "Development"}
+    )
+    assert [t["name"] for t in response.json()["teams"]] == ["EPD 1", "EPD 3"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get(f"/companies/{company.id}/teams", params={"limit": 2})
+    assert [t["name"] for t in response.json()["teams"]] == ["EPD 1", "NST"]
+    response = client.get(
+        f"/companies/{company.id}/teams",
+        params={"limit": 2, "after": response.headers["X-Next-Cursor"]},
+    )
+    assert [t["name"] for t in response.json()["teams"]] == ["EPD 3"]
+
+
+def test_bulk_create_companies(client, db):
+    make_company(db, name="Nintendo")
+    payload = [
+        {"name": "Nintendo", "country": "Japan"},
+        {"name": "Sega", "country": "Japan", "website": "https://www.sega.com"},
+    ]
+    response = client.post("/companies/bulk", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert data["results"][0] == {"index": 0, "status": "conflict", "id": None}
+    assert client.get(f"/companies/{data['results'][1]['id']}").json()["name"] == (
+        "Sega"
+    )
+
+
+def test_bulk_create_companies_invalid_row(client):
+    payload = [{"name": "Sega", "country": "Japan"}, {"name": "Atari"}]
+    response = client.post("/companies/bulk", json=payload)
+    assert response.status_code == 422
+    assert client.get("/companies/").json() == []
+
+
+def test_bulk_create_companies_empty(client):
+    response = client.post("/companies/bulk", json=[])
+    assert response.status_code == 422
+
+
+def test_export_companies_ndjson(client, db):
+    make_company(db, name="Nintendo")
+    make_company(db, name="Ubisoft", country="France")
+    response = client.get("/companies/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["name"] for row in rows] == ["Nintendo", "Ubisoft"]
+
+
+def test_export_companies_csv(client, db):
+    make_company(db, name="Ubisoft", country="France")
+    response = client.get("/companies/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="companies.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert rows[0]["country"] == "France"
+
+
+def test_export_companies_invalid_format(client):
+    response = client.get("/companies/export", params={"format": "xml"})
+    assert response.status_code == 422
+
+
+def test_import_companies(client, db):
+    make_company(db, name="Nintendo")
+    body = "name,country,founded_year\nNintendo,Japan,1889\nUbisoft,France,1986\n"
+    response = client.post(
+        "/companies/import", params={"format": "csv"}, content=body.encode()
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "created": 1,
+        "rejected": 1,
+        "errors": [{"line": 2, "detail": "Company already exists"}],
+    }
+    names = [row["name"] for row in client.get("/companies/").json()]
+    assert names == ["Nintendo", "Ubisoft"]
+
+
+def test_get_company_is_cached_until_updated(client, db):
+    company = make_company(db, name="Ubisoft", country="France")
+    assert client.get(f"/companies/{company.id}").json()["country"] == "France"
+    company.country = "Canada"
+    db.commit()
+    assert client.get(f"/companies/{company.id}").json()["country"] == "France"
+
+    client.patch(f"/companies/{company.id}", json={"founded_year": 1986})
+    assert client.get(f"/companies/{company.id}").json()["country"] == "Canada"
+
+
+def test_list_companies_cache_invalidated_by_create(client):
+    assert client.get("/companies/").json() == []
+    client.post("/companies/", json={"name": "Sega", "country": "Japan"})
+    assert [row["name"] for row in client.get("/companies/").json()] == ["Sega"]
+    assert client.get("/admin/cache").json()["invalidations"] == 1
+
+
+def test_delete_company_invalidates_its_teams(client, db):
+    company = make_company(db)
+    team = models.Team(name="EPD", specialty="Development", company_id=company.id)
+    db.add(team)
+    db.commit()
+    assert client.get(f"/teams/{team.id}").status_code == 200
+    assert len(client.get("/teams/").json()) == 1
+
+    client.delete(f"/companies/{company.id}")
+    assert client.get(f"/teams/{team.id}").status_code == 404
+    assert client.get("/teams/").json() == []
+
+
+def test_get_company_conditional(client, db):
+    company = make_company(db, name="Sega")
+    response = client.get(f"/companies/{company.id}")
+    etag = response.headers["etag"]
+    assert etag == f'"{company.id}.1"'
+    assert response.headers["cache-control"] == "no-cache"
+
+    response = client.get(f"/companies/{company.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    client.patch(f"/companies/{company.id}", json={"founded_year": 1960})
+    response = client.get(f"/companies/{company.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{company.id}.2"'
+
+
+def test_get_company_teams_conditional(client, db):
+    company = make_company(db, name="Sega")
+    url = f"/companies/{company.id}/teams"
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(url, params={"limit": 1}).headers["etag"] != etag
+
+    payload = {"name": "Sonic Team", "specialty": "Dev", "company_id": company.id}
+    client.post("/teams/", json=payload)
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["teams"][0]["name"] == "Sonic Team"
+
+
+def test_list_companies_filtered(client, db):
+    make_company(db, name="Nintendo", founded_year=1889)
+    make_company(db, name="Ubisoft", country="France", founded_year=1986)
+    make_company(db, name="Sega", founded_year=1960)
+    response = client.get(
+        "/companies/", params={"country": "Japan", "founded_year_max": 1970}
+    )
+    assert [row["name"] for row in response.json()] == ["Nintendo", "Sega"]
+    response = client.get("/companies/", params={"country": "France"})
+    assert [row["name"] for row in response.json()] == ["Ubisoft"]
+
+
+def test_get_company_with_aggregates(client):
+    company = client.post(
+        "/companies/", json={"name": "Sega", "country": "Japan"}
+    ).json()
+    for size in (10, 20):
+        client.post(
+            "/teams/",
+            json={
+                "name": f"Team {size}",
+                "specialty": "Art",
+                "size": size,
+                "company_id": company["id"],
+            },
+        )
+
+    plain = client.get(f"/companies/{company['id']}")
+    assert "team_count" not in plain.json()
+
+    response = client.get(f"/companies/{company['id']}", params={"aggregates": True})
+    assert response.json()["team_count"] == 2
+    assert response.json()["total_headcount"] == 30
+    assert response.headers["ETag"] != plain.headers["ETag"]
+
+    listed = client.get("/companies/", params={"aggregates": True}).json()
+    assert [(item["team_count"], item["total_headcount"]) for item in listed] == [
+        (2, 30)
+    ]
+
+
+def test_companies_sparse_fieldsets(client, db):
+    company = make_company(db, name="Sega", founded_year=1960)
+    response = client.get("/companies/", params={"fields": "name, id", "sort": "name"})
+    assert response.json() == [{"id": company.id, "name": "Sega"}]
+
+    make_company(db, name="Atari")
+    params = {"fields": "id", "sort": "name", "limit": 1}
+    first = client.get("/companies/", params=params)
+    after = first.headers["X-Next-Cursor"]
+    second = client.get("/companies/", params={**params, "after": after})
+    assert second.json() == [{"id": company.id}]
+
+    full = client.get(f"/companies/{company.id}")
+    sparse = client.get(f"/companies/{company.id}", params={"fields": "founded_year"})
+    assert sparse.json() == {"founded_year": 1960}
+    assert sparse.headers["ETag"] != full.headers["ETag"]
+
+    response = client.get(
+        f"/companies/{company.id}",
+        params={"fields": "team_count", "aggregates": True},
+    )
+    assert response.json() == {"team_count": 0}
+
+
+def test_companies_sparse_fieldsets_invalid(client, db):
+    company = make_company(db)
+    assert client.get("/companies/", params={"fields": "secret"}).status_code == 400
+    response = client.get(f"/companies/{company.id}", params={"fields": "team_count"})
+    assert response.status_code == 400
+    assert client.get("/companies/", params={"fields": ","}).status_code == 400
+
+
+def test_sparse_company_is_invalidated_by_writes(client, db):
+    company = make_company(db)
+    params = {"fields": "name"}
+    assert client.get(f"/companies/{company.id}", params=params).json() == {
+        "name": "Nintendo"
+    }
+    client.patch(f"/companies/{company.id}", json={"name": "Nintendo EPD"})
+    assert client.get(f"/companies/{company.id}", params=params).json() == {
+        "name": "Nintendo EPD"
+    }
+
+
+def test_server_timing_counts_queries(client, db):
+    company = make_company(db)
+    response = client.get(f"/companies/{company.id}")
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    assert timing.endswith('desc="1 queries"')
+    response = client.get(f"/companies/{company.id}")
+    assert response.headers["server-timing"].endswith('desc="0 queries"')
@@ -0,0 +1,41 @@
+import dataclasses
+import os
+
+from play import metrics
+
+
+def test_get_metrics(client):
+    client.get("/companies/1")
+    client.get("/nowhere")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    route = 'method="GET",route="/companies/{company_id}"'
+    assert f'http_requests_total{{{route},status="404"}} 1' in text
+    assert f"http_request_duration_seconds_count{{{route}}} 1" in text
+    assert (
+        'http_requests_total{method="GET",route="<unmatched>",status="404"} 1' in text
+    )
+    assert "http_requests_in_flight 1" in text
+    assert "threadpool_threads_limit 40" in text
+    assert 'db_pool_size{pool="primary"} 5' in text
+
+
+def test_get_metrics_of_every_worker(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "_alive", lambda pid: False)
+    stats = metrics.RequestStats()
+    stats.observe("GET", "/teams/", 200, 0.001)
+    metrics.write_snapshot(str(tmp_path), stats.families())
+    (tmp_path / f"{os.getpid()}.json").rename(tmp_path / "1.json")
+    monkeypatch.setattr(
+        client.app.state,
+        "settings",
+        dataclasses.replace(
+            client.app.state.settings, metrics_multiprocess_dir=str(tmp_path)
+        ),
+    )
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    route = 'method="GET",route="/teams/"'
+    assert f'http_requests_total{{{route},status="200"}} 1' in response.text
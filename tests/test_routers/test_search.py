@@ -0,0 +1,85 @@
+from play import models
+
+
+def seed(db):
+    company = models.Company(
+        name="FromSoftware",
+        country="Japan",
+        description="Developer of Dark Souls and Elden Ring.",
+    )
+    db.add(company)
+    db.commit()
+    db.add_all(
+        [
+            models.Team(
+                name="Souls Team",
+                specialty="Development",
+                description="Builds dark fantasy action games.",
+                company_id=company.id,
+            ),
+            models.Team(
+                name="Audio",
+                specialty="Sound",
+                description="Composes music.",
+                company_id=company.id,
+            ),
+        ]
+    )
+    db.commit()
+    return company
+
+
+def test_search_ranks_names_first(client, db):
+    seed(db)
+    response = client.get("/search", params={"q": "souls"})
+    assert response.status_code == 200
+    data = response.json()
+    assert [(row["kind"], row["name"]) for row in data] == [
+        ("team", "Souls Team"),
+        ("company", "FromSoftware"),
+    ]
+    assert "<mark>Souls</mark>" in data[1]["snippet"]
+    assert data[0]["rank"] > data[1]["rank"]
+
+
+def test_search_matches_stems_and_paginates(client, db):
+    seed(db)
+    response = client.get("/search", params={"q": "build", "limit": 1})
+    assert [row["name"] for row in response.json()] == ["Souls Team"]
+    response = client.get("/search", params={"q": "dark", "skip": 1, "limit": 1})
+    assert len(response.json()) == 1
+
+
+def test_search_follows_writes(client, db):
+    company = seed(db)
+    client.patch(f"/companies/{company.id}", json={"description": "Ring maker."})
+    assert client.get("/search", params={"q": "elden"}).json() == []
+    client.delete(f"/companies/{company.id}")
+    assert client.get("/search", params={"q": "souls"}).json() == []
+
+
+def test_search_treats_operators_as_text(client, db):
+    seed(db)
+    response = client.get("/search", params={"q": 'souls" OR NEAR('})
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_search_requires_query(client):
+    assert client.get("/search").status_code == 422
+
+
+def test_search_escapes_snippets(client, db):
+    db.add(
+        models.Company(
+            name="Evil Corp",
+            country="Nowhere",
+            description='<script>alert("souls")</script> & more',
+        )
+    )
+    db.commit()
+    response = client.get("/search", params={"q": "alert"})
+    snippet = response.json()[0]["snippet"]
+    assert "<script>" not in snippet
+    assert "&lt;script&gt;" in snippet
+    assert "<mark>alert</mark>" in snippet
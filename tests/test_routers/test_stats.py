@@ -0,0 +1,33 @@
+import dataclasses
+
+from play import models
+
+
+def test_get_company_stats(client, db):
+    db.add(models.Company(name="Sega", country="Japan", founded_year=1960))
+    db.commit()
+    response = client.get("/stats/companies", params={"group_by": "country"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["group_by"] == "country"
+    assert data["refreshed_at"]
+    assert [group["key"] for group in data["groups"]] == ["Japan"]
+
+
+def test_get_team_stats_rejects_unknown_grouping(client):
+    response = client.get("/stats/teams", params={"group_by": "name"})
+    assert response.status_code == 422
+    response = client.get("/stats/teams", params={"group_by": "company_id"})
+    assert response.status_code == 200
+    assert response.json()["groups"] == []
+
+
+def test_stats_follow_the_application_settings(client, db, monkeypatch):
+    settings = client.app.state.settings
+    monkeypatch.setattr(
+        client.app.state,
+        "settings",
+        dataclasses.replace(settings, stats_refresh_seconds=5),
+    )
+    response = client.get("/stats/teams", params={"group_by": "specialty"})
+    assert response.json()["max_staleness"] == 5
@@ -31,10 +31,11 @@ def test_list_teams_empty(client):
     assert response.json() == []
 
 
-def test_list_teams(client, db, company):
+def test_list_teams(client, db, company, max_queries):
     make_team(db, company.id, name="EPD Group No. 1")
     make_team(db, company.id, name="EPD Group No. 3")
-    response = client.get("/teams/")
+    with max_queries(1):
+        response = client.get("/teams/")
     assert response.status_code == 200
     assert len(response.json()) == 2
 
@@ -107,3 +108,93 @@ def test_delete_team(client, db, company):
 def test_delete_team_not_found(client):
     response = client.delete("/teams/9999")
     assert response.status_code == 404
+
+
+def test_list_teams_cursor_pagination(client, db, company):
+    for name in ["C", "A", "B"]:
+        make_team(db, company.id, name=name)
+    response = client.get("/teams/", params={"limit": 2, "sort": "name"})
+    assert [t["name"] for t in response.json()] == ["A", "B"]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(
+        "/teams/", params={"limit": 2, "sort": "name", "after": cursor}
+    )
+    assert [t["name"] for t in response.json()] == ["C"]
+
+
+def test_list_teams_skip_with_after(client, db, company):
+    make_team(db, company.id)
+    response = client.get("/teams/", params={"limit": 1})
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/teams/", params={"skip": 1, "after": cursor})
+    assert response.status_code == 400
+
+
+def test_bulk_create_teams(client, company):
+    payload = [
+        {"name": "NST", "specialty": "Studio", "company_id": company.id},
+        {"name": "Ghost", "specialty": "Studio", "company_id": 9999},
+    ]
+    response = client.post("/teams/bulk", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert data["failed"] == 1
+    assert data["results"][1]["status"] == "company_not_found"
+
+
+def test_export_teams(client, db, company):
+    make_team(db, company.id, name="EPD Group No. 1")
+    response = client.get("/teams/export", params={"format": "csv"})
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0] == "id,name,specialty,size,description,company_id"
+    assert lines[1].startswith("1,EPD Group No. 1,Development,")
+
+
+def test_import_teams(client, company):
+    body = (
+        b'{"name": "NST", "specialty": "Studio", "company_name": "Nintendo"}\n'
+        b'{"name": "EAD", "specialty": "Studio"}\n'
+    )
+    response = client.post("/teams/import", content=body)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert data["errors"][0]["line"] == 2
+    assert client.get("/teams/").json()[0]["company_id"] == company.id
+
+
+def test_get_team_conditional(client, db, company):
+    team = make_team(db, company.id)
+    etag = client.get(f"/teams/{team.id}").headers["etag"]
+    response = client.get(f"/teams/{team.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.patch(f"/teams/{team.id}", json={"size": 12})
+    response = client.get(f"/teams/{team.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["size"] == 12
+
+
+def test_list_teams_filtered_and_sorted(client, db, company):
+    other = make_company(db, name="Sega")
+    make_team(db, company.id, name="EPD", specialty="Development")
+    make_team(db, company.id, name="Audio", specialty="Sound")
+    make_team(db, other.id, name="AM2", specialty="Development")
+    response = client.get(
+        "/teams/",
+        params={"specialty": "Development", "sort": "name"},
+    )
+    assert [row["name"] for row in response.json()] == ["AM2", "EPD"]
+    response = client.get("/teams/", params={"company_id": company.id})
+    assert [row["name"] for row in response.json()] == ["EPD", "Audio"]
+
+
+def test_teams_sparse_fieldsets(client, db, company):
+    team = make_team(db, company.id)
+    response = client.get("/teams/", params={"fields": "id,specialty"})
+    assert response.json() == [{"id": team.id, "specialty": "Development"}]
+    response = client.get(f"/teams/{team.id}", params={"fields": "name,company_id"})
+    assert response.json() == {"name": "Mario Team", "company_id": company.id}
+    assert client.get("/teams/", params={"fields": "version"}).status_code == 400
@@ -0,0 +1,128 @@
+import collections
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from play import models, seed
+
+OPTIONS = seed.Options(companies=50, teams=400, seed=7, batch_size=64, countries=40)
+
+
+@pytest.fixture
+def url(tmp_path):
+    return f"sqlite:///{tmp_path / 'seed.db'}"
+
+
+def rows(url, model):
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            return connection.execute(select(model).order_by(model.id)).all()
+    finally:
+        engine.dispose()
+
+
+def test_generation_is_deterministic_per_batch():
+    assert seed.generate_teams(OPTIONS, 3) == seed.generate_teams(OPTIONS, 3)
+    assert seed.generate_teams(OPTIONS, 3) != seed.generate_teams(OPTIONS, 4)
+    other = OPTIONS._replace(seed=8)
+    assert seed.generate_companies(OPTIONS, 0) != seed.generate_companies(other, 0)
+
+
+def test_generation_follows_distributions():
+    options = OPTIONS._replace(companies=1000, teams=20_000, batch_size=20_000)
+    teams = seed.generate_teams(options, 0)
+    per_company = collections.Counter(team[-1] for team in teams)
+    # With a skew of 3, the tenth of companies with the lowest identifiers
+    # own close to half of the teams.
+    assert sum(per_company[id] for id in range(1, 101)) > len(teams) * 0.4
+    assert all(1 <= company_id <= 1000 for company_id in per_company)
+
+    companies = seed.generate_companies(options, 0)
+    countries = {company[2] for company in companies}
+    assert 10 < len(countries) <= 40
+    assert "Country 40" in seed._country_names(40)
+    descriptions = [company[5] for company in companies]
+    assert 0.1 < descriptions.count(None) / len(descriptions) < 0.3
+
+
+def test_run_loads_rows_and_aggregates(url):
+    loaded = seed.run(url, OPTIONS)
+
+    assert loaded == {"companies": 50, "teams": 400}
+    companies = rows(url, models.Company)
+    teams = rows(url, models.Team)
+    assert [company.id for company in companies] == list(range(1, 51))
+    assert len(teams) == 400
+    for company in companies:
+        owned = [team for team in teams if team.company_id == company.id]
+        assert company.team_count == len(owned)
+        assert company.total_headcount == sum(team.size or 0 for team in owned)
+
+
+def test_run_resumes_interrupted_runs(url, tmp_path):
+    seed.run(url, OPTIONS)
+    engine = create_engine(url)
+    try:
+        with engine.begin() as connection:
+            # As if the run had stopped after the fourth batch of teams.
+            connection.execute(
+                seed.seed_batches.delete().where(
+                    (seed.seed_batches.c.kind == "teams")
+                    & (seed.seed_batches.c.batch >= 4)
+                )
+            )
+            connection.execute(
+                models.Team.__table__.delete().where(models.Team.id > 4 * 64)
+            )
+    finally:
+        engine.dispose()
+
+    loaded = seed.run(url, OPTIONS)
+
+    assert loaded == {"companies": 0, "teams": 400 - 4 * 64}
+    assert seed.run(url, OPTIONS) == {"companies": 0, "teams": 0}
+    other = f"sqlite:///{tmp_path / 'other.db'}"
+    seed.run(other, OPTIONS)
+    assert rows(url, models.Team) == rows(other, models.Team)
+    assert rows(url, models.Company) == rows(other, models.Company)
+
+
+def test_run_refuses_other_options(url):
+    seed.run(url, OPTIONS)
+
+    with pytest.raises(SystemExit, match="other options"):
+        seed.run(url, OPTIONS._replace(seed=8))
+
+
+def test_run_starts_identifiers_after_existing_rows(url):
+    engine = create_engine(url)
+    try:
+        seed.prepare_schema(engine)
+        with engine.begin() as connection:
+            connection.execute(
+                models.Company.__table__.insert(),
+                [
+                    {"id": 1, "name": "Nintendo", "country": "Japan"},
+                    {"id": 2, "name": "Sega", "country": "Japan"},
+                ],
+            )
+            connection.execute(
+                models.Team.__table__.insert(),
+                [{"id": 1, "name": "EPD", "specialty": "Gameplay", "company_id": 1}],
+            )
+    finally:
+        engine.dispose()
+
+    assert seed.run(url, OPTIONS) == {"companies": 50, "teams": 400}
+    companies = rows(url, models.Company)
+    teams = rows(url, models.Team)
+    assert [company.id for company in companies] == list(range(1, 53))
+    assert [team.id for team in teams] == list(range(1, 402))
+    assert {team.company_id for team in teams[1:]} <= set(range(3, 53))
+    # A resumed run generates the same identifiers.
+    engine = create_engine(url)
+    try:
+        assert seed.reserve_offsets(engine) == {"companies": 2, "teams": 1}
+    finally:
+        engine.dispose()
@@ -0,0 +1,75 @@
+import json
+
+import pydantic
+
+from play import models, schemas, serialization
+
+
+def company(id=1, website="https://www.sega.com/"):
+    return models.Company(
+        id=id,
+        name="Sega",
+        country="Japan",
+        founded_year=1960,
+        website=website,
+        description=None,
+        version=1,
+        team_count=0,
+        total_headcount=0,
+    )
+
+
+def test_dump_matches_validated_output():
+    rows = [company(1), company(2, website=None)]
+    adapter = pydantic.TypeAdapter(list[schemas.CompanyResponse])
+    expected = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    assert json.loads(serialization.dump(schemas.CompanyResponse, rows)) == json.loads(
+        expected
+    )
+
+
+def test_dump_does_not_validate():
+    data = json.loads(serialization.dump(schemas.CompanyResponse, company(website="x")))
+    assert data["website"] == "x"
+
+
+def test_dump_restricts_fields():
+    assert (
+        serialization.dump(schemas.CompanyResponse, company(), ("id",)) == b'{"id":1}'
+    )
+    assert json.loads(
+        serialization.dump(schemas.CompanyResponse, [company()], ("id", "name"))
+    ) == [{"id": 1, "name": "Sega"}]
+
+
+def test_dump_nested_teams():
+    row = company()
+    row.teams = [
+        models.Team(
+            id=3,
+            name="AM2",
+            specialty="Arcade",
+            size=None,
+            description=None,
+            company_id=1,
+        )
+    ]
+    data = json.loads(serialization.dump(schemas.CompanyWithTeams, row))
+    assert data["teams"] == [
+        {
+            "name": "AM2",
+            "specialty": "Arcade",
+            "size": None,
+            "description": None,
+            "id": 3,
+            "company_id": 1,
+        }
+    ]
+
+
+def test_dump_reads_attributes_missing_from_instance_state():
+    row = models.Company(id=1, name="Sega")
+    assert (
+        serialization.dump(schemas.CompanyResponse, row, ("id", "description"))
+        == b'{"description":null,"id":1}'
+    )
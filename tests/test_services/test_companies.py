@@ -1,7 +1,10 @@
+import json
+
 import pytest
+from sqlalchemy import inspect
 from fastapi import HTTPException
 
-from play import models, schemas
+from play import export, models, pagination, schemas
 from play.services import companies
 
 
@@ -13,78 +16,243 @@ def make_company(db, name="Nintendo", country="Japan"):
     return company
 
 
-def test_list_companies_empty(db):
-    assert companies.list_companies(db) == []
+async def test_list_companies_empty(async_db):
+    assert await companies.list_companies(async_db) == []
 
 
-def test_list_companies_returns_all(db):
+async def test_list_companies_returns_all(db, async_db):
     make_company(db, name="Nintendo")
     make_company(db, name="Sega")
-    result = companies.list_companies(db)
+    result = await companies.list_companies(async_db)
     assert len(result) == 2
 
 
-def test_list_companies_skip_and_limit(db):
+async def test_list_companies_skip_and_limit(db, async_db):
     for name in ["A", "B", "C"]:
         make_company(db, name=name)
-    result = companies.list_companies(db, skip=1, limit=1)
+    result = await companies.list_companies(async_db, skip=1, limit=1)
     assert len(result) == 1
     assert result[0].name == "B"
 
 
-def test_get_company_returns_company(db):
+async def test_get_company_returns_company(db, async_db):
     company = make_company(db)
-    result = companies.get_company(db, company.id)
+    result = await companies.get_company(async_db, company.id)
     assert result.id == company.id
     assert result.name == "Nintendo"
 
 
-def test_get_company_not_found(db):
+async def test_get_company_not_found(async_db):
     with pytest.raises(HTTPException) as exc:
-        companies.get_company(db, 999)
+        await companies.get_company(async_db, 999)
     assert exc.value.status_code == 404
     assert exc.value.detail == "Company not found"
 
 
-def test_create_company_success(db):
+async def test_create_company_success(async_db):
     payload = schemas.CompanyCreate(name="Capcom", country="Japan")
-    result = companies.create_company(db, payload)
+    result = await companies.create_company(async_db, payload)
     assert result.id is not None
     assert result.name == "Capcom"
 
 
-def test_create_company_duplicate_raises_conflict(db):
+async def test_create_company_duplicate_raises_conflict(db, async_db):
     make_company(db, name="Capcom")
     payload = schemas.CompanyCreate(name="Capcom", country="Japan")
     with pytest.raises(HTTPException) as exc:
-        companies.create_company(db, payload)
+        await companies.create_company(async_db, payload)
     assert exc.value.status_code == 409
     assert exc.value.detail == "Company already exists"
 
 
-def test_update_company_success(db):
+async def test_update_company_success(db, async_db):
     company = make_company(db)
     payload = schemas.CompanyUpdate(country="USA")
-    result = companies.update_company(db, company.id, payload)
+    result = await companies.update_company(async_db, company.id, payload)
     assert result.country == "USA"
     assert result.name == "Nintendo"
 
 
-def test_update_company_not_found(db):
+async def test_update_company_not_found(async_db):
     payload = schemas.CompanyUpdate(country="USA")
     with pytest.raises(HTTPException) as exc:
-        companies.update_company(db, 999, payload)
+        await companies.update_company(async_db, 999, payload)
     assert exc.value.status_code == 404
 
 
-def test_delete_company_success(db):
+async def test_delete_company_success(db, async_db):
     company = make_company(db)
-    companies.delete_company(db, company.id)
+    await companies.delete_company(async_db, company.id)
     with pytest.raises(HTTPException):
-        companies.get_company(db, company.id)
+        await companies.get_company(async_db, company.id)
+
+
+async def test_delete_company_not_found(async_db):
+    with pytest.raises(HTTPException) as exc:
+        await companies.delete_company(async_db, 999)
+    assert exc.value.status_code == 404
+
+
+async def test_list_companies_after_cursor(db, async_db):
+    for name in ["A", "B", "C"]:
+        make_company(db, name=name)
+    first = await companies.list_companies(async_db, limit=2)
+    cursor = pagination.next_cursor(first, "id", 2)
+    result = await companies.list_companies(async_db, limit=2, after=cursor)
+    assert [c.name for c in result] == ["C"]
+    assert pagination.next_cursor(result, "id", 2) is None
+
+
+async def test_list_companies_after_cursor_sorted_by_name(db, async_db):
+    for name in ["Sega", "Atari", "Capcom"]:
+        make_company(db, name=name)
+    first = await companies.list_companies(async_db, limit=1, sort="name")
+    assert first[0].name == "Atari"
+    cursor = pagination.next_cursor(first, "name", 1)
+    result = await companies.list_companies(
+        async_db, limit=5, after=cursor, sort="name"
+    )
+    assert [c.name for c in result] == ["Capcom", "Sega"]
+
+
+async def test_list_companies_cursor_sort_mismatch(async_db):
+    cursor = pagination.encode_cursor("id", [1])
+    with pytest.raises(HTTPException) as exc:
+        await companies.list_companies(async_db, after=cursor, sort="name")
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Invalid cursor"
+
+
+@pytest.mark.parametrize(
+    "sort, values",
+    [("name", [["Sega"], 1]), ("name", [{"a": 1}, 1]), ("founded_year", ["1983", 1])],
+)
+async def test_list_companies_cursor_value_of_wrong_type(async_db, sort, values):
+    cursor = pagination.encode_cursor(sort, values)
+    with pytest.raises(HTTPException) as exc:
+        await companies.list_companies(async_db, after=cursor, sort=sort)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Invalid cursor"
+
+
+async def test_list_companies_skip_with_after(async_db):
+    cursor = pagination.encode_cursor("id", [1])
+    with pytest.raises(HTTPException) as exc:
+        await companies.list_companies(async_db, skip=1, after=cursor)
+    assert exc.value.status_code == 400
+
+
+async def test_get_company_with_teams_loads_teams(db, async_db):
+    company = make_company(db)
+    db.add(models.Team(name="EPD", specialty="Development", company_id=company.id))
+    db.commit()
+    result = await companies.get_company_with_teams(async_db, company.id)
+    assert [team.name for team in result.teams] == ["EPD"]
 
 
-def test_delete_company_not_found(db):
+async def test_get_company_with_teams_not_found(async_db):
     with pytest.raises(HTTPException) as exc:
-        companies.delete_company(db, 999)
+        await companies.get_company_with_teams(async_db, 999)
     assert exc.value.status_code == 404
+
+
+async def test_get_company_with_teams_filters_and_paginates(db, async_db):
+    company = make_company(db)
+    for name, specialty in [("A", "Audio"), ("B", "Art"), ("C", "Audio")]:
+        db.add(models.Team(name=name, specialty=specialty, company_id=company.id))
+    db.commit()
+    result = await companies.get_company_with_teams(
+        async_db, company.id, specialty="Audio"
+    )
+    assert [team.name for team in result.teams] == ["A", "C"]
+    result = await companies.get_company_with_teams(async_db, company.id, limit=2)
+    assert [team.name for team in result.teams] == ["A", "B"]
+    cursor = pagination.next_cursor(result.teams, "id", 2)
+    result = await companies.get_company_with_teams(
+        async_db, company.id, limit=2, after=cursor
+    )
+    assert [team.name for team in result.teams] == ["C"]
+
+
+async def test_bulk_create_companies(db, async_db):
+    make_company(db, name="Sega")
+    payloads = [
+        schemas.CompanyCreate(name=name, country="Japan")
+        for name in ["Capcom", "Sega", "Konami", "Capcom"]
+    ]
+    result = await companies.bulk_create_companies(async_db, payloads)
+    assert result["created"] == 2
+    assert result["failed"] == 2
+    assert [r["status"] for r in result["results"]] == [
+        "created",
+        "conflict",
+        "created",
+        "conflict",
+    ]
+    created = await companies.get_company(async_db, result["results"][2]["id"])
+    assert created.name == "Konami"
+
+
+async def test_export_companies_streams_in_batches(db, async_db, monkeypatch):
+    monkeypatch.setattr(export, "BATCH_SIZE", 2)
+    for name in ["A", "B", "C"]:
+        make_company(db, name=name)
+    chunks = [chunk async for chunk in companies.export_companies(async_db)]
+    assert len(chunks) == 2
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["A", "B", "C"]
+
+
+async def test_export_companies_csv(db, async_db):
+    make_company(db, name="Sega")
+    chunks = [chunk async for chunk in companies.export_companies(async_db, "csv")]
+    assert b"".join(chunks).decode().splitlines() == [
+        "id,name,country,founded_year,website,description",
+        "1,Sega,Japan,,,",
+    ]
+
+
+async def byte_stream(data: bytes):
+    yield data
+
+
+async def test_import_companies(db, async_db):
+    make_company(db, name="Sega")
+    data = (
+        b'{"name": "Capcom", "country": "Japan"}\n'
+        b'{"name": "Sega", "country": "Japan"}\n'
+        b'{"name": "Capcom", "country": "Japan"}\n'
+        b'{"name": "Konami"}\n'
+    )
+    report = await companies.import_companies(async_db, byte_stream(data))
+    assert report["created"] == 1
+    assert report["rejected"] == 3
+    errors = sorted((error["line"], error["detail"]) for error in report["errors"])
+    assert errors[0] == (2, "Company already exists")
+    assert [line for line, _ in errors] == [2, 3, 4]
+
+
+async def test_list_companies_filters(db, async_db):
+    for name, country, year in [
+        ("Sega", "Japan", 1960),
+        ("Capcom", "Japan", 1979),
+        ("Konami", "Japan", None),
+        ("Atari", "USA", 1972),
+    ]:
+        db.add(models.Company(name=name, country=country, founded_year=year))
+    db.commit()
+    result = await companies.list_companies(
+        async_db, country="Japan", founded_year_min=1970, sort="founded_year"
+    )
+    assert [company.name for company in result] == ["Capcom"]
+    result = await companies.list_companies(
+        async_db, country="Japan", sort="founded_year"
+    )
+    assert [company.name for company in result] == ["Sega", "Capcom", "Konami"]
+
+
+async def test_list_companies_loads_only_requested_columns(db, async_db):
+    make_company(db)
+    [company] = await companies.list_companies(async_db, columns=("id", "name"))
+    assert company.name == "Nintendo"
+    assert {"description", "website", "country"} <= inspect(company).unloaded
@@ -0,0 +1,117 @@
+import datetime
+
+from sqlalchemy import func, select
+
+from play import const, models, schemas
+from play.services import stats, teams
+
+
+def seed(db):
+    companies = [
+        models.Company(name="Sega", country="Japan", founded_year=1960),
+        models.Company(name="Capcom", country="Japan", founded_year=1979),
+        models.Company(name="Ubisoft", country="France", founded_year=1986),
+        models.Company(name="Quantic Dream", country="France"),
+        models.Company(name="Remedy", country="Finland", founded_year=1995),
+    ]
+    db.add_all(companies)
+    db.commit()
+    return companies
+
+
+async def test_company_stats_group_by_country(db, async_db):
+    sega, capcom, *_ = seed(db)
+    for name, size, company in [("A", 10, sega), ("B", 20, sega), ("C", None, capcom)]:
+        await teams.create_team(
+            async_db,
+            schemas.TeamCreate(
+                name=name, specialty="Art", size=size, company_id=company.id
+            ),
+        )
+
+    result = await stats.company_stats(async_db, "country")
+    assert result["group_by"] == "country"
+    assert result["max_staleness"] == const.STATS_REFRESH_SECONDS
+    france, japan, finland = result["groups"]
+    assert japan == {
+        "key": "Japan",
+        "company_count": 2,
+        "team_count": 3,
+        "total_headcount": 30,
+        "average_headcount": 15.0,
+        "founded_years": {"1960": 1, "1970": 1},
+    }
+    assert france["founded_years"] == {"1980": 1, "unknown": 1}
+    assert finland["key"] == "Finland"
+
+
+async def test_team_stats_group_by_specialty_and_company(db, async_db):
+    sega, capcom, *_ = seed(db)
+    for name, specialty, size, company in [
+        ("A", "Art", 10, sega),
+        ("B", "Art", None, capcom),
+        ("C", "Audio", 4, sega),
+    ]:
+        await teams.create_team(
+            async_db,
+            schemas.TeamCreate(
+                name=name, specialty=specialty, size=size, company_id=company.id
+            ),
+        )
+
+    result = await stats.team_stats(async_db, "specialty")
+    assert result["groups"] == [
+        {"key": "Art", "team_count": 2, "total_size": 10, "average_size": 10.0},
+        {"key": "Audio", "team_count": 1, "total_size": 4, "average_size": 4.0},
+    ]
+    result = await stats.team_stats(async_db, "company_id", limit=1)
+    assert result["groups"] == [
+        {"key": sega.id, "team_count": 2, "total_size": 14, "average_size": 7.0}
+    ]
+    assert result["max_staleness"] == 0
+    result = await stats.team_stats(async_db, "company_id", skip=1)
+    assert result["groups"] == [
+        {"key": capcom.id, "team_count": 1, "total_size": 0, "average_size": 0.0}
+    ]
+    # Teams per company are read from the companies, not from a rollup.
+    rollups = await async_db.scalars(select(models.StatsRollup.dimension).distinct())
+    assert set(rollups) == {"teams.specialty"}
+
+
+async def test_stats_are_served_from_rollup_until_stale(db, async_db, monkeypatch):
+    seed(db)
+    first = await stats.team_stats(async_db)
+    assert first["groups"] == []
+
+    db.add(models.Team(name="A", specialty="Art", company_id=1))
+    db.commit()
+    second = await stats.team_stats(async_db)
+    assert second["groups"] == []
+    assert second["refreshed_at"] == first["refreshed_at"]
+
+    refreshed_at = datetime.datetime.now(datetime.UTC) - datetime.timedelta(
+        seconds=const.STATS_REFRESH_SECONDS + 1
+    )
+    await async_db.execute(
+        models.StatsRefresh.__table__.update().values(refreshed_at=refreshed_at)
+    )
+    await async_db.commit()
+    third = await stats.team_stats(async_db)
+    assert [group["key"] for group in third["groups"]] == ["Art"]
+    assert third["refreshed_at"] > first["refreshed_at"]
+
+
+async def test_refresh_skips_fresh_rollup(db, async_db):
+    seed(db)
+    refreshed_at = await stats.refresh(async_db, "companies.country", 60)
+    assert await stats.refresh(async_db, "companies.country", 60) == refreshed_at
+    assert await stats.refresh(async_db, "companies.country", 0) > refreshed_at
+
+
+async def test_stats_without_staleness_skip_rollups(db, async_db):
+    seed(db)
+    result = await stats.company_stats(async_db, "country", limit=2, max_age=0)
+    assert [group["key"] for group in result["groups"]] == ["France", "Japan"]
+    assert result["max_staleness"] == 0
+    assert await async_db.scalar(select(func.count(models.StatsRollup.key))) == 0
+    assert await async_db.scalar(select(func.count(models.StatsRefresh.dimension))) == 0
@@ -1,7 +1,10 @@
+import json
+
 import pytest
 from fastapi import HTTPException
+from sqlalchemy import update
 
-from play import models, schemas
+from play import models, pagination, schemas
 from play.services import teams
 
 
@@ -21,106 +24,300 @@ def make_team(db, company_id, name="Mario Team", specialty="Development"):
     return team
 
 
-def test_list_teams_empty(db):
-    assert teams.list_teams(db) == []
+async def test_list_teams_empty(async_db):
+    assert await teams.list_teams(async_db) == []
 
 
-def test_list_teams_returns_all(db):
+async def test_list_teams_returns_all(db, async_db):
     company = make_company(db)
     make_team(db, company.id, name="Team A")
     make_team(db, company.id, name="Team B")
-    result = teams.list_teams(db)
+    result = await teams.list_teams(async_db)
     assert len(result) == 2
 
 
-def test_list_teams_skip_and_limit(db):
+async def test_list_teams_skip_and_limit(db, async_db):
     company = make_company(db)
     for name in ["A", "B", "C"]:
         make_team(db, company.id, name=name)
-    result = teams.list_teams(db, skip=1, limit=1)
+    result = await teams.list_teams(async_db, skip=1, limit=1)
     assert len(result) == 1
     assert result[0].name == "B"
 
 
-def test_get_team_returns_team(db):
+async def test_get_team_returns_team(db, async_db):
     company = make_company(db)
     team = make_team(db, company.id)
-    result = teams.get_team(db, team.id)
+    result = await teams.get_team(async_db, team.id)
     assert result.id == team.id
     assert result.name == "Mario Team"
 
 
-def test_get_team_not_found(db):
+async def test_get_team_not_found(async_db):
     with pytest.raises(HTTPException) as exc:
-        teams.get_team(db, 999)
+        await teams.get_team(async_db, 999)
     assert exc.value.status_code == 404
     assert exc.value.detail == "Team not found"
 
 
-def test_create_team_success(db):
+async def test_create_team_success(db, async_db):
     company = make_company(db)
     payload = schemas.TeamCreate(
         name="Zelda Team", specialty="Development", company_id=company.id
     )
-    result = teams.create_team(db, payload)
+    result = await teams.create_team(async_db, payload)
     assert result.id is not None
     assert result.company_id == company.id
 
 
-def test_create_team_company_not_found(db):
+async def test_create_team_company_not_found(async_db):
     payload = schemas.TeamCreate(
         name="Ghost Team", specialty="Development", company_id=999
     )
     with pytest.raises(HTTPException) as exc:
-        teams.create_team(db, payload)
+        await teams.create_team(async_db, payload)
     assert exc.value.status_code == 404
     assert exc.value.detail == "Company not found"
 
 
-def test_update_team_success(db):
+async def test_update_team_success(db, async_db):
     company = make_company(db)
     team = make_team(db, company.id)
     payload = schemas.TeamUpdate(name="DK Team", company_id=company.id)
-    result = teams.update_team(db, team.id, payload)
+    result = await teams.update_team(async_db, team.id, payload)
     assert result.name == "DK Team"
     assert result.company_id == company.id
 
 
-def test_update_team_change_company(db):
+async def test_update_team_change_company(db, async_db):
     company_a = make_company(db, name="Nintendo")
     company_b = make_company(db, name="Sega")
     team = make_team(db, company_a.id)
     payload = schemas.TeamUpdate(company_id=company_b.id)
-    result = teams.update_team(db, team.id, payload)
+    result = await teams.update_team(async_db, team.id, payload)
     assert result.company_id == company_b.id
 
 
-def test_update_team_company_not_found(db):
+async def test_update_team_company_not_found(db, async_db):
     company = make_company(db)
     team = make_team(db, company.id)
     payload = schemas.TeamUpdate(company_id=999)
     with pytest.raises(HTTPException) as exc:
-        teams.update_team(db, team.id, payload)
+        await teams.update_team(async_db, team.id, payload)
     assert exc.value.status_code == 404
     assert exc.value.detail == "Company not found"
 
 
-def test_update_team_not_found(db):
+async def test_update_team_not_found(async_db):
     payload = schemas.TeamUpdate(name="Ghost", company_id=999)
     with pytest.raises(HTTPException) as exc:
-        teams.update_team(db, 999, payload)
+        await teams.update_team(async_db, 999, payload)
     assert exc.value.status_code == 404
 
 
-def test_delete_team_success(db):
+async def test_delete_team_success(db, async_db):
     company = make_company(db)
     team = make_team(db, company.id)
-    teams.delete_team(db, team.id)
+    await teams.delete_team(async_db, team.id)
     with pytest.raises(HTTPException):
-        teams.get_team(db, team.id)
+        await teams.get_team(async_db, team.id)
 
 
-def test_delete_team_not_found(db):
+async def test_delete_team_not_found(async_db):
     with pytest.raises(HTTPException) as exc:
-        teams.delete_team(db, 999)
+        await teams.delete_team(async_db, 999)
     assert exc.value.status_code == 404
+
+
+async def test_list_teams_after_cursor(db, async_db):
+    company = make_company(db)
+    for name in ["A", "B", "C"]:
+        make_team(db, company.id, name=name)
+    first = await teams.list_teams(async_db, limit=2)
+    cursor = pagination.next_cursor(first, "id", 2)
+    result = await teams.list_teams(async_db, limit=2, after=cursor)
+    assert [t.name for t in result] == ["C"]
+
+
+async def test_list_teams_after_cursor_sorted_by_name_with_ties(db, async_db):
+    company = make_company(db)
+    for name in ["B", "A", "B", "A"]:
+        make_team(db, company.id, name=name)
+    seen = []
+    cursor = None
+    while True:
+        page = await teams.list_teams(async_db, limit=1, after=cursor, sort="name")
+        seen.extend((t.name, t.id) for t in page)
+        cursor = pagination.next_cursor(page, "name", 1)
+        if cursor is None:
+            break
+    assert seen == sorted(seen)
+    assert len(seen) == 4
+
+
+async def test_bulk_create_teams(db, async_db):
+    company = make_company(db)
+    payloads = [
+        schemas.TeamCreate(name="A", specialty="Art", company_id=company.id),
+        schemas.TeamCreate(name="B", specialty="Art", company_id=999),
+        schemas.TeamCreate(name="C", specialty="Art", company_id=company.id),
+    ]
+    result = await teams.bulk_create_teams(async_db, payloads)
+    assert result["created"] == 2
+    assert [r["status"] for r in result["results"]] == [
+        "created",
+        "company_not_found",
+        "created",
+    ]
+    created = await teams.get_team(async_db, result["results"][2]["id"])
+    assert created.name == "C"
+
+
+async def test_export_teams(db, async_db):
+    company = make_company(db)
+    make_team(db, company.id, name="A")
+    make_team(db, company.id, name="B")
+    chunks = [chunk async for chunk in teams.export_teams(async_db)]
+    rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [row["name"] for row in rows] == ["A", "B"]
+    assert rows[0]["company_id"] == company.id
+
+
+async def byte_stream(data: bytes):
+    yield data
+
+
+async def test_import_teams_by_company_name(db, async_db):
+    company = make_company(db, name="Sega")
+    data = (
+        b"name,specialty,size,company_id,company_name\n"
+        b"Sonic Team,Development,40,,Sega\n"
+        b"AM2,Development,,%d,\n"
+        b"Ghost,Development,,,Atari\n"
+        b"Both,Development,,%d,Sega\n" % (company.id, company.id)
+    )
+    report = await teams.import_teams(async_db, byte_stream(data), "csv")
+    assert report["created"] == 2
+    errors = sorted((error["line"], error["detail"]) for error in report["errors"])
+    assert errors[0] == (4, "Company not found")
+    assert errors[1][0] == 5
+    created = await teams.list_teams(async_db)
+    assert [(team.name, team.size, team.company_id) for team in created] == [
+        ("Sonic Team", 40, company.id),
+        ("AM2", None, company.id),
+    ]
+
+
+async def test_team_writes_increment_company_versions(db, async_db):
+    first = make_company(db, name="Sega")
+    second = make_company(db, name="Atari")
+    team = await teams.create_team(
+        async_db, schemas.TeamCreate(name="A", specialty="Art", company_id=first.id)
+    )
+    await teams.update_team(async_db, team.id, schemas.TeamUpdate(company_id=second.id))
+    assert team.version == 2
+    db.expire_all()
+    assert (db.get(models.Company, first.id).version, second.version) == (3, 2)
+
+
+async def test_list_teams_filters(db, async_db):
+    first = make_company(db, name="Sega")
+    second = make_company(db, name="Atari")
+    for name, specialty, size, company in [
+        ("A", "Art", 5, first),
+        ("B", "Art", 50, first),
+        ("C", "Audio", 10, first),
+        ("D", "Art", 10, second),
+    ]:
+        db.add(
+            models.Team(
+                name=name, specialty=specialty, size=size, company_id=company.id
+            )
+        )
+    db.commit()
+    result = await teams.list_teams(
+        async_db, company_id=first.id, specialty="Art", size_min=5, size_max=10
+    )
+    assert [team.name for team in result] == ["A"]
+
+
+async def test_list_teams_sorted_by_nullable_size(db, async_db):
+    company = make_company(db)
+    for name, size in [("A", None), ("B", 3), ("C", None), ("D", 1), ("E", 3)]:
+        db.add(
+            models.Team(name=name, specialty="Art", size=size, company_id=company.id)
+        )
+    db.commit()
+    names = []
+    cursor = None
+    while True:
+        page = await teams.list_teams(async_db, limit=2, after=cursor, sort="size")
+        names += [team.name for team in page]
+        cursor = pagination.next_cursor(page, "size", 2)
+        if cursor is None:
+            break
+    assert names == ["D", "B", "E", "A", "C"]
+
+
+def aggregates(db, *companies):
+    db.expire_all()
+    return [
+        (
+            db.get(models.Company, company.id).team_count,
+            db.get(models.Company, company.id).total_headcount,
+        )
+        for company in companies
+    ]
+
+
+async def test_team_writes_maintain_company_aggregates(db, async_db):
+    first = make_company(db, name="Sega")
+    second = make_company(db, name="Atari")
+    team = await teams.create_team(
+        async_db,
+        schemas.TeamCreate(name="A", specialty="Art", size=10, company_id=first.id),
+    )
+    await teams.bulk_create_teams(
+        async_db,
+        [
+            schemas.TeamCreate(name="B", specialty="Art", size=5, company_id=first.id),
+            schemas.TeamCreate(name="C", specialty="Art", company_id=second.id),
+        ],
+    )
+    assert aggregates(db, first, second) == [(2, 15), (1, 0)]
+
+    await teams.update_team(async_db, team.id, schemas.TeamUpdate(size=12))
+    assert aggregates(db, first, second) == [(2, 17), (1, 0)]
+
+    await teams.update_team(async_db, team.id, schemas.TeamUpdate(company_id=second.id))
+    assert aggregates(db, first, second) == [(1, 5), (2, 12)]
+
+    await teams.delete_team(async_db, team.id)
+    assert aggregates(db, first, second) == [(1, 5), (1, 0)]
+
+
+async def test_delete_team_subtracts_the_deleted_row(db, async_db):
+    company = make_company(db, name="Sega")
+    team = await teams.create_team(
+        async_db,
+        schemas.TeamCreate(name="A", specialty="Art", size=10, company_id=company.id),
+    )
+    # Another worker resizes the team after this session loaded it.
+    await teams.get_team(async_db, team.id)
+    db.execute(update(models.Team).where(models.Team.id == team.id).values(size=12))
+    db.execute(
+        update(models.Company)
+        .where(models.Company.id == company.id)
+        .values(total_headcount=12)
+    )
+    db.commit()
+
+    await teams.delete_team(async_db, team.id)
+    assert aggregates(db, company) == [(0, 0)]
+
+
+async def test_import_teams_maintains_company_aggregates(db, async_db):
+    company = make_company(db, name="Sega")
+    data = b'{"name": "A", "specialty": "Art", "size": 3, "company_name": "Sega"}\n'
+    await teams.import_teams(async_db, byte_stream(data * 2))
+    assert aggregates(db, company) == [(2, 6)]
@@ -0,0 +1,101 @@
+import pytest
+
+from play import models, slowqueries
+from play.services import companies
+
+
+@pytest.fixture
+def record_all(monkeypatch):
+    monkeypatch.setattr(slowqueries.slow_queries, "threshold", 1e-9)
+    return slowqueries.slow_queries
+
+
+def test_normalize_replaces_literals_and_placeholders():
+    statement = """
+        SELECT companies.id FROM companies
+        WHERE companies.country = 'Japan' AND companies.id IN ($1, $2, $3)
+        AND companies.founded_year > 1980 AND name = %(name)s
+        AND founded::text = :value LIMIT 10
+    """
+    assert slowqueries.normalize(statement) == (
+        "SELECT companies.id FROM companies WHERE companies.country = ? "
+        "AND companies.id IN (?, ...) AND companies.founded_year > ? "
+        "AND name = ? AND founded::text = ? LIMIT ?"
+    )
+
+
+def test_parameter_shape_hides_values():
+    assert slowqueries.parameter_shape({"name": "Sega", "id": 1}) == {
+        "name": "str",
+        "id": "int",
+    }
+    assert slowqueries.parameter_shape(("Sega", None)) == ["str", "NoneType"]
+    assert slowqueries.parameter_shape([(1,), (2,)], executemany=True) == {
+        "rows": 2,
+        "row": ["int"],
+    }
+
+
+async def test_records_slow_statements_with_caller(async_db, record_all):
+    async_db.add(models.Company(name="Sega", country="Japan"))
+    await async_db.commit()
+    record_all.clear()
+    await companies.get_company(async_db, 1)
+    (entry,) = record_all.entries()
+    assert entry["statement"].startswith("SELECT companies.id")
+    assert entry["statement"].endswith("WHERE companies.id = ?")
+    assert entry["parameters"] == ["int"]
+    assert entry["caller"] == "play.services.companies.get_company"
+    assert entry["plan"] is None
+
+
+def test_ring_buffer_keeps_recent_entries(db, monkeypatch):
+    log = slowqueries.SlowQueryLog(threshold=1e-9, explain_rate=0, size=2)
+    monkeypatch.setattr(slowqueries, "slow_queries", log)
+    for id in range(3):
+        db.get(models.Company, id)
+    assert log.recorded == 3
+    assert len(log.entries()) == 2
+    assert log.entries()[0]["caller"] is None
+
+
+class RecordingCursor:
+    def __init__(self, executed):
+        self.executed = executed
+
+    def execute(self, statement, parameters=None):
+        self.executed.append(statement)
+
+    def fetchall(self):
+        return [("Result",)]
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self):
+        return RecordingCursor(self.executed)
+
+
+@pytest.mark.parametrize(
+    "statement, analyze",
+    [
+        ("SELECT id FROM companies", True),
+        ("WITH moved AS (DELETE FROM teams RETURNING id) SELECT * FROM moved", False),
+        ("UPDATE companies SET name = 'Sega'", False),
+    ],
+)
+def test_explain_analyzes_only_selects_and_rolls_back(statement, analyze):
+    connection = RecordingConnection()
+    assert slowqueries.explain(connection, statement, ()) == "Result"
+    explained = f"EXPLAIN {'(ANALYZE, BUFFERS) ' if analyze else ''}{statement}"
+    assert connection.executed == [
+        "SAVEPOINT slow_query_explain",
+        explained,
+        "ROLLBACK TO SAVEPOINT slow_query_explain",
+        "RELEASE SAVEPOINT slow_query_explain",
+    ]
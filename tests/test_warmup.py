@@ -0,0 +1,93 @@
+from fastapi.testclient import TestClient
+
+from play import cache, database, metrics, models, warmup
+from play.main import create_app
+from play.settings import Settings
+
+
+def make_app(tmp_path, **settings):
+    app = create_app(
+        Settings(
+            database_url=f"sqlite:///{tmp_path / 'play.db'}",
+            async_database_url=f"sqlite+aiosqlite:///{tmp_path / 'play.db'}",
+            autocomplete_refresh_seconds=0,
+            stats_refresh_seconds=0,
+            **settings,
+        )
+    )
+    engine = app.state.database.engine
+    database.Base.metadata.create_all(engine)
+    with app.state.database.session_factory() as db:
+        for id, teams in [(1, 1), (2, 3), (3, 2)]:
+            db.add(
+                models.Company(
+                    id=id, name=f"Studio {id}", country="Japan", team_count=teams
+                )
+            )
+        db.add(models.Team(name="Engine", specialty="Engine", size=5, company_id=1))
+        db.commit()
+    engine.dispose()
+    return app
+
+
+def test_ready_before_startup(tmp_path):
+    response = TestClient(make_app(tmp_path)).get("/ready")
+    assert response.status_code == 503
+    assert response.json() == {"ready": False, "warmup": None}
+
+
+def test_lifespan_warms_up_before_ready(tmp_path):
+    app = make_app(tmp_path, warmup_connections=3, warmup_hot_companies=2)
+
+    with TestClient(app) as client:
+        report = app.state.warmup
+        assert report["completed"] is True
+        assert report["connections"] == 3
+        assert app.state.database.async_engine.pool.checkedin() == 3
+        assert report["requests"] == len(warmup.REQUESTS)
+        assert app.openapi_schema is not None
+        assert report["paths"] == len(app.openapi_schema["paths"])
+        assert report["hot_companies"] == 2
+        assert cache.responses.get(("company", 2, False, None)) is not None
+        assert cache.responses.get(("company", 3, False, None)) is not None
+        assert metrics.requests.requests == {}
+
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+
+    assert app.state.ready is False
+
+
+def test_failed_steps_do_not_prevent_readiness(tmp_path):
+    app = make_app(tmp_path)
+    database.Base.metadata.drop_all(app.state.database.engine)
+    app.state.database.engine.dispose()
+
+    with TestClient(app) as client:
+        assert app.state.warmup["requests"] is None
+        assert app.state.warmup["completed"] is True
+        assert client.get("/ready").status_code == 200
+
+
+def test_warmup_timeout(tmp_path):
+    app = make_app(tmp_path, warmup_timeout=0)
+
+    with TestClient(app) as client:
+        assert app.state.warmup["completed"] is False
+        assert client.get("/ready").status_code == 200
+
+
+def test_metrics_published_only_after_warmup(tmp_path, monkeypatch):
+    app = make_app(tmp_path, metrics_multiprocess_dir=str(tmp_path))
+    published = []
+
+    async def publish(pools, directory, interval):
+        published.append((app.state.warmup, dict(metrics.requests.requests)))
+
+    monkeypatch.setattr(metrics, "publish", publish)
+    with TestClient(app):
+        pass
+    ((report, requests),) = published
+    assert report["requests"] == len(warmup.REQUESTS)
+    assert requests == {}